@@ -0,0 +1,154 @@
+# benchmarks/concurrencia.py
+# ─── Escrituras concurrentes sobre el registro (hilos y procesos) ────────────
+#
+# Desde vizualization/streamlit:
+#     python -m benchmarks.concurrencia                   # CSV, 4 procesos × 3 hilos
+#     python -m benchmarks.concurrencia --almacen sqlite --procesos 8 --n 100
+#
+# Trabaja en un directorio temporal (no toca ../../data). Varios procesos,
+# cada uno con varios hilos, incrementan un contador en unas pocas filas con
+# el patrón de la página de edición: leer la fila, actualizar con su
+# version_fila y, ante ConflictoConcurrencia, releer y reintentar. De vez en
+# cuando agregan una fila nueva. Con el CSV el journal se compacta seguido
+# (MAX_JOURNAL_BYTES pequeño) para cruzar compactaciones con lecturas.
+#
+# Verifica que no se pierda ninguna actualización (la suma de los contadores
+# es el número de escrituras aceptadas), que los ids sigan siendo únicos y
+# que los agregados incrementales coincidan con reconstruirlos desde cero.
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+from utils import agregados, almacen
+from utils.almacen import AlmacenCSV, get_almacen
+from utils.constantes import FIELDNAMES
+from utils.csv_helpers import (
+    ConflictoConcurrencia, actualizar_registro, guardar_registro, guardar_registros,
+    leer_registros, next_id, version_fila, version_registros,
+)
+
+IDS = [1, 2, 3, 4, 5]
+CAMPO = "historia_clinica"                          # texto libre: sirve de contador
+
+
+def _preparar(backend: str, directorio: str, max_journal: int):
+    """Mismo backend y directorio de trabajo en cada proceso (se lanzan con spawn)."""
+    os.chdir(directorio)
+    almacen.ALMACEN_REGISTROS = backend
+    AlmacenCSV.MAX_JOURNAL_BYTES = max_journal
+    get_almacen.cache_clear()
+
+
+def _trabajador(backend: str, directorio: str, max_journal: int, semilla: int,
+                hilos: int, n: int) -> tuple[int, int]:
+    _preparar(backend, directorio, max_journal)
+    rnd = random.Random(semilla)
+    cuenta = {"hechos": 0, "conflictos": 0}
+    lock = threading.Lock()
+
+    def hilo():
+        for _ in range(n):
+            with lock:
+                i, alta = rnd.choice(IDS), rnd.random() < 0.2
+            while True:
+                fila = get_almacen().obtener(i)
+                try:
+                    actualizar_registro(i, {CAMPO: int(fila[CAMPO]) + 1}, version=version_fila(fila))
+                    break
+                except ConflictoConcurrencia:
+                    with lock:
+                        cuenta["conflictos"] += 1
+            with lock:
+                cuenta["hechos"] += 1
+            if alta:
+                nueva = dict(fila, id=str(next_id()))
+                nueva["ficha_id"] = f"X{nueva['id']}"
+                guardar_registro(nueva)
+
+    trabajadores = [threading.Thread(target=hilo) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return cuenta["hechos"], cuenta["conflictos"]
+
+
+def correr(procesos: int = 4, hilos: int = 3, n: int = 40, max_journal: int = 4096) -> dict:
+    """
+    Corre la prueba sobre el registro del directorio actual (con el backend
+    activo de utils.almacen). Siembra las filas IDS si faltan. Retorna los
+    conteos y las verificaciones.
+    """
+    backend = almacen.ALMACEN_REGISTROS
+    _preparar(backend, os.getcwd(), max_journal)
+    existentes = set(leer_registros()["id"])
+    faltan = [str(i) for i in IDS if str(i) not in existentes]
+    if faltan:
+        base = {c: "" for c in FIELDNAMES}
+        guardar_registros(pd.DataFrame([dict(base, id=i, ficha_id=f"S{i}") for i in faltan],
+                                       columns=FIELDNAMES))
+    for i in IDS:
+        actualizar_registro(i, {CAMPO: 0})
+    agregados.reconstruir()
+    filas_inicio = len(leer_registros())
+
+    t = time.perf_counter()
+    with ProcessPoolExecutor(procesos, mp_context=get_context("spawn")) as pool:
+        futuros = [pool.submit(_trabajador, backend, os.getcwd(), max_journal, s, hilos, n)
+                   for s in range(procesos)]
+        res = [f.result() for f in futuros]
+    segundos = time.perf_counter() - t
+
+    df = leer_registros()
+    hechos = sum(h for h, _ in res)
+    suma = sum(int(df.loc[df["id"] == str(i), CAMPO].iloc[0]) for i in IDS)
+    version, grupos = agregados._leer(agregados._path())
+    desde_cero = agregados._a_grupos(agregados.agrupar(agregados.tipar_registros(get_almacen().leer())))
+    return {
+        "segundos":     segundos,
+        "hechos":       hechos,
+        "conflictos":   sum(c for _, c in res),
+        "suma":         suma,
+        "filas":        (filas_inicio, len(df)),
+        "ids_unicos":   bool(df["id"].is_unique),
+        "agregados_ok": version == version_registros() and grupos == desde_cero,
+    }
+
+
+def main(backend: str, procesos: int, hilos: int, n: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        trabajo = os.path.join(tmp, "a", "b")
+        os.makedirs(trabajo)
+        os.makedirs(os.path.join(tmp, "data"))
+        anterior = os.getcwd()
+        os.chdir(trabajo)
+        almacen.ALMACEN_REGISTROS = backend
+        try:
+            r = correr(procesos, hilos, n)
+        finally:
+            os.chdir(anterior)
+    print(f"{backend}: {procesos} procesos × {hilos} hilos × {n} actualizaciones\n")
+    print(f"{'tiempo':<24}{r['segundos']:>8.1f} s   ({r['hechos'] / r['segundos']:.0f} escrituras/s)")
+    print(f"{'aceptadas':<24}{r['hechos']:>8,}")
+    print(f"{'conflictos (reintentos)':<24}{r['conflictos']:>8,}")
+    print(f"{'filas':<24}{r['filas'][0]:>8,} → {r['filas'][1]:,}")
+    print(f"\nsin actualizaciones perdidas: {r['suma'] == r['hechos']} (suma {r['suma']:,})")
+    print(f"ids únicos: {r['ids_unicos']} · agregados consistentes: {r['agregados_ok']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de estrés de escrituras concurrentes")
+    parser.add_argument("--almacen", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--hilos", type=int, default=3, help="Hilos por proceso")
+    parser.add_argument("--n", type=int, default=40, help="Actualizaciones por hilo")
+    a = parser.parse_args()
+    main(a.almacen, a.procesos, a.hilos, a.n)
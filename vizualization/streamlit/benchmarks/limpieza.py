@@ -0,0 +1,198 @@
+# benchmarks/limpieza.py
+# ─── utils.limpieza vs. las versiones fila a fila del notebook ───────────────
+#
+# Desde vizualization/streamlit:
+#     python -m benchmarks.limpieza            # 200.000 registros sintéticos
+#     python -m benchmarks.limpieza --n 700000 # ~ un año nacional
+#
+# Genera registros con los errores típicos de la base histórica (años de
+# resultado/toma cruzados, 2ª muestra con año equivocado, pesos sin coma o
+# sin ceros), corre cada paso con ambas implementaciones, verifica que los
+# resultados coincidan y muestra los tiempos.
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import limpieza
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# VERSIONES DEL NOTEBOOK (copiadas tal cual, envueltas en funciones)
+# ══════════════════════════════════════════════════════════════════════════════
+
+def nb_corregir_año_resultado(df):
+    df = df.copy()
+    df["dias_pasados"] = (df["fecha_resultado"] - df["fecha_toma_muestra"]).dt.days
+    filas_negativas = df[df["dias_pasados"] < 0]
+    for index, row in filas_negativas.iterrows():
+        año_toma_muestra = row["fecha_toma_muestra"].year
+        nueva_fecha_resultado = row["fecha_resultado"].replace(year=año_toma_muestra)
+        df.at[index, "fecha_resultado"] = nueva_fecha_resultado
+    df["dias_pasados"] = (df["fecha_resultado"] - df["fecha_toma_muestra"]).dt.days
+    return df
+
+
+def nb_ajustar_año_toma(df):
+    df = df.copy()
+    df["fecha_toma_muestra"] = df.apply(
+        lambda row: row["fecha_toma_muestra"].replace(year=row["fecha_resultado"].year)
+        if row["fecha_resultado"].month != 1 else row["fecha_toma_muestra"],
+        axis=1
+    )
+    df["dias_pasados"] = (df["fecha_resultado"] - df["fecha_toma_muestra"]).dt.days
+    return df
+
+
+def nb_corregir_fechas(row):
+    fechas = [
+        row['fecha_toma_muestra'],
+        row['fecha_toma_muestra_2'],
+        row['fecha_resultado_muestra_2']
+    ]
+    fechas_dt = [pd.to_datetime(f) for f in fechas]
+    años = [f.year for f in fechas_dt]
+    año_comun = max(set(años), key=años.count)
+    for i, año in enumerate(años):
+        if año != año_comun:
+            fechas_dt[i] = fechas_dt[i].replace(year=año_comun)
+    if fechas_dt[2] < fechas_dt[1]:
+        fechas_dt[2] = fechas_dt[2].replace(year=año_comun + 1)
+    dias_pasados = (fechas_dt[2] - fechas_dt[1]).days
+    return pd.Series({
+        'fecha_toma_muestra': fechas_dt[0],
+        'fecha_toma_muestra_2': fechas_dt[1],
+        'fecha_resultado_muestra_2': fechas_dt[2],
+        'dias_pasados2': dias_pasados
+    })
+
+
+def nb_corregir_fechas_muestra2(df):
+    df = df.copy()
+    df["dias_pasados2"] = (df["fecha_resultado_muestra_2"] - df["fecha_toma_muestra_2"]).dt.days
+    mask_atipicas = (df["dias_pasados2"] < 0) | (df["dias_pasados2"] > 30)
+    if mask_atipicas.any():
+        df.loc[mask_atipicas, ['fecha_toma_muestra', 'fecha_toma_muestra_2', 'fecha_resultado_muestra_2', 'dias_pasados2']] = \
+            df[mask_atipicas].apply(nb_corregir_fechas, axis=1)
+    return df
+
+
+def nb_convertir_peso(valor):
+    valor_str = str(valor)
+    longitud = len(valor_str)
+    if longitud > 4:
+        parte_entera = valor_str[:4]
+        parte_decimal = valor_str[4:]
+        numero_float = float(f"{parte_entera}.{parte_decimal}")
+        return round(numero_float)
+    elif longitud == 3 and valor < 500:
+        return int(valor_str + '0')
+    elif longitud == 2:
+        numero = int(valor_str)
+        if numero > 50:
+            return int(valor_str + '0')
+        else:
+            return int(valor_str + '00')
+    return valor
+
+
+def nb_tiene_10_digitos(numero):
+    if numero == 0:
+        return True
+    return len(str(numero)) == 10
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DATOS SINTÉTICOS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _sin_29_feb(s: pd.Series) -> pd.Series:
+    """El notebook falla con replace(year=...) sobre un 29 de febrero; se evitan."""
+    return s.mask((s.dt.month == 2) & (s.dt.day == 29), s - pd.Timedelta(days=1))
+
+
+def generar(n: int, semilla: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    toma = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+    resultado = toma + pd.to_timedelta(rng.integers(1, 12, n), unit="D")
+    df = pd.DataFrame({"fecha_toma_muestra": toma, "fecha_resultado": resultado})
+
+    # ~1 %: resultado digitado con el año anterior / toma con el año siguiente
+    err = rng.random(n) < 0.01
+    df.loc[err, "fecha_resultado"] = df.loc[err, "fecha_resultado"] - pd.DateOffset(years=1)
+    err = rng.random(n) < 0.01
+    df.loc[err, "fecha_toma_muestra"] = df.loc[err, "fecha_toma_muestra"] + pd.DateOffset(years=1)
+
+    # ~4 % con 2ª muestra; parte de ellas con un año equivocado
+    m2 = rng.random(n) < 0.04
+    toma2 = df["fecha_resultado"] + pd.to_timedelta(rng.integers(3, 20, n), unit="D")
+    res2  = toma2 + pd.to_timedelta(rng.integers(1, 10, n), unit="D")
+    df["fecha_toma_muestra_2"]      = toma2.where(m2)
+    df["fecha_resultado_muestra_2"] = res2.where(m2)
+    err = m2 & (rng.random(n) < 0.2)
+    df.loc[err, "fecha_resultado_muestra_2"] += pd.DateOffset(years=1)
+    for c in df.columns:
+        df[c] = _sin_29_feb(df[c])
+
+    peso = rng.integers(1800, 4500, n)
+    tipo = rng.random(n)
+    peso = np.where(tipo < 0.02, peso * 10 + rng.integers(0, 10, n), peso)       # sin coma
+    peso = np.where((tipo >= 0.02) & (tipo < 0.03), peso // 100, peso)           # sin ceros
+    peso = np.where((tipo >= 0.03) & (tipo < 0.035), peso // 10, peso)
+    df["peso"] = peso
+
+    tel = rng.integers(3_000_000_000, 3_999_999_999, n)
+    tel = np.where(rng.random(n) < 0.05, 0, tel)
+    tel = np.where(rng.random(n) < 0.02, tel // 10, tel)
+    df["telefono_1"] = tel
+    return df
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _medir(fn, *args):
+    t = time.perf_counter()
+    r = fn(*args)
+    return r, time.perf_counter() - t
+
+
+def _iguales(a: pd.Series, b: pd.Series) -> bool:
+    return bool(((a == b) | (a.isna() & b.isna())).all())
+
+
+def main(n: int):
+    df = generar(n)
+    print(f"{n:,} registros sintéticos\n")
+    print(f"{'paso':<28}{'notebook':>12}{'vectorizado':>14}{'×':>8}  iguales")
+
+    pasos = [
+        ("corregir_año_resultado", nb_corregir_año_resultado, limpieza.corregir_año_resultado,
+         ["fecha_resultado", "dias_pasados"]),
+        ("ajustar_año_toma", nb_ajustar_año_toma, limpieza.ajustar_año_toma,
+         ["fecha_toma_muestra", "dias_pasados"]),
+        ("corregir_fechas (2ª muestra)", nb_corregir_fechas_muestra2, limpieza.corregir_fechas_muestra2,
+         ["fecha_toma_muestra", "fecha_toma_muestra_2", "fecha_resultado_muestra_2", "dias_pasados2"]),
+    ]
+    for nombre, nb, vec, cols in pasos:
+        a, t_nb  = _medir(nb, df)
+        b, t_vec = _medir(vec, df)
+        ok = all(_iguales(pd.to_datetime(a[c]) if c.startswith("fecha") else a[c].astype(float),
+                          b[c] if c.startswith("fecha") else b[c].astype(float)) for c in cols)
+        print(f"{nombre:<28}{t_nb:>11.2f}s{t_vec:>13.3f}s{t_nb / t_vec:>8.0f}  {ok}")
+
+    a, t_nb  = _medir(lambda s: s.apply(nb_convertir_peso), df["peso"])
+    b, t_vec = _medir(limpieza.convertir_peso, df["peso"])
+    print(f"{'convertir_peso':<28}{t_nb:>11.2f}s{t_vec:>13.3f}s{t_nb / t_vec:>8.0f}  "
+          f"{_iguales(a.astype(float), b.astype(float))}")
+
+    a, t_nb  = _medir(lambda s: s.apply(nb_tiene_10_digitos), df["telefono_1"])
+    b, t_vec = _medir(limpieza.tiene_10_digitos, df["telefono_1"])
+    print(f"{'tiene_10_digitos':<28}{t_nb:>11.2f}s{t_vec:>13.3f}s{t_nb / t_vec:>8.0f}  {_iguales(a, b)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de utils.limpieza contra el notebook")
+    parser.add_argument("--n", type=int, default=200_000, help="Registros sintéticos")
+    main(parser.parse_args().n)
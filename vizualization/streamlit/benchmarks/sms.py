@@ -0,0 +1,114 @@
+# benchmarks/sms.py
+# ─── utils.sms.enviar_lote contra un endpoint SMS falso local ────────────────
+#
+# Desde vizualization/streamlit:
+#     python -m benchmarks.sms                      # 300 mensajes, 100/s, 32 hilos
+#     python -m benchmarks.sms --n 500 --por-segundo 10 --trabajadores 16
+#
+# Levanta un servidor HTTP en localhost que responde como un proveedor SMS
+# (latencia fija y un porcentaje de 429), apunta SMS_URL a él y compara el
+# envío uno a uno con un cliente nuevo por mensaje (como el bucle anterior de
+# la página de Alertas) con enviar_lote. Verifica que el pico de mensajes en
+# cualquier ventana de un segundo no supere el tope y que no se pierda ninguno.
+# Por último mide el modo prueba, sin red, escribiendo su constancia en un
+# archivo temporal (SMS_ARCHIVO).
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ProveedorFalso(BaseHTTPRequestHandler):
+    latencia = 0.2
+    tasa_429 = 0.05
+    recibidos: list[float] = []
+    aceptados: set[str] = set()
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        cuerpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.latencia)
+        with self._lock:
+            self.recibidos.append(time.monotonic())
+            rechazar = random.random() < self.tasa_429
+            if not rechazar:
+                self.aceptados.add(cuerpo["body"])
+        respuesta = json.dumps({"sid": f"SM{len(self.recibidos):06d}"}).encode()
+        self.send_response(429 if rechazar else 201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(respuesta)))
+        self.end_headers()
+        self.wfile.write(respuesta)
+
+    def log_message(self, *args):
+        pass
+
+
+def _pico_por_segundo(tiempos: list[float]) -> int:
+    tiempos = sorted(tiempos)
+    pico, j = 0, 0
+    for i, t in enumerate(tiempos):
+        while tiempos[j] < t - 1:
+            j += 1
+        pico = max(pico, i - j + 1)
+    return pico
+
+
+def main(n: int, por_segundo: float, latencia: float, trabajadores: int):
+    _ProveedorFalso.latencia = latencia
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _ProveedorFalso)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    os.environ["SMS_URL"] = f"http://127.0.0.1:{servidor.server_port}/sms"
+
+    import requests
+    from utils import sms
+
+    envios = [(f"3{i:09d}", f"mensaje {i}") for i in range(n)]
+    print(f"{n} mensajes · {trabajadores} hilos · latencia {latencia:.2f} s · tope {por_segundo:g}/s · "
+          f"{_ProveedorFalso.tasa_429:.0%} de 429\n")
+
+    muestra = envios[:min(n, 30)]
+    t = time.perf_counter()
+    for tel, msg in muestra:
+        requests.post(os.environ["SMS_URL"], json={"to": "+57" + tel, "body": msg}, timeout=10)
+    uno_a_uno = (time.perf_counter() - t) / len(muestra) * n
+    print(f"{'uno a uno (estimado)':<24}{uno_a_uno:>8.1f} s")
+
+    _ProveedorFalso.recibidos.clear()
+    _ProveedorFalso.aceptados.clear()
+    avances = []
+    t = time.perf_counter()
+    resultados = sms.enviar_lote(envios, test_mode=False, por_segundo=por_segundo, trabajadores=trabajadores,
+                                 progreso=lambda h, total: avances.append(h))
+    lote = time.perf_counter() - t
+    ok = sum(r for r, _ in resultados)
+    print(f"{'enviar_lote':<24}{lote:>8.1f} s   ({uno_a_uno / lote:.0f}×)")
+    print(f"\nenviados {ok}/{n} · intentos {len(_ProveedorFalso.recibidos)} · "
+          f"pico {_pico_por_segundo(_ProveedorFalso.recibidos)}/s · "
+          f"progreso {avances[-1] if avances else 0}/{n}")
+    print("sin pérdidas:", len(_ProveedorFalso.aceptados) == ok)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sms.SMS_ARCHIVO = os.path.join(tmp, "sms_simulados.jsonl")
+        t = time.perf_counter()
+        sms.enviar_lote(envios, test_mode=True)
+        segundos = time.perf_counter() - t
+        with open(sms.SMS_ARCHIVO, encoding="utf-8") as f:
+            lineas = sum(1 for _ in f)
+    print(f"\nproveedor de archivo (modo prueba, sin red): {segundos:.2f} s → {lineas} líneas")
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de utils.sms contra un SMS falso local")
+    parser.add_argument("--n", type=int, default=300, help="Mensajes a enviar")
+    parser.add_argument("--por-segundo", type=float, default=100, help="Tope del proveedor")
+    parser.add_argument("--latencia", type=float, default=0.2, help="Segundos por respuesta")
+    parser.add_argument("--trabajadores", type=int, default=32, help="Hilos de enviar_lote")
+    a = parser.parse_args()
+    main(a.n, a.por_segundo, a.latencia, a.trabajadores)
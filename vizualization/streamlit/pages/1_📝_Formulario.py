@@ -1,38 +1,43 @@
 # pages/1_📝_Formulario.py
 import streamlit as st
 import pandas as pd
-from datetime import date, datetime
+from datetime import date
 
 from utils.constantes import (
     CSS, TSH_CORTE,
     TIPOS_DOC, TIPOS_MUESTRA, TIPOS_VINC, DESTINOS, SEXOS,
-    cargar_municipios, get_departamentos, get_municipios,
 )
+from utils.divipola import get_divipola
 from utils.validaciones import val_tsh, val_peso
-from utils.csv_helpers import (
-    next_id, guardar_registro, actualizar_registro, buscar_por_ficha,
-)
-from utils.sms import enviar_sms
+from utils.csv_helpers import (next_id, guardar_registro, actualizar_registro, buscar_por_ficha,
+                               version_fila, ConflictoConcurrencia)
+from utils.datos import cargar_indice_busqueda
+from utils.resultados import cargar_resultados
+from utils.alertas import AVISO_SIMULADOS, avisos_caso, avisos_simulados, despachar_avisos
 
 st.set_page_config(page_title="Formulario", page_icon="📝", layout="wide")
 st.markdown(CSS, unsafe_allow_html=True)
 
 st.title("📝 Ingreso de Datos")
 
-# ── Cargar municipios una sola vez ────────────────────────────────────────────
-@st.cache_data
-def _municipios():
-    return cargar_municipios()
+# Guardar un resultado que confirma el caso encola los SMS (utils.alertas);
+# aquí se despacha lo que una escritura anterior haya dejado sin despachar
+despachar_avisos()
+simulados = avisos_simulados()
+if simulados:
+    st.warning(AVISO_SIMULADOS, icon="🧪")
 
-df_mun = _municipios()
-deptos = get_departamentos(df_mun)  # [{cod, nombre}, ...]
+# ── Índice de municipios (se compila una vez por proceso) ─────────────────────
+divipola = get_divipola()
+deptos   = divipola.departamentos  # [{cod, nombre}, ...]
 
-if df_mun.empty:
+if not divipola:
     st.warning("⚠️ No se encontró `municipios.csv`. Verifica que esté en la raíz del proyecto.")
 
 modo = st.radio(
     "modo",
-    ["📋  Registrar nueva tarjeta", "🔬  Cargar resultados de laboratorio"],
+    ["📋  Registrar nueva tarjeta", "🔬  Cargar resultados de laboratorio",
+     "📥  Cargar archivo del analizador"],
     horizontal=True,
     label_visibility="collapsed",
 )
@@ -67,11 +72,10 @@ if modo == "📋  Registrar nueva tarjeta":
         # Resolver código del departamento seleccionado
         cod_depto_sel = ""
         if depto_sel_nombre != "Seleccionar...":
-            match = [d for d in deptos if d["nombre"] == depto_sel_nombre]
-            cod_depto_sel = match[0]["cod"] if match else ""
+            cod_depto_sel = divipola.cod_departamento(depto_sel_nombre)
 
         # ── Municipio (filtrado por departamento) ───────────────────────────
-        municipios_depto = get_municipios(df_mun, cod_depto_sel)
+        municipios_depto = divipola.municipios(cod_depto_sel)
         mun_nombres = ["Seleccionar..."] + [m["nombre"] for m in municipios_depto]
         mun_sel_nombre = st.selectbox(
             "★ Municipio",
@@ -84,8 +88,7 @@ if modo == "📋  Registrar nueva tarjeta":
         # Resolver código del municipio seleccionado
         cod_municipio_sel = ""
         if mun_sel_nombre != "Seleccionar...":
-            match = [m for m in municipios_depto if m["nombre"] == mun_sel_nombre]
-            cod_municipio_sel = match[0]["cod"] if match else ""
+            cod_municipio_sel = divipola.cod_municipio(mun_sel_nombre, cod_depto_sel)
 
     c4, c5 = st.columns(2)
     with c4:
@@ -222,26 +225,36 @@ if modo == "📋  Registrar nueva tarjeta":
 # ══════════════════════════════════════════════════════════════════════════════
 # MODO B — CARGAR RESULTADOS
 # ══════════════════════════════════════════════════════════════════════════════
-else:
+elif modo == "🔬  Cargar resultados de laboratorio":
     st.markdown("## 🔬 Carga de Resultados de Laboratorio")
-    st.caption("Busca el registro por No. de Ficha y agrega los resultados de TSH.")
-
-    col_busq, col_btn = st.columns([3, 1])
-    with col_busq:
-        ficha_buscar = st.text_input("No. de Ficha:", placeholder="369980", key="busq_ficha")
+    st.caption("Busca el registro por ficha, ficha 2, documento, historia clínica o apellido "
+               "y agrega los resultados de TSH.")
+
+    indice = cargar_indice_busqueda()
+    consulta = st.text_input("Buscar paciente:", placeholder="369980 · 1023456789 · GARCIA LO",
+                             key="busq_ficha")
+    coincidencias = indice.buscar(consulta) if consulta.strip() else []
+
+    col_sel, col_btn = st.columns([3, 1])
+    with col_sel:
+        elegido = st.selectbox(
+            f"{len(coincidencias)} coincidencia(s):" if consulta.strip() else "Coincidencias:",
+            coincidencias, format_func=indice.etiqueta, disabled=not coincidencias,
+        )
     with col_btn:
         st.markdown("<br>", unsafe_allow_html=True)
-        buscar = st.button("🔍  Buscar", key="btn_buscar", use_container_width=True)
+        buscar = st.button("🔍  Cargar", key="btn_buscar", use_container_width=True,
+                           disabled=elegido is None)
 
     reg = None
-    if buscar:
-        reg = buscar_por_ficha(ficha_buscar)
-        st.session_state["reg_encontrado"] = reg.to_dict() if reg is not None else None
+    if buscar and elegido is not None:
+        reg = indice.fila(elegido)
+        st.session_state["reg_encontrado"] = reg.to_dict()
     elif st.session_state.get("reg_encontrado"):
         reg = pd.Series(st.session_state["reg_encontrado"])
 
-    if buscar and reg is None:
-        st.error(f"No se encontró ningún registro con la ficha **{ficha_buscar}**.")
+    if consulta.strip() and not coincidencias:
+        st.error(f"No se encontró ningún registro para **{consulta}**.")
 
     if reg is not None:
         # ── Tarjeta resumen ───────────────────────────────────────────────────
@@ -361,31 +374,13 @@ else:
         # ── SMS ───────────────────────────────────────────────────────────────
         if confirmado:
             st.markdown('<div class="form-section">📱  Notificación SMS</div>', unsafe_allow_html=True)
-            tel_reg    = reg.get("telefono_1", "") or reg.get("telefono_2", "")
-            ars_reg    = reg.get("ars", "su EPS")
-            nombre_reg = reg.get("nombre_hijo", "")
-
-            sms_col1, sms_col2 = st.columns(2)
-            with sms_col1:
-                notif_pac = st.checkbox("Notificar al paciente/acudiente", key="r_notif_pac")
-                if notif_pac:
-                    st.text_input("Teléfono paciente", value=tel_reg, key="r_tel_pac")
-                    st.text_area("Mensaje paciente",
-                        value=f"Alerta: El resultado del tamizaje de {nombre_reg} es POSITIVO "
-                              f"(TSH: {tsh2_str} µIU/mL). Contacte a {ars_reg} urgente.",
-                        height=90, key="r_msg_pac")
-            with sms_col2:
-                notif_irs = st.checkbox("Notificar a la IRS", key="r_notif_irs")
-                if notif_irs:
-                    st.text_input("Teléfono IRS", key="r_tel_irs")
-                    st.text_area("Mensaje IRS",
-                        value=f"Caso confirmado — Ficha {reg.get('ficha_id','')}: "
-                              f"{reg.get('apellido_1','')} {reg.get('apellido_2','')}, "
-                              f"Municipio: {reg.get('nombre_municipio', reg.get('ciudad',''))}, "
-                              f"TSH: {tsh2_str} µIU/mL. "
-                              f"ARS: {ars_reg}. Requiere seguimiento urgente.",
-                        height=90, key="r_msg_irs")
-            st.checkbox("🧪 Modo de prueba (no envía realmente)", value=True, key="r_sms_test")
+            avisos = avisos_caso(reg)
+            if avisos:
+                st.info("Al guardar se encolan automáticamente los avisos a: "
+                        + ", ".join(f"{a['destino']} ({a['telefono']})" for a in avisos)
+                        + (" — SIMULADOS, no llegan al destinatario." if simulados else "."))
+            else:
+                st.warning("El registro no tiene teléfono: no se enviará aviso automático.")
 
         # ── Guardar ───────────────────────────────────────────────────────────
         st.markdown("---")
@@ -427,36 +422,66 @@ else:
                         "contador":                   "1",
                     })
 
-                actualizar_registro(int(reg["id"]), campos)
+                try:
+                    # Solo se guarda si nadie modificó el registro desde que se cargó
+                    actualizar_registro(int(reg["id"]), campos, version=version_fila(reg))
+                except ConflictoConcurrencia as e:
+                    actual = e.actuales[str(reg["id"])]
+                    st.session_state["reg_encontrado"] = actual
+                    st.error(f"⚠️ {e}: ahora tiene TSH1 = **{actual['tsh_neonatal'] or '—'}** y "
+                             f"TSH2 = **{actual['resultado_muestra_2'] or '—'}**. No se guardó nada; "
+                             "revisa los valores y vuelve a guardar.")
+                    st.stop()
                 st.session_state["reg_encontrado"] = None
 
                 if confirmado:
                     st.error(f"🚨 **CASO POSITIVO CONFIRMADO** — Ficha {reg.get('ficha_id')}")
+                    st.caption("📱 Avisos SMS encolados; su estado se ve en la página de Alertas.")
                 else:
                     st.success(f"✅ Resultados guardados — Ficha **{reg.get('ficha_id')}**."
                                + (" Caso cerrado como normal." if not necesita_m2 else ""))
 
-                # Envío SMS
-                sms_log = st.session_state.setdefault("sms_log", [])
-                if confirmado:
-                    for dest_key, tel_key, msg_key, label in [
-                        ("r_notif_pac", "r_tel_pac", "r_msg_pac", "Paciente"),
-                        ("r_notif_irs", "r_tel_irs", "r_msg_irs", "IRS"),
-                    ]:
-                        if st.session_state.get(dest_key) and st.session_state.get(tel_key):
-                            ok, status = enviar_sms(
-                                st.session_state[tel_key],
-                                st.session_state.get(msg_key, ""),
-                                st.session_state.get("r_sms_test", True),
-                            )
-                            sms_log.append({
-                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                                "id_caso": reg["id"], "destino": label,
-                                "telefono": st.session_state[tel_key], "status": status,
-                            })
-                            (st.success if ok else st.error)(f"{'📱' if label=='Paciente' else '🏥'} {label}: {status}")
-
-# ── Historial SMS ─────────────────────────────────────────────────────────────
-if st.session_state.get("sms_log"):
-    with st.expander("📋  Historial de SMS enviados en esta sesión"):
-        st.dataframe(pd.DataFrame(st.session_state["sms_log"]), use_container_width=True)
+# ══════════════════════════════════════════════════════════════════════════════
+# MODO C — ARCHIVO DEL ANALIZADOR
+# ══════════════════════════════════════════════════════════════════════════════
+else:
+    st.markdown("## 📥 Resultados desde el analizador")
+    st.caption("CSV exportado por el analizador con número de ficha, TSH y fecha de resultado. "
+               "Las fichas de 1ª muestra llenan TSH 1; las de 2ª muestra (ficha 2), TSH 2. "
+               "Todo el archivo se guarda en una sola escritura.")
+
+    archivo = st.file_uploader("Archivo del analizador", type=["csv", "txt"], key="up_analizador")
+    sobrescribir = st.checkbox("Reemplazar resultados ya registrados", key="up_sobrescribir")
+
+    if archivo is not None:
+        try:
+            reporte, resumen = cargar_resultados(archivo, simular=True, sobrescribir=sobrescribir)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        archivo.seek(0)
+
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("Filas", resumen["filas"])
+        k2.metric("Por actualizar", resumen.get("por actualizar", 0))
+        k3.metric("Requieren 2ª muestra", resumen["requieren_2a"])
+        k4.metric("Casos que se confirman", resumen["confirmados"])
+        problemas = reporte[~reporte["estado"].isin(["por actualizar", "sin cambios"])]
+        if not problemas.empty:
+            st.warning(f"{len(problemas)} fila(s) no se cargarán:")
+            st.dataframe(problemas, use_container_width=True, hide_index=True)
+
+        n = resumen.get("por actualizar", 0)
+        if st.button(f"💾  Guardar {n} resultado(s)", type="primary", key="btn_guardar_lote",
+                     disabled=n == 0):
+            try:
+                reporte, resumen = cargar_resultados(archivo, sobrescribir=sobrescribir)
+            except ConflictoConcurrencia as e:
+                st.error(f"⚠️ {e}. No se guardó nada; vuelve a intentarlo.")
+                st.stop()
+            st.success(f"✅ {resumen.get('actualizado', 0)} resultados guardados en una sola escritura.")
+            if resumen["confirmados"]:
+                st.error(f"🚨 {resumen['confirmados']} caso(s) CONFIRMADO(S); "
+                         "los avisos SMS quedaron en la bandeja (página de Alertas).")
+        st.download_button("⬇ Reporte de conciliación", reporte.to_csv(index=False).encode(),
+                           "conciliacion_resultados.csv", "text/csv")
@@ -1,55 +1,30 @@
 # pages/3_🚨_Alertas.py
-from datetime import datetime
+import time
 
-import pandas as pd
 import streamlit as st
 
-from utils.constantes import CSS, TSH_CORTE, CSV_REGISTROS
+from utils.alertas import AVISO_SIMULADOS, avisos_simulados
+from utils.bandeja import get_bandeja
+from utils.constantes import CSS, PLANTILLA_SMS_IRS, PLANTILLA_SMS_PACIENTE, TSH_CORTE
+from utils.csv_helpers import version_registros
+from utils.datos import cargar_confirmados, cargar_orden_confirmados
+from utils.exportar import FORMATOS, exportar
 from utils.graficos import fig_tsh_confirmados
 
 st.set_page_config(page_title="Alertas", page_icon="🚨", layout="wide")
 st.markdown(CSS, unsafe_allow_html=True)
 st.title("🚨 Casos Confirmados y Alertas SMS")
 
-
-# ── SMS (solo esta página lo necesita) ───────────────────────────────────────
-def enviar_sms(telefono: str, mensaje: str, test_mode: bool = True) -> tuple[bool, str]:
-    if not telefono.strip():
-        return False, "Teléfono vacío"
-    if not telefono.startswith("+"):
-        telefono = "+57" + telefono.strip()
-    if test_mode:
-        return True, f"[SIMULADO] → {telefono}: {mensaje[:60]}..."
-    try:
-        from twilio.rest import Client
-        sid   = st.secrets["twilio"]["account_sid"]
-        token = st.secrets["twilio"]["auth_token"]
-        from_ = st.secrets["twilio"]["from_phone_number"]
-        msg   = Client(sid, token).messages.create(body=mensaje, from_=from_, to=telefono)
-        return True, f"Enviado — SID: {msg.sid}"
-    except KeyError:
-        return False, "Faltan credenciales en st.secrets['twilio']"
-    except Exception as e:
-        return False, f"Error Twilio: {e}"
+# Los SMS se encolan en la bandeja persistente; su hilo trabajador los envía
+bandeja = get_bandeja()
+if avisos_simulados():
+    st.warning(AVISO_SIMULADOS, icon="🧪")
 
 
 # ── Cargar datos ──────────────────────────────────────────────────────────────
-@st.cache_data
-def load_confirmados():
-    try:
-        df = pd.read_csv(CSV_REGISTROS, dtype=str).fillna("")
-    except FileNotFoundError:
-        return pd.DataFrame()
-    df["tsh_neonatal"]       = pd.to_numeric(df["tsh_neonatal"], errors="coerce").fillna(0)
-    df["resultado_muestra_2"]= pd.to_numeric(df["resultado_muestra_2"], errors="coerce").fillna(0)
-    return df[(df["tsh_neonatal"] >= TSH_CORTE) & (df["resultado_muestra_2"] >= TSH_CORTE)].copy()
-
-
-if st.button("🔄 Refrescar datos"):
-    st.cache_data.clear()
-    st.rerun()
-
-confirmed_df = load_confirmados()
+# Una sola versión por rerun: tabla, orden y exportación ven el mismo registro
+version = version_registros()
+confirmed_df = cargar_confirmados(version)
 
 if confirmed_df.empty:
     st.info("No hay casos confirmados aún. Los casos aparecen aquí cuando TSH1 y TSH2 superan "
@@ -113,30 +88,35 @@ msg_irs_ind = st.text_area("Mensaje a la IRS:",
 
 test_ind = st.checkbox("🧪 Modo prueba", value=True, key="test_ind")
 
+
+def encolar_uno(destino: str, telefono: str, mensaje: str):
+    """Encola un aviso individual y espera unos segundos su resultado."""
+    ids, nuevos = bandeja.encolar([{"id_caso": fila.get("id", "—"), "destino": destino,
+                                    "telefono": telefono, "mensaje": mensaje}], test_ind)
+    if not nuevos:
+        st.info("Este aviso ya estaba en la bandeja; no se envía dos veces.")
+    bandeja.esperar(ids)
+    r = bandeja.consultar(ids).iloc[0]
+    if r["estado"] == "enviado":
+        st.success(r["detalle"])
+    elif r["estado"] == "fallido":
+        st.error(r["detalle"])
+    else:
+        st.info("En cola: se enviará en segundo plano.")
+
+
 btn1, btn2 = st.columns(2)
 with btn1:
     if st.button("📤 Enviar SMS al Paciente", key="btn_pac"):
         if tel_ind:
-            ok, status = enviar_sms(tel_ind, msg_ind, test_ind)
-            (st.success if ok else st.error)(status)
-            st.session_state.setdefault("sms_log", []).append({
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                "id_caso": fila.get("id","—"), "destino": "Paciente",
-                "telefono": tel_ind, "status": status,
-            })
+            encolar_uno("Paciente", tel_ind, msg_ind)
         else:
             st.warning("Ingresa un teléfono.")
 
 with btn2:
     if st.button("🏥 Enviar SMS a la IRS", key="btn_irs"):
         if tel_irs_ind:
-            ok, status = enviar_sms(tel_irs_ind, msg_irs_ind, test_ind)
-            (st.success if ok else st.error)(status)
-            st.session_state.setdefault("sms_log", []).append({
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                "id_caso": fila.get("id","—"), "destino": "IRS",
-                "telefono": tel_irs_ind, "status": status,
-            })
+            encolar_uno("IRS", tel_irs_ind, msg_irs_ind)
         else:
             st.warning("Ingresa el teléfono de la IRS.")
 
@@ -154,48 +134,52 @@ else:
 
     tmpl_pac = st.text_area(
         "Plantilla mensaje paciente — usa {tsh} y {ars}:",
-        value="Alerta: El TSH neonatal de su hijo(a) es {tsh} mIU/L. Contacte a {ars} urgente.",
+        value=PLANTILLA_SMS_PACIENTE,
         height=75, key="tmpl_pac")
     tel_irs_mass = st.text_input("Teléfono IRS (único para todos):", key="irs_mass")
     tmpl_irs = st.text_area(
         "Plantilla mensaje IRS:",
-        value="Caso confirmado: TSH {tsh} mIU/L — ARS {ars}. Requiere seguimiento.",
+        value=PLANTILLA_SMS_IRS,
         height=75, key="tmpl_irs_msg")
     test_mass = st.checkbox("🧪 Modo prueba masivo", value=True, key="test_mass")
 
     if st.button("🚀 Enviar a Todos los Casos Confirmados", key="btn_mass"):
-        log_mass = []
-        bar  = st.progress(0)
-        info = st.empty()
-        sent, failed = 0, 0
-        rows_list = list(confirmed_df.iterrows())
-
-        for i, (_, row) in enumerate(rows_list):
-            bar.progress((i + 1) / len(rows_list))
-            info.text(f"Procesando {i+1}/{len(rows_list)}…")
-
+        avisos = []
+        for _, row in confirmed_df.iterrows():
             tel   = str(row.get(phone_col, "")).strip()
             tsh_v = str(row.get("resultado_muestra_2", ""))
             ars_v = str(row.get("ars", "su EPS"))
-
+            caso  = row.get("id", "—")
             if tel and tel not in ("nan", "0", ""):
-                msg_p = tmpl_pac.replace("{tsh}", tsh_v).replace("{ars}", ars_v)
-                ok, s = enviar_sms(tel, msg_p, test_mass)
-                log_mass.append({"id": row.get("id","—"), "destino":"Paciente",
-                                  "telefono": tel, "status": s})
-                sent   += 1 if ok else 0
-                failed += 0 if ok else 1
-
+                avisos.append({"id_caso": caso, "destino": "Paciente", "telefono": tel,
+                               "plantilla": tmpl_pac,
+                               "mensaje": tmpl_pac.replace("{tsh}", tsh_v).replace("{ars}", ars_v)})
             if tel_irs_mass:
-                msg_i = tmpl_irs.replace("{tsh}", tsh_v).replace("{ars}", ars_v)
-                ok, s = enviar_sms(tel_irs_mass, msg_i, test_mass)
-                log_mass.append({"id": row.get("id","—"), "destino":"IRS",
-                                  "telefono": tel_irs_mass, "status": s})
+                avisos.append({"id_caso": caso, "destino": "IRS", "telefono": tel_irs_mass,
+                               "plantilla": tmpl_irs,
+                               "mensaje": tmpl_irs.replace("{tsh}", tsh_v).replace("{ars}", ars_v)})
+
+        ids, nuevos = bandeja.encolar(avisos, test_mass) if avisos else ([], 0)
+        if len(ids) > nuevos:
+            st.info(f"{len(ids) - nuevos} avisos ya estaban en la bandeja; no se repiten.")
+
+        bar  = st.progress(0)
+        info = st.empty()
+        fin  = time.monotonic() + 60
+        while ids:
+            conteo = bandeja.estados(ids)
+            en_cola = conteo.get("pendiente", 0) + conteo.get("enviando", 0)
+            bar.progress((len(ids) - en_cola) / len(ids))
+            info.text(f"Procesados {len(ids) - en_cola}/{len(ids)}…")
+            if not en_cola or time.monotonic() > fin:
+                break
+            time.sleep(0.5)
 
-        bar.progress(1.0)
         info.empty()
-        st.success(f"✅ Completado: {sent} enviados, {failed} fallidos.")
-        st.session_state.setdefault("sms_log", []).extend(log_mass)
+        conteo = bandeja.estados(ids) if ids else {}
+        en_cola = conteo.get("pendiente", 0) + conteo.get("enviando", 0)
+        st.success(f"✅ {conteo.get('enviado', 0)} enviados, {conteo.get('fallido', 0)} fallidos"
+                   + (f", {en_cola} siguen en cola (se envían en segundo plano)." if en_cola else "."))
 
 st.markdown("---")
 
@@ -205,20 +189,42 @@ cols_show = [c for c in ["id","ficha_id","apellido_1","apellido_2","ciudad",
                           "departamento","sexo","fecha_nacimiento","peso",
                           "tsh_neonatal","resultado_muestra_2","ars","institucion"]
              if c in confirmed_df.columns]
-st.dataframe(confirmed_df[cols_show], use_container_width=True, height=350)
-st.download_button("⬇ Descargar CSV",
-                   confirmed_df[cols_show].to_csv(index=False).encode(),
-                   "casos_confirmados.csv", "text/csv")
+# Orden y paginación en el servidor: al navegador solo llega la página visible
+t_ord, t_dir, t_tam, t_pag = st.columns([2, 1, 1, 1])
+orden = t_ord.selectbox("Ordenar por", cols_show, key="conf_orden",
+                        index=cols_show.index("resultado_muestra_2") if "resultado_muestra_2" in cols_show else 0)
+descendente = t_dir.toggle("Descendente", value=True, key="conf_desc")
+por_pagina = t_tam.selectbox("Filas por página", [25, 50, 100, 250], index=1, key="conf_por_pagina")
+n_paginas = max(1, -(-len(confirmed_df) // por_pagina))
+pagina = t_pag.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, value=1)
+
+posiciones = cargar_orden_confirmados(orden, not descendente, version)
+inicio = (pagina - 1) * por_pagina
+visibles = posiciones[inicio:inicio + por_pagina]
+st.dataframe(confirmed_df.iloc[visibles][cols_show], use_container_width=True, hide_index=True)
+st.caption(f"Casos {inicio + 1:,}–{inicio + len(visibles):,} de {len(confirmed_df):,}")
+
+# El archivo se genera solo al hacer clic (por bloques), en el orden elegido
+d_fmt, d_btn = st.columns([1, 3])
+formato = d_fmt.selectbox("Formato", list(FORMATOS), key="conf_formato", label_visibility="collapsed")
+extension, mime = FORMATOS[formato]
+d_btn.download_button("⬇ Descargar casos",
+                      lambda: exportar(confirmed_df.iloc[posiciones][cols_show], formato),
+                      f"casos_confirmados{extension}", mime)
 
 # Gráfico distribución TSH confirmados
 st.plotly_chart(fig_tsh_confirmados(confirmed_df), use_container_width=True)
 
-# ── Log SMS ───────────────────────────────────────────────────────────────────
-if st.session_state.get("sms_log"):
+# ── Bandeja de salida ─────────────────────────────────────────────────────────
+historial = bandeja.historial()
+if not historial.empty:
     st.markdown("---")
     with st.expander("📋 Historial de SMS"):
-        log_df = pd.DataFrame(st.session_state["sms_log"])
-        st.dataframe(log_df, use_container_width=True)
-        st.download_button("⬇ Exportar log",
-                           log_df.to_csv(index=False).encode(),
-                           "sms_log.csv", "text/csv")
+        conteo = bandeja.estados()
+        st.caption(" · ".join(f"{e}: {n}" for e, n in sorted(conteo.items())))
+        st.dataframe(historial, use_container_width=True)
+        c_exp, c_rei = st.columns(2)
+        c_exp.download_button("⬇ Exportar log", lambda: exportar(historial),
+                              "sms_log.csv", "text/csv")
+        if conteo.get("fallido") and c_rei.button("🔁 Reintentar fallidos"):
+            st.info(f"{bandeja.reintentar_fallidos()} mensajes devueltos a la cola.")
@@ -0,0 +1,60 @@
+# tests/conftest.py
+# ─── Fixtures compartidas ─────────────────────────────────────────────────────
+#
+# Desde vizualization/streamlit:
+#     python -m pytest -q tests
+#
+# Las rutas de constantes son relativas ("../../data/..."), como al correr la
+# app desde vizualization/streamlit: cada prueba trabaja en tmp/a/b con sus
+# datos en tmp/data, y se limpian las cachés por proceso que dependen de ellas.
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import almacen, bandeja                                    # noqa: E402
+from utils.constantes import FIELDNAMES                               # noqa: E402
+
+
+def fila(id_registro: int, **campos) -> dict:
+    """Registro de texto con valores razonables; `campos` los reemplaza."""
+    base = {c: "" for c in FIELDNAMES}
+    base.update({
+        "id": str(id_registro), "ficha_id": str(300000 + id_registro),
+        "fecha_ingreso": "2024-08-05", "institucion": "SAN JOSE", "ars": "SANITAS",
+        "numero_documento": str(1000000000 + id_registro), "cod_municipio": "15646",
+        "nombre_municipio": "SAMACÁ", "cod_departamento": "15", "nombre_departamento": "BOYACÁ",
+        "telefono_1": "3130000001", "telefono_2": "0", "apellido_1": "MUÑOZ", "apellido_2": "LOPEZ",
+        "fecha_nacimiento": "2024-08-05", "peso": "3100", "sexo": "FEMENINO",
+        "prematuro": "FALSO", "tipo_muestra": "CORDON", "fecha_toma_muestra": "2024-08-05",
+        "contador": "0",
+    })
+    base.update({c: str(v) for c, v in campos.items()})
+    return base
+
+
+@pytest.fixture
+def datos(tmp_path, monkeypatch):
+    """Directorio de trabajo con ../../data vacío; retorna la carpeta de datos."""
+    trabajo = tmp_path / "a" / "b"
+    trabajo.mkdir(parents=True)
+    (tmp_path / "data").mkdir()
+    monkeypatch.chdir(trabajo)
+    almacen.get_almacen.cache_clear()
+    bandeja.get_bandeja.cache_clear()
+    yield tmp_path / "data"
+    almacen.get_almacen.cache_clear()
+    bandeja.get_bandeja.cache_clear()
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def registro(request, datos, monkeypatch):
+    """Registro con 5 filas en el backend del parámetro (CSV o SQLite)."""
+    monkeypatch.setattr(almacen, "ALMACEN_REGISTROS", request.param)
+    from utils.csv_helpers import guardar_registros
+    guardar_registros(pd.DataFrame([fila(i) for i in range(1, 6)], columns=FIELDNAMES))
+    return request.param
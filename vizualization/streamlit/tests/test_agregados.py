@@ -0,0 +1,74 @@
+# tests/test_agregados.py
+import pandas as pd
+import pytest
+
+from utils import agregados
+from utils.almacen import get_almacen
+from utils.constantes import FIELDNAMES
+from utils.csv_helpers import (
+    actualizar_registro, actualizar_registros, guardar_registro, guardar_registros, version_registros,
+)
+from utils.filtros import motor_registros
+
+from conftest import fila
+
+
+def _desde_cero() -> dict:
+    return agregados._a_grupos(agregados.agrupar(agregados.tipar_registros(get_almacen().leer())))
+
+
+def _al_dia() -> bool:
+    version, grupos = agregados._leer(agregados._path())
+    return version == version_registros() and grupos == _desde_cero()
+
+
+def test_agrupar():
+    df = pd.DataFrame([fila(1, tsh_neonatal="20", resultado_muestra_2="16"),
+                       fila(2, tsh_neonatal="20"), fila(3, tsh_neonatal="3"), fila(4)],
+                      columns=FIELDNAMES)
+    agg = agregados.agrupar(agregados.tipar_registros(df))
+    assert agg.groupby("estado")["n"].sum().to_dict() == {
+        "confirmado": 1, "sospechoso": 1, "normal": 1, "pendiente": 1}
+    assert set(agg["rango_tsh"]) == {"20-30", "<5", "pendiente"}
+    assert agg[agregados.MEDIDAS].sum().tolist() == [4, 2, 1]
+
+
+def test_cambios_incrementales_igual_a_reconstruir(registro):
+    agregados.reconstruir()
+    actualizar_registro(1, {"tsh_neonatal": "20"})
+    actualizar_registros({1: {"resultado_muestra_2": "30"}, 2: {"sexo": "MASCULINO", "tsh_neonatal": "4"}})
+    guardar_registro(fila(6, tsh_neonatal="50"))
+    guardar_registros(pd.DataFrame([fila(7), fila(8, prematuro="VERDADERO")], columns=FIELDNAMES))
+    assert _al_dia()
+    tot = agregados.leer_agregados()[agregados.MEDIDAS].sum().tolist()
+    assert tot == [8, 2, 1]
+
+
+def test_agregados_desactualizados_se_reconstruyen(registro):
+    agregados.reconstruir()
+    get_almacen().actualizar(3, {"tsh_neonatal": "25"})              # escritura sin csv_helpers
+    actualizar_registro(4, {"tsh_neonatal": "4"})                     # descarta los persistidos
+    assert int(agregados.leer_agregados()["sospechosos"].sum()) == 1
+    assert _al_dia()
+
+
+@pytest.mark.parametrize("selecciones, banderas", [
+    ({}, {}),
+    ({"año": [2024], "sexo": ["FEMENINO"]}, {}),
+    ({"municipio": ["15001"], "departamento": ["BOYACÁ"]}, {"prematuro": True}),
+    ({"tipo_muestra": ["TALON"]}, {"sospecha": True}),
+    ({}, {"confirmado": True}),
+    ({}, {"sospecha": False}),
+    ({"municipio": ["15646"]}, {"pendiente": True, "prematuro": False}),
+])
+def test_filtrar_igual_que_las_filas(selecciones, banderas):
+    df = pd.DataFrame([
+        fila(i, tsh_neonatal=["", "3", "20", "40"][i % 4], resultado_muestra_2="30" if i % 8 == 3 else "",
+             sexo="FEMENINO" if i % 3 else "MASCULINO", prematuro="VERDADERO" if i % 5 == 0 else "FALSO",
+             cod_municipio="15001" if i % 2 else "15646", tipo_muestra="TALON" if i % 7 else "CORDON",
+             fecha_nacimiento="2023-05-01" if i % 6 == 0 else "2024-08-05")
+        for i in range(1, 60)], columns=FIELDNAMES)
+    tipado = agregados.tipar_registros(df)
+    motor = motor_registros(tipado)
+    filas = int(motor.mascara(selecciones, banderas).sum())
+    assert int(agregados.filtrar(agregados.agrupar(tipado), selecciones, banderas)["n"].sum()) == filas
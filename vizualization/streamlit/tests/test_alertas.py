@@ -0,0 +1,120 @@
+# tests/test_alertas.py
+import json
+import sqlite3
+
+import pytest
+
+from utils import alertas, sms
+from utils.alertas import avisos_caso, avisos_simulados, despachar_avisos, es_confirmado
+from utils.almacen import get_almacen
+from utils.csv_helpers import actualizar_registro
+
+from conftest import fila
+
+
+def test_es_confirmado():
+    assert es_confirmado(fila(1, tsh_neonatal="20", resultado_muestra_2="16,5"))
+    assert not es_confirmado(fila(1, tsh_neonatal="20", resultado_muestra_2=""))
+    assert not es_confirmado(None)
+
+
+def test_avisos_caso():
+    avisos = avisos_caso(fila(1, telefono_1="0", telefono_2="3009998877", resultado_muestra_2="40",
+                              ars=""), telefono_irs="6017000000")
+    assert [(a["destino"], a["telefono"]) for a in avisos] == [("Paciente", "3009998877"),
+                                                              ("IRS", "6017000000")]
+    assert "40 mIU/L" in avisos[0]["mensaje"] and "su EPS" in avisos[0]["mensaje"]
+    assert avisos_caso(fila(1, telefono_1="", telefono_2="0"), telefono_irs="") == []
+
+
+@pytest.mark.parametrize("forzado, proveedor, url, esperado", [
+    (None, "http", "http://localhost:9/sms", False),   # proveedor configurado: reales
+    (None, "http", "", True),                          # sin URL: simulados
+    (None, "twilio", "", True),                        # sin secrets.toml: simulados
+    (True, "http", "http://localhost:9/sms", True),    # SMS_SIMULADO=1
+    (False, "twilio", "", False),                      # SMS_SIMULADO=0
+])
+def test_avisos_simulados(monkeypatch, forzado, proveedor, url, esperado):
+    monkeypatch.setattr(alertas, "SMS_SIMULADO", forzado)
+    monkeypatch.setattr(sms, "SMS_PROVEEDOR", proveedor)
+    monkeypatch.setattr(sms, "SMS_URL", url)
+    assert avisos_simulados() is esperado
+
+
+class _Bandeja:
+    """Reemplaza la bandeja de SMS: solo anota lo encolado."""
+    encolados: list = []
+    falla = False
+
+    def encolar(self, avisos, simulado=True):
+        if self.falla:
+            raise OSError("bandeja ocupada")
+        self.encolados.extend((a["id_caso"], a["destino"], simulado) for a in avisos)
+
+
+@pytest.fixture
+def bandeja(monkeypatch):
+    _Bandeja.encolados, _Bandeja.falla = [], False
+    monkeypatch.setattr(alertas, "get_bandeja", _Bandeja)
+    monkeypatch.setattr(alertas, "avisos_simulados", lambda: False)
+    return _Bandeja
+
+
+def test_avisos_nuevos_solo_al_confirmar(bandeja):
+    viejo = fila(1, tsh_neonatal="20")
+    nuevo = fila(1, tsh_neonatal="20", resultado_muestra_2="30")
+    avisos = alertas.avisos_nuevos({"1": viejo, "2": nuevo, "3": fila(3)},
+                                   {"1": nuevo, "2": nuevo, "3": fila(3, tsh_neonatal="3")})
+    assert [(a["id_caso"], a["destino"], a["simulado"]) for a in avisos] == [("1", "Paciente", False)]
+
+
+def test_confirmar_encola_con_la_escritura(registro, bandeja):
+    actualizar_registro(2, {"tsh_neonatal": "20"})
+    actualizar_registro(2, {"resultado_muestra_2": "30"})
+    actualizar_registro(2, {"direccion": "CALLE 2"})                  # ya estaba confirmado
+    assert bandeja.encolados == [("2", "Paciente", False)]
+    assert get_almacen().avisos_pendientes() == []
+
+
+def test_bandeja_ocupada_no_pierde_avisos(registro, bandeja):
+    bandeja.falla = True
+    actualizar_registro(3, {"tsh_neonatal": "20", "resultado_muestra_2": "30"})
+    assert get_almacen().obtener(3)["resultado_muestra_2"] == "30"   # el guardado no falla
+    assert [a["id_caso"] for _, a in get_almacen().avisos_pendientes()] == ["3"]
+    bandeja.falla = False
+    assert despachar_avisos() == 1
+    assert bandeja.encolados == [("3", "Paciente", False)]
+    assert get_almacen().avisos_pendientes() == []
+
+
+def test_aviso_sin_escritura_se_descarta(registro, bandeja, monkeypatch):
+    almacen = get_almacen()
+    aviso = dict(avisos_caso(fila(4, tsh_neonatal="20", resultado_muestra_2="30"))[0], simulado=False)
+    if registro == "csv":
+        # el proceso murió entre el aviso y el delta del journal
+        almacen._agregar_lineas(almacen.path_avisos, [json.dumps(aviso)])
+        assert despachar_avisos() == 0 and bandeja.encolados == []
+        assert almacen.avisos_pendientes() == []
+    else:
+        # SQLite: el aviso y el UPDATE son una sola transacción
+        def falla(con):
+            raise sqlite3.OperationalError("disco lleno")
+        monkeypatch.setattr(almacen, "_tocar_version", falla)
+        with pytest.raises(sqlite3.OperationalError):
+            actualizar_registro(4, {"tsh_neonatal": "20", "resultado_muestra_2": "30"})
+        assert almacen.avisos_pendientes() == []
+        assert almacen.obtener(4)["tsh_neonatal"] == ""
+
+
+def test_importar_a_sqlite_conserva_avisos(datos, bandeja, monkeypatch):
+    from utils import almacen
+    from utils.almacen import AlmacenCSV, AlmacenSQLite, importar_csv
+    from utils.csv_helpers import guardar_registro
+
+    monkeypatch.setattr(almacen, "ALMACEN_REGISTROS", "csv")
+    guardar_registro(fila(1))
+    bandeja.falla = True
+    actualizar_registro(1, {"tsh_neonatal": "20", "resultado_muestra_2": "30"})
+    assert importar_csv() == 1
+    assert AlmacenCSV().avisos_pendientes() == []
+    assert [a["id_caso"] for _, a in AlmacenSQLite().avisos_pendientes()] == ["1"]
@@ -0,0 +1,118 @@
+# tests/test_almacen.py
+# Corre sobre los dos backends (fixture `registro` de conftest: CSV y SQLite).
+import os
+
+import pandas as pd
+import pytest
+
+from utils.almacen import AlmacenCSV, get_almacen
+from utils.csv_helpers import (
+    actualizar_registro, actualizar_registros, buscar_por_ficha, compactar_registros,
+    fichas_registradas, guardar_registro, leer_registros, next_id, reservar_ids, version_registros,
+)
+
+from conftest import fila
+
+
+def _por_id() -> pd.DataFrame:
+    return leer_registros().set_index("id")
+
+
+def test_actualizar_y_leer(registro):
+    antes = version_registros()
+    actualizar_registro(2, {"tsh_neonatal": "12.5", "direccion": "CALLE 2"})
+    actualizar_registro(2, {"tsh_neonatal": "13"})                  # el último gana
+    reg = _por_id()
+    assert reg.loc["2", "tsh_neonatal"] == "13" and reg.loc["2", "direccion"] == "CALLE 2"
+    assert reg.loc["1", "tsh_neonatal"] == ""
+    assert version_registros() != antes
+
+
+def test_obtener_por_id(registro):
+    almacen = get_almacen()
+    actualizar_registro(4, {"peso": "3050"})
+    assert almacen.obtener(4)["peso"] == "3050"
+    assert almacen.obtener(99) is None
+    assert sorted(almacen.obtener_registros([5, 1, 42])) == ["1", "5"]
+    guardar_registro(fila(6))                                         # fila agregada después
+    assert almacen.obtener(6)["ficha_id"] == "300006"
+
+
+def test_buscar_por_ficha(registro):
+    actualizar_registro(2, {"direccion": "CALLE 2"})
+    assert buscar_por_ficha("300002")["direccion"] == "CALLE 2"
+    assert buscar_por_ficha(" 300002 ")["id"] == "2"
+    assert buscar_por_ficha("nada") is None
+    assert "300005" in fichas_registradas()
+
+
+def test_buscar_por_ficha_cambiada_o_agregada(registro):
+    actualizar_registro(3, {"ficha_id": "F-3"})
+    assert buscar_por_ficha("F-3")["id"] == "3"
+    assert buscar_por_ficha("300003") is None
+    guardar_registro(fila(6, ficha_id="F-3"))                        # repetida: gana la primera
+    guardar_registro(fila(7, ficha_id="F-7"))
+    assert buscar_por_ficha("F-3")["id"] == "3"
+    assert buscar_por_ficha("F-7")["peso"] == "3100"
+    compactar_registros()
+    assert buscar_por_ficha("F-3")["id"] == "3" and buscar_por_ficha("F-7")["id"] == "7"
+
+
+def test_buscar_por_ficha_no_recorre_el_csv(registro, monkeypatch):
+    if registro != "csv":
+        pytest.skip("índice de posiciones del backend CSV")
+    almacen = get_almacen()
+    buscar_por_ficha("300001")                                        # construye el índice
+    guardar_registro(fila(6))
+
+    def recorrer(*a, **k):
+        raise AssertionError("recorrió el CSV completo")
+    monkeypatch.setattr(almacen, "leer", recorrer)
+    monkeypatch.setattr(almacen, "_leer_base", recorrer)
+    assert buscar_por_ficha("300006")["id"] == "6"
+    assert buscar_por_ficha("nada") is None
+
+
+def test_ids_consecutivos(registro):
+    assert next_id() == 6
+    assert reservar_ids(3) == 7
+    assert next_id() == 10
+    guardar_registro(fila(10))
+    assert len(leer_registros()) == 6
+
+
+def test_secuencia_se_reconstruye(registro):
+    if registro != "csv":
+        pytest.skip("el archivo .seq es del backend CSV")
+    if os.path.exists(get_almacen().path_seq):
+        os.remove(get_almacen().path_seq)
+    assert next_id() == 6                                             # desde el mayor id del CSV
+
+
+def test_journal_se_combina_y_compacta(registro):
+    if registro != "csv":
+        pytest.skip("journal solo en el backend CSV")
+    almacen = get_almacen()
+    actualizar_registros({1: {"peso": "2900"}, 3: {"peso": "3300", "ficha_id": "N3"}})
+    with open(almacen.path_journal, "a", encoding="utf-8") as f:
+        f.write('{"id": "4", "campos": {"pe')                        # línea truncada por un corte
+    assert _por_id().loc[["1", "3", "4"], "peso"].tolist() == ["2900", "3300", "3100"]
+    assert "N3" in fichas_registradas()
+    actualizar_registro(4, {"peso": "3050"})                          # sigue en una línea nueva
+    assert almacen.obtener(4)["peso"] == "3050"
+
+    compactar_registros()
+    assert not os.path.exists(almacen.path_journal)
+    assert _por_id().loc[["1", "3", "4"], "peso"].tolist() == ["2900", "3300", "3050"]
+    assert almacen.obtener(3)["ficha_id"] == "N3"                     # índice reconstruido
+
+
+def test_journal_grande_se_compacta_solo(registro, monkeypatch):
+    if registro != "csv":
+        pytest.skip("journal solo en el backend CSV")
+    monkeypatch.setattr(AlmacenCSV, "MAX_JOURNAL_BYTES", 200)
+    for i in range(10):
+        actualizar_registro(1 + i % 5, {"historia_clinica": str(i)})
+    assert _por_id()["historia_clinica"].tolist() == ["5", "6", "7", "8", "9"]
+    base = get_almacen()._leer_base().fillna("")                      # ya incorporado al CSV
+    assert (base["historia_clinica"] != "").all()
@@ -0,0 +1,137 @@
+# tests/test_api.py
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils import alertas, api
+from utils.api import crear_servidor
+
+
+class _Bandeja:
+    """Reemplaza la bandeja de SMS: solo anota lo encolado."""
+    encolados: list = []
+
+    def encolar(self, avisos, simulado=True):
+        self.encolados.extend(avisos)
+        return [], len(avisos)
+
+
+@pytest.fixture
+def base(datos, monkeypatch):
+    """URL de un servidor de la API en un puerto libre, sobre el registro de la prueba."""
+    api._registros.cache_clear()
+    api._indice.cache_clear()
+    _Bandeja.encolados = []
+    monkeypatch.setattr(alertas, "get_bandeja", _Bandeja)
+    servidor = crear_servidor(puerto=0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def pedir(url, datos=None, tipo="application/json", **cabeceras):
+    """(estado, Content-Type, cuerpo como texto)."""
+    req = urllib.request.Request(url, data=datos, method="POST" if datos is not None else "GET",
+                                 headers={"Content-Type": tipo, **cabeceras})
+    try:
+        with urllib.request.urlopen(req) as r:
+            return r.status, r.headers.get("Content-Type"), r.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("Content-Type"), e.read().decode()
+
+
+def pedir_json(url, datos=None, **kw):
+    estado, _, cuerpo = pedir(url, None if datos is None else json.dumps(datos).encode(), **kw)
+    return estado, json.loads(cuerpo)
+
+
+def test_registro_vacio(base):
+    assert pedir_json(base + "/salud")[1]["ok"] is True
+    assert pedir_json(base + "/registros")[1]["total"] == 0
+    estado, cuerpo = pedir_json(base + "/registros/ficha/300001")
+    assert estado == 404 and "300001" in cuerpo["error"]
+
+
+def test_alta_consulta_y_resultados(base):
+    nuevos = [{"ficha_id": "900001", "apellido_1": "PRUEBA", "peso": 3100, "telefono_1": "3001234567"},
+              {"ficha_id": "900001", "peso": 3000},                    # repetida
+              {"ficha_id": "900002", "peso": "abc"},                   # inválida
+              {"ficha_id": "900003", "peso": 2900, "ficha_id_2": "990003", "telefono_1": "3009990003"}]
+    estado, r = pedir_json(base + "/registros", nuevos)
+    assert estado == 200
+    assert r["resumen"]["importadas"] == 2
+    assert [(x["posicion"], x["motivo"]) for x in r["rechazadas"]] == [
+        (1, "Ficha repetida en el archivo"), (2, "Peso debe ser un número")]
+
+    estado, r = pedir_json(base + "/registros?pagina=2&por_pagina=1")
+    assert (r["total"], [x["ficha_id"] for x in r["registros"]]) == (2, ["900003"])
+    estado, r = pedir_json(base + "/registros/ficha/990003")              # por la 2ª ficha
+    assert [x["ficha_id"] for x in r["registros"]] == ["900003"]
+
+    lineas = "\n".join(json.dumps(x) for x in [
+        {"ficha": "900001", "tsh": 20, "fecha": "2025-01-05"},
+        {"ficha": "zz", "tsh": 3, "fecha": "2025-01-05"}]).encode()
+    estado, _, cuerpo = pedir(base + "/resultados?simular=1", lineas, "application/x-ndjson")
+    assert json.loads(cuerpo)["reporte"][1]["estado"] == "sin coincidencia"
+    assert pedir_json(base + "/registros/ficha/900001")[1]["registros"][0]["tsh_neonatal"] == ""
+
+    pedir(base + "/resultados", lineas, "application/x-ndjson")
+    assert pedir_json(base + "/registros/ficha/900001")[1]["registros"][0]["tsh_neonatal"] == "20.0"
+
+    # TSH 1ª y 2ª ≥ corte: el caso queda confirmado y sus avisos van a la bandeja
+    estado, r = pedir_json(base + "/resultados", [{"ficha": "900003", "tsh": 18, "fecha": "2025-01-05"},
+                                                  {"ficha": "990003", "tsh": 30, "fecha": "2025-01-09"}])
+    assert r["resumen"]["confirmados"] == 1
+    assert [(a["destino"], a["telefono"]) for a in _Bandeja.encolados] == [("Paciente", "3009990003")]
+
+
+def test_confirmados_jsonl_y_agregados(base):
+    pedir_json(base + "/registros", [
+        {"ficha_id": str(800000 + i), "peso": 3000, "tsh_neonatal": 20 if i < 3 else 4,
+         "resultado_muestra_2": 25 if i < 2 else "", "nombre_departamento": "BOYACÁ"}
+        for i in range(6)])
+    estado, r = pedir_json(base + "/confirmados?por_pagina=1")
+    assert (r["total"], len(r["registros"])) == (2, 1)
+
+    estado, tipo, cuerpo = pedir(base + "/registros?despues_de=2", Accept="application/x-ndjson")
+    assert tipo.startswith("application/x-ndjson")
+    assert [json.loads(x)["id"] for x in cuerpo.splitlines()] == ["3", "4", "5", "6"]
+
+    assert pedir_json(base + "/agregados")[1]["grupos"] == [{"n": 6, "sospechosos": 3, "confirmados": 2}]
+    estado, r = pedir_json(base + "/agregados?por=estado")
+    assert {g["estado"]: g["n"] for g in r["grupos"]} == {"confirmado": 2, "sospechoso": 1, "normal": 3}
+
+
+@pytest.mark.parametrize("metodo, ruta, datos, esperado", [
+    ("GET",  "/nada", None, 404),
+    ("POST", "/salud", b"[]", 405),
+    ("GET",  "/registros?pagina=0", None, 400),
+    ("GET",  "/agregados?por=color", None, 400),
+    ("POST", "/resultados", b"{no json", 400),
+    ("POST", "/registros", b'{"ficha_id": "1"}', 400),
+])
+def test_errores(base, metodo, ruta, datos, esperado):
+    estado, _, cuerpo = pedir(base + ruta, datos)
+    assert estado == esperado and "error" in json.loads(cuerpo)
+
+
+def test_token(base, monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", "secreto")
+    assert pedir(base + "/salud")[0] == 401
+    assert pedir(base + "/salud", Authorization="Bearer otro")[0] == 401
+    assert pedir(base + "/salud", Authorization="Bearer secreto")[0] == 200
+
+
+def test_sin_token_no_se_lee_el_cuerpo(base, monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", "secreto")
+    leidos = []
+    original = api._Manejador._cuerpo
+    monkeypatch.setattr(api._Manejador, "_cuerpo", lambda self: leidos.append(1) or original(self))
+    assert pedir(base + "/registros", b"[]")[0] == 401
+    assert leidos == []
+    assert pedir(base + "/registros", b"[]", Authorization="Bearer secreto")[0] == 200
+    assert leidos == [1]
@@ -0,0 +1,62 @@
+# tests/test_bandeja.py
+import threading
+
+import pytest
+
+from utils import bandeja as modulo
+from utils.bandeja import Bandeja
+
+
+def _aviso(id_caso, telefono="3001234567", mensaje="Alerta TSH"):
+    return {"id_caso": id_caso, "destino": "Paciente", "telefono": telefono,
+            "mensaje": mensaje, "plantilla": mensaje}
+
+
+@pytest.fixture
+def bandeja(datos):
+    return Bandeja(str(datos / "sms.db"))
+
+
+def test_encolar_es_idempotente(bandeja):
+    ids, nuevos = bandeja.encolar([_aviso(1), _aviso(2)])
+    assert nuevos == 2
+    # Mismo caso, mismo teléfono escrito distinto y misma plantilla: no se duplica
+    ids2, nuevos2 = bandeja.encolar([_aviso(1, telefono="+57 300 123 4567"), _aviso(3)])
+    assert nuevos2 == 1
+    assert ids2[0] == ids[0]
+    assert bandeja.estados() == {"pendiente": 3}
+    # Simulado y real son avisos distintos
+    assert bandeja.encolar([_aviso(1)], simulado=False)[1] == 1
+
+
+def test_drenar_marca_fallido_si_el_envio_explota(bandeja, monkeypatch):
+    def explota(envios, test_mode):
+        raise FileNotFoundError("No secrets found")
+    monkeypatch.setattr(modulo, "enviar_lote", explota)
+    ids, _ = bandeja.encolar([_aviso(1), _aviso(2)])
+    assert bandeja.drenar() == 2
+    filas = bandeja.consultar(ids)
+    assert set(filas["estado"]) == {"fallido"}
+    assert filas["detalle"].str.contains("No secrets found").all()
+
+
+def test_trabajador_sobrevive_a_un_proveedor_que_falla(bandeja, monkeypatch):
+    llamadas = []
+
+    def proveedor(envios, test_mode):
+        llamadas.append(len(envios))
+        if len(llamadas) == 1:
+            raise RuntimeError("proveedor caído")
+        return [(True, "ok")] * len(envios)
+    monkeypatch.setattr(modulo, "enviar_lote", proveedor)
+
+    hilo = threading.Thread(target=bandeja._trabajar, daemon=True)
+    hilo.start()
+    primeros, _ = bandeja.encolar([_aviso(1)])
+    assert bandeja.esperar(primeros, 10) == {"fallido": 1}
+
+    segundos, _ = bandeja.encolar([_aviso(2)])
+    assert bandeja.esperar(segundos, 10) == {"enviado": 1}
+    assert hilo.is_alive()
+    assert bandeja.reintentar_fallidos() == 1
+    assert bandeja.esperar(primeros, 10) == {"enviado": 1}
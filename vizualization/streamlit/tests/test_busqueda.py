@@ -0,0 +1,52 @@
+# tests/test_busqueda.py
+import pandas as pd
+import pytest
+
+from utils.busqueda import IndiceBusqueda, claves_texto
+from utils.constantes import FIELDNAMES
+
+from conftest import fila
+
+
+@pytest.fixture
+def indice():
+    filas = [
+        fila(1, apellido_1="MUÑOZ", apellido_2="LÓPEZ"),
+        fila(2, apellido_1="MUNERA", apellido_2="PEREZ", ficha_id_2="300001"),
+        fila(3, apellido_1="PÉREZ", apellido_2="MUÑOZ", historia_clinica="HC-9"),
+        fila(4, apellido_1="GOMEZ", apellido_2="", numero_documento="0"),
+    ]
+    return IndiceBusqueda(pd.DataFrame(filas, columns=FIELDNAMES))
+
+
+def test_registro_vacio():
+    vacio = IndiceBusqueda(pd.DataFrame(columns=FIELDNAMES))
+    assert len(vacio) == 0
+    assert vacio.exacto("300001") == []
+    assert vacio.por_apellido("MU") == []
+    assert vacio.buscar("MUÑOZ") == []
+    vacia = claves_texto(pd.Series([], dtype=object))
+    assert (vacia + " " + vacia).empty                            # antes: UFuncTypeError
+
+
+def test_exacto(indice):
+    assert indice.exacto("300001") == [0, 1]                      # ficha_id y ficha_id_2
+    assert indice.exacto("300001", ("ficha_id",)) == [0]
+    assert indice.exacto(" hc-9 ") == [2]
+    assert indice.exacto("1000000002") == [1]
+    assert indice.exacto("0") == []                               # "0" no es un documento
+
+
+def test_prefijo_de_apellido(indice):
+    assert indice.por_apellido("muno") == [2, 0]                  # sin tildes ni mayúsculas
+    assert indice.por_apellido("MUNOZ LO") == [0]                 # "apellido1 apellido2"
+    assert sorted(indice.por_apellido("perez")) == [1, 2]         # también por segundo apellido
+    assert indice.por_apellido("ZZ") == []
+    assert indice.por_apellido("") == []
+    assert indice.por_apellido("M", limite=1) == [1]       # orden alfabético
+
+
+def test_buscar_exactas_primero(indice):
+    assert indice.buscar("300003") == [2]
+    assert indice.buscar("gomez") == [3]
+    assert indice.buscar("300001", limite=1) == [0]
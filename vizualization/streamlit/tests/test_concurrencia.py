@@ -0,0 +1,14 @@
+# tests/test_concurrencia.py
+# Versión corta de benchmarks.concurrencia: varios procesos y hilos editando las
+# mismas filas con version_fila; ninguna actualización se pierde.
+from benchmarks.concurrencia import correr
+from utils.almacen import AlmacenCSV
+
+
+def test_sin_actualizaciones_perdidas(registro, monkeypatch):
+    monkeypatch.setattr(AlmacenCSV, "MAX_JOURNAL_BYTES", AlmacenCSV.MAX_JOURNAL_BYTES)  # correr la cambia
+    r = correr(procesos=2, hilos=2, n=8, max_journal=1024)
+    assert r["hechos"] == 32
+    assert r["suma"] == r["hechos"]
+    assert r["ids_unicos"]
+    assert r["agregados_ok"]
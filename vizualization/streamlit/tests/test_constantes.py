@@ -0,0 +1,39 @@
+# tests/test_constantes.py
+import pandas as pd
+
+from utils.constantes import ESQUEMA, FIELDNAMES, get_departamentos, get_municipios, tipar_registros
+
+from conftest import fila
+
+
+def test_esquema_cubre_el_registro():
+    assert set(ESQUEMA) == set(FIELDNAMES)
+    assert set(ESQUEMA.values()) <= {"str", "int", "float", "fecha", "bool", "cat"}
+
+
+def test_tipar_registros():
+    df = pd.DataFrame([
+        fila(1, tsh_neonatal="20.5", prematuro="VERDADERO", sexo=""),
+        fila(2, tsh_neonatal="", fecha_nacimiento="no es fecha", peso="x", prematuro="FALSO"),
+    ], columns=FIELDNAMES).assign(ciudad=["TUNJA", None])
+    t = tipar_registros(df)
+    assert str(t["id"].dtype) == "Int64" and t["id"].tolist() == [1, 2]
+    assert t["fecha_nacimiento"].iloc[0] == pd.Timestamp("2024-08-05")
+    assert pd.isna(t["fecha_nacimiento"].iloc[1])
+    assert t["peso"].iloc[0] == 3100 and pd.isna(t["peso"].iloc[1])
+    assert t["prematuro"].tolist() == [True, False]
+    assert isinstance(t["sexo"].dtype, pd.CategoricalDtype)
+    assert pd.isna(t["sexo"].iloc[0]) and t["sexo"].iloc[1] == "FEMENINO"
+    assert t["tsh_neonatal"].tolist() == [20.5, 0]                # pendiente: 0
+    assert t["ciudad"].tolist() == ["TUNJA", ""]                  # fuera de ESQUEMA: texto
+    assert df["peso"].iloc[0] == "3100"                           # no modifica la entrada
+
+
+def test_departamentos_y_municipios_de_la_tabla():
+    df_mun = pd.DataFrame({"cod_depto": ["15", "15", "05"], "nombre_depto": ["BOYACÁ", "BOYACÁ", "ANTIOQUIA"],
+                           "cod_municipio": ["15646", "15001", "05001"],
+                           "nombre_municipio": ["SAMACÁ", "TUNJA", "MEDELLÍN"]})
+    assert get_departamentos(df_mun) == [{"cod": "05", "nombre": "ANTIOQUIA"}, {"cod": "15", "nombre": "BOYACÁ"}]
+    assert [m["cod"] for m in get_municipios(df_mun, "15")] == ["15646", "15001"]
+    assert get_municipios(df_mun, "5") == [{"cod": "05001", "nombre": "MEDELLÍN"}]
+    assert get_departamentos(df_mun.iloc[:0]) == [] and get_municipios(df_mun, "") == []
@@ -0,0 +1,48 @@
+# tests/test_csv_helpers.py
+# Concurrencia optimista: version_fila y ConflictoConcurrencia, en los dos backends.
+import pandas as pd
+import pytest
+
+from utils.almacen import get_almacen
+from utils.csv_helpers import (
+    ConflictoConcurrencia, actualizar_registro, actualizar_registros, leer_registros, version_fila,
+)
+
+from conftest import fila
+
+
+def _por_id() -> pd.DataFrame:
+    return leer_registros().set_index("id")
+
+
+def test_version_fila():
+    a = fila(1)
+    assert version_fila(a) == version_fila(pd.Series(a))
+    assert version_fila(a) == version_fila({**a, "extra": "no cuenta"})
+    assert version_fila(a) != version_fila({**a, "peso": "3000"})
+    assert version_fila({**a, "peso": float("nan")}) == version_fila({**a, "peso": ""})
+
+
+def test_version_fila_igual_en_lectura_y_por_id(registro):
+    actualizar_registro(2, {"direccion": 'CALLE "2", APTO 1'})
+    df = leer_registros()
+    assert version_fila(df[df["id"] == "2"].iloc[0]) == version_fila(get_almacen().obtener(2))
+
+
+def test_conflicto_concurrencia(registro):
+    leida = get_almacen().obtener(3)
+    actualizar_registro(3, {"peso": "3000"}, version=version_fila(leida))      # versión vigente
+    with pytest.raises(ConflictoConcurrencia) as err:
+        actualizar_registro(3, {"peso": "2500"}, version=version_fila(leida))  # versión vieja
+    assert err.value.actuales["3"]["peso"] == "3000"
+    assert "registro 3" in str(err.value)
+    assert _por_id().loc["3", "peso"] == "3000"
+
+
+def test_conflicto_en_lote_no_escribe_ninguna(registro):
+    v1, v2 = (version_fila(get_almacen().obtener(i)) for i in (1, 2))
+    actualizar_registro(2, {"peso": "2000"})
+    with pytest.raises(ConflictoConcurrencia) as err:
+        actualizar_registros({1: {"peso": "1000"}, 2: {"peso": "1500"}}, {1: v1, 2: v2})
+    assert list(err.value.actuales) == ["2"]
+    assert _por_id().loc[["1", "2"], "peso"].tolist() == ["3100", "2000"]
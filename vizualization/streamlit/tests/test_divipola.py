@@ -0,0 +1,52 @@
+# tests/test_divipola.py
+import pytest
+
+from utils.divipola import Divipola, clave, get_divipola, leer_divipola
+
+CSV = (
+    "Código Departamento;Nombre Departamento;Código Municipio;Nombre Municipio;longitud;Latitud\n"
+    "11;BOGOTÁ, D.C.;11001;BOGOTÁ, D.C.;-74,08;4,6\n"
+    "15;BOYACÁ;15646;SAMACÁ;-73,48;5,49\n"
+    "15;BOYACÁ;15001;TUNJA;-73,36;5,53\n"
+    "5;ANTIOQUIA;5001;MEDELLÍN;;\n"
+    "68;SANTANDER;68001;BUCARAMANGA;-73,12;7,11\n"
+)
+
+
+@pytest.fixture
+def path(tmp_path):
+    p = tmp_path / "municipios.csv"
+    p.write_text(CSV, encoding="utf-8")
+    return str(p)
+
+
+def test_clave():
+    assert clave("Bogotá,  d.c. ") == clave("BOGOTA, D.C.") == "BOGOTA, D.C."
+    assert clave(15) == "15"
+
+
+def test_leer_divipola(path):
+    t = leer_divipola(path)
+    assert t.loc[t["nombre_municipio"] == "MEDELLÍN", ["cod_depto", "cod_municipio"]].values.tolist() == [["05", "05001"]]
+    assert t.loc[t["cod_municipio"] == "15646", "lat"].item() == 5.49
+    assert t.loc[t["cod_municipio"] == "05001", "lon"].isna().all()
+
+
+def test_consultas(path):
+    d = Divipola(leer_divipola(path))
+    assert [x["nombre"] for x in d.departamentos] == ["ANTIOQUIA", "BOGOTÁ, D.C.", "BOYACÁ", "SANTANDER"]
+    assert d.nombre_departamento("5") == "ANTIOQUIA"
+    assert d.cod_departamento("boyaca") == "15"
+    assert d.nombre_municipio(5001) == "MEDELLÍN"
+    assert d.departamento_de("15646") == "15"
+    assert d.cod_municipio("Samaca", "15") == "15646"
+    assert d.cod_municipio("Samaca", "68") == ""
+    assert [m["nombre"] for m in d.municipios("15")] == ["SAMACÁ", "TUNJA"]
+    assert d.municipios("") == [] and d.municipios("99") == []
+    assert d.nombre_municipio("99999") == ""
+
+
+def test_sin_archivo(tmp_path):
+    d = get_divipola(str(tmp_path / "no_existe.csv"))
+    assert not d
+    assert d.departamentos == [] and d.municipios("15") == [] and d.cod_departamento("x") == ""
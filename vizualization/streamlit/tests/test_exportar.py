@@ -0,0 +1,51 @@
+# tests/test_exportar.py
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+from utils.exportar import FORMATOS, escribir, exportar
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({"id": range(25), "nombre": [f"MUÑOZ {i}" for i in range(25)],
+                         "tsh": [i / 2 for i in range(25)]})
+
+
+def _leer(archivo, formato):
+    if formato == "Parquet":
+        return pd.read_parquet(archivo)
+    return pd.read_csv(archivo, compression="gzip" if formato == "CSV gzip" else None)
+
+
+@pytest.mark.parametrize("formato", list(FORMATOS))
+def test_exportar_ida_y_vuelta(df, formato):
+    with exportar(df, formato) as archivo:
+        assert isinstance(archivo, io.RawIOBase) and archivo.tell() == 0
+        assert _leer(archivo, formato).equals(df)
+
+
+@pytest.mark.parametrize("formato", list(FORMATOS))
+def test_por_bloques_igual_que_de_una_vez(df, formato):
+    chico, grande = io.BytesIO(), io.BytesIO()
+    escribir(df, formato, chico, bloque=7)
+    escribir(df, formato, grande, bloque=1000)
+    chico.seek(0)
+    assert _leer(chico, formato).equals(df)
+    if formato != "Parquet":                         # Parquet: un row group por bloque
+        a, b = chico.getvalue(), grande.getvalue()
+        if formato == "CSV gzip":
+            a, b = gzip.decompress(a), gzip.decompress(b)
+        assert a == b
+
+
+def test_vacio_conserva_encabezado(df):
+    with exportar(df.iloc[:0]) as archivo:
+        assert archivo.read() == b"id,nombre,tsh\n"
+
+
+def test_formato_desconocido(df):
+    with pytest.raises(ValueError, match="Formato desconocido"):
+        exportar(df, "XLSX")
@@ -0,0 +1,57 @@
+# tests/test_filtros.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.constantes import FIELDNAMES, tipar_registros
+from utils.filtros import MotorFiltros, motor_registros
+
+from conftest import fila
+
+
+@pytest.fixture
+def motor():
+    df = pd.DataFrame({"sexo": ["F", "M", "F", None, "M"],
+                       "depto": ["A", "A", "B", "B", ""],
+                       "tsh": [1.0, 2.0, 3.0, 4.0, 5.0]})
+    categorias = {"sexo": df["sexo"], "depto": df["depto"].where(df["depto"] != "")}
+    return MotorFiltros(df, categorias, {"alto": df["tsh"] >= 3})
+
+
+def test_valores(motor):
+    assert motor.valores("sexo") == ["F", "M"]
+    assert motor.valores("depto") == ["A", "B"]
+    assert motor.valores("nada") == []
+
+
+def test_mascara(motor):
+    assert motor.mascara().all()
+    assert motor.mascara({"sexo": []}).all()                          # lista vacía: no filtra
+    assert motor.mascara({"sexo": ["F"]}).tolist() == [True, False, True, False, False]
+    # los vacíos (código −1) quedan fuera en cuanto se filtra
+    assert motor.mascara({"depto": ["A", "B"]}).tolist() == [True, True, True, True, False]
+    assert motor.mascara({"sexo": ["M", "X"], "depto": ["A"]}).tolist() == [False, True, False, False, False]
+    assert motor.mascara(banderas={"alto": True}).tolist() == [False, False, True, True, True]
+    assert motor.mascara({"sexo": ["F"]}, {"alto": False}).tolist() == [True, False, False, False, False]
+    assert motor.mascara({"nada": ["x"]}).all()
+
+
+def test_tomar(motor):
+    m = motor.mascara({"sexo": ["M"]})
+    d = motor.tomar(m, ["tsh", "no_existe"])
+    assert list(d.columns) == ["tsh"] and d["tsh"].tolist() == [2.0, 5.0]
+    assert len(motor.tomar(np.ones(motor.n, dtype=bool), ["tsh"])) == motor.n
+
+
+def test_motor_registros():
+    df = tipar_registros(pd.DataFrame([
+        fila(1, tsh_neonatal="20", resultado_muestra_2="16"), fila(2, tsh_neonatal="20"),
+        fila(3, tsh_neonatal="3", fecha_nacimiento="2023-01-02", cod_municipio="15001"), fila(4),
+    ], columns=FIELDNAMES))
+    motor = motor_registros(df)
+    assert motor.valores("año") == [2023, 2024]
+    assert motor.valores("municipio") == ["15001", "15646"]
+    assert motor.mascara(banderas={"confirmado": True}).tolist() == [True, False, False, False]
+    assert motor.mascara(banderas={"sospecha": True}).sum() == 2
+    assert motor.mascara(banderas={"pendiente": True}).tolist() == [False, False, False, True]
+    assert motor.mascara({"año": [2023]}).tolist() == [False, False, True, False]
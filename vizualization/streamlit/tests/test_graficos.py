@@ -0,0 +1,32 @@
+# tests/test_graficos.py
+import numpy as np
+
+from utils.graficos import _trazas_dispersion, ajustar_tendencia
+
+
+def test_dispersion_pocos_puntos_dibuja_todo():
+    trazas = _trazas_dispersion([1, 2, 3], [4, 5, 6], [False, True, False], max_puntos=10)
+    assert [t.name for t in trazas] == ["No confirmado", "Confirmado"]
+    assert len(trazas[0].x) == 2
+
+
+def test_dispersion_densidad_con_nan():
+    x = np.r_[np.arange(50, dtype=float), np.nan]
+    y = np.r_[np.arange(50, dtype=float), 3.0]
+    trazas = _trazas_dispersion(x, y, np.zeros(51, dtype=bool), max_puntos=10, nbins=5)
+    assert trazas[0].type == "heatmap"
+    assert np.isfinite(np.asarray(trazas[0].x, dtype=float)).all()   # el NaN no daña el rango
+    assert np.nansum(np.asarray(trazas[0].z, dtype=float)) == 49     # recorte al p99.5
+
+
+def test_dispersion_todos_confirmados():
+    trazas = _trazas_dispersion(np.arange(20), np.arange(20), np.ones(20, dtype=bool), max_puntos=10)
+    assert [t.type for t in trazas] == ["scattergl"]
+    assert len(trazas[0].x) == 20
+
+
+def test_ajustar_tendencia():
+    assert ajustar_tendencia([1], [2]) is None
+    assert ajustar_tendencia([1, 1], [2, 3]) is None
+    pendiente, intercepto = ajustar_tendencia([0, 1, 2], [1, 3, 5])
+    assert round(pendiente, 6) == 2 and round(intercepto, 6) == 1
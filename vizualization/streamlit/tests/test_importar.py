@@ -0,0 +1,36 @@
+# tests/test_importar.py
+import pandas as pd
+
+from utils.csv_helpers import leer_registros
+from utils.importar import importar_bloques
+
+
+def _bloque(filas):
+    return pd.DataFrame(filas, columns=["No de ficha", "Primer apellido", "Resultados TSH neonatal", "Peso"])
+
+
+def test_ficha_rechazada_no_deja_repetida_a_la_siguiente(datos):
+    resumen, rechazadas = importar_bloques([_bloque([
+        ["500", "UNO", "999999", "3100"],          # TSH fuera de rango: se rechaza
+        ["500", "DOS", "4.2", "3100"],             # la misma ficha, válida: se importa
+        ["501", "TRES", "5", "3000"],
+        ["501", "CUATRO", "5", "3000"],            # repetida de verdad
+    ])])
+    assert resumen["importadas"] == 2
+    assert resumen["duplicadas_archivo"] == 1
+    assert resumen["invalidas"] == 1
+    assert list(rechazadas["fila"]) == [2, 5]
+    assert rechazadas["motivo"].iloc[1] == "Ficha repetida en el archivo"
+    assert sorted(leer_registros()["apellido_1"]) == ["DOS", "TRES"]
+
+
+def test_repetidas_entre_bloques_y_con_el_registro(datos):
+    importar_bloques([_bloque([["600", "A", "5", "3000"]])])
+    resumen, rechazadas = importar_bloques([
+        _bloque([["600", "B", "5", "3000"], ["601", "C", "5", "3000"]]),
+        _bloque([["601", "D", "5", "3000"], ["602", "E", "", "3000"]]),
+    ], simular=True)
+    assert resumen == {"leidas": 4, "importadas": 2, "invalidas": 0,
+                       "duplicadas_registro": 1, "duplicadas_archivo": 1}
+    assert list(rechazadas["motivo"]) == ["Ficha ya registrada", "Ficha repetida en el archivo"]
+    assert len(leer_registros()) == 1                                    # simular no escribe
@@ -0,0 +1,55 @@
+# tests/test_limpieza.py
+# utils.limpieza contra las versiones fila a fila del notebook (benchmarks.limpieza)
+import pandas as pd
+import pytest
+
+from benchmarks.limpieza import (
+    _iguales, generar, nb_ajustar_año_toma, nb_convertir_peso, nb_corregir_año_resultado,
+    nb_corregir_fechas_muestra2, nb_tiene_10_digitos,
+)
+from utils import limpieza
+
+
+@pytest.fixture(scope="module")
+def df():
+    return generar(3000, semilla=1)
+
+
+@pytest.mark.parametrize("notebook, vectorizada, columnas", [
+    (nb_corregir_año_resultado, limpieza.corregir_año_resultado, ["fecha_resultado", "dias_pasados"]),
+    (nb_ajustar_año_toma, limpieza.ajustar_año_toma, ["fecha_toma_muestra", "dias_pasados"]),
+    (nb_corregir_fechas_muestra2, limpieza.corregir_fechas_muestra2,
+     ["fecha_toma_muestra", "fecha_toma_muestra_2", "fecha_resultado_muestra_2", "dias_pasados2"]),
+])
+def test_fechas_igual_que_el_notebook(df, notebook, vectorizada, columnas):
+    a, b = notebook(df), vectorizada(df)
+    for c in columnas:
+        if c.startswith("fecha"):
+            assert _iguales(pd.to_datetime(a[c]), b[c]), c
+        else:
+            assert _iguales(a[c].astype(float), b[c].astype(float)), c
+
+
+def test_peso_igual_que_el_notebook(df):
+    assert _iguales(df["peso"].apply(nb_convertir_peso).astype(float),
+                    limpieza.convertir_peso(df["peso"]).astype(float))
+
+
+def test_telefono_igual_que_el_notebook(df):
+    assert _iguales(df["telefono_1"].apply(nb_tiene_10_digitos),
+                    limpieza.tiene_10_digitos(df["telefono_1"]))
+
+
+def test_no_modifica_la_entrada(df):
+    antes = df.copy()
+    limpieza.corregir_año_resultado(df)
+    limpieza.corregir_fechas_muestra2(df)
+    pd.testing.assert_frame_equal(df, antes)
+
+
+def test_con_año_deja_fechas_imposibles():
+    fechas = pd.Series(pd.to_datetime(["2024-02-29 08:30", "2023-05-10 00:00", None]))
+    r = limpieza.con_año(fechas, [2023, 2024, 2024])
+    assert r.iloc[0] == pd.Timestamp("2024-02-29 08:30")             # el notebook fallaría
+    assert r.iloc[1] == pd.Timestamp("2024-05-10")
+    assert pd.isna(r.iloc[2])
@@ -0,0 +1,50 @@
+# tests/test_mapa.py
+import pandas as pd
+import pytest
+
+from utils import mapa
+from utils.divipola import get_divipola
+
+CSV = (
+    "Código Departamento,Nombre Departamento,Código Municipio,Nombre Municipio,longitud,Latitud\n"
+    '15,BOYACÁ,15646,SAMACÁ,"-73,48","5,49"\n'
+    '15,BOYACÁ,15001,TUNJA,"-73,36","5,53"\n'
+    "05,ANTIOQUIA,05001,MEDELLÍN,,\n"
+)
+
+
+@pytest.fixture
+def municipios(tmp_path, monkeypatch):
+    p = tmp_path / "municipios.csv"
+    p.write_text(CSV, encoding="utf-8")
+    monkeypatch.setattr(mapa, "coordenadas_municipios",
+                        lambda path=str(p), f=mapa.coordenadas_municipios: f(path))
+    yield str(p)
+    get_divipola.cache_clear()
+
+
+def test_coordenadas(municipios):
+    c = mapa.coordenadas_municipios()
+    assert sorted(c.index) == ["15001", "15646"]                       # sin lat/lon: fuera
+    assert c.loc["15646"].tolist() == ["SAMACÁ", "BOYACÁ", 5.49, -73.48]
+
+
+def test_casos_por_municipio(municipios):
+    agg = pd.DataFrame({"municipio":   ["15646", "15646", "5001", "", "15001"],
+                        "n":           [3, 2, 4, 9, 1],
+                        "sospechosos": [1, 1, 0, 9, 0],
+                        "confirmados": [1, 0, 0, 9, 0]})
+    casos = mapa.casos_por_municipio(agg)
+    assert casos.loc["15646", ["n", "sospechosos", "confirmados"]].tolist() == [5, 2, 1]
+    assert "05001" not in casos.index                                  # sin coordenadas
+    geo = mapa.geojson_casos(casos)
+    assert len(geo["features"]) == 2
+    samaca = next(f for f in geo["features"] if f["properties"]["cod"] == "15646")
+    assert samaca["geometry"]["coordinates"] == [-73.48, 5.49]
+    assert samaca["properties"]["n"] == 5
+
+
+def test_sin_casos(municipios):
+    vacio = mapa.casos_por_municipio(pd.DataFrame({"municipio": [""], "n": [1],
+                                                   "sospechosos": [0], "confirmados": [0]}))
+    assert vacio.empty and mapa.geojson_casos(vacio)["features"] == []
@@ -0,0 +1,88 @@
+# tests/test_paginas.py
+# Páginas de Streamlit ejecutadas con AppTest sobre un registro de prueba.
+import base64
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from utils.constantes import FIELDNAMES
+from utils.csv_helpers import guardar_registros
+
+from conftest import fila
+
+PAGINAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages")
+
+
+def _valores(arreglo) -> np.ndarray:
+    """Arreglo de una figura serializada (plotly codifica los numéricos en base64)."""
+    if isinstance(arreglo, dict):
+        return np.frombuffer(base64.b64decode(arreglo["bdata"]), dtype=arreglo["dtype"])
+    return np.asarray(arreglo)
+
+
+def _pagina(prefijo: str) -> AppTest:
+    return AppTest.from_file(glob.glob(os.path.join(PAGINAS, prefijo + "_*"))[0], default_timeout=60)
+
+
+@pytest.fixture
+def confirmados(datos):
+    """30 registros, 12 confirmados (TSH1 y TSH2 ≥ corte)."""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    filas = [fila(i, tsh_neonatal=20 + i if i <= 15 else 3, resultado_muestra_2=30 + i if i <= 12 else "",
+                  apellido_1=f"APELLIDO{i:02d}", cod_municipio="15646" if i % 2 else "15001",
+                  nombre_municipio="SAMACÁ" if i % 2 else "TUNJA")
+             for i in range(1, 31)]
+    guardar_registros(pd.DataFrame(filas, columns=FIELDNAMES))
+    yield
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def test_alertas_pagina_y_ordena(confirmados):
+    at = _pagina("3").run()
+    assert not at.exception
+    assert at.metric[0].value == "12"
+    at.selectbox(key="conf_orden").set_value("apellido_1").run()
+    at.toggle(key="conf_desc").set_value(False).run()
+    tabla = at.dataframe[0].value
+    assert list(tabla["apellido_1"][:3]) == ["APELLIDO01", "APELLIDO02", "APELLIDO03"]
+    assert not at.exception
+
+
+def test_alertas_sin_confirmados(datos):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    guardar_registros(pd.DataFrame([fila(1, tsh_neonatal=3)], columns=FIELDNAMES))
+    at = _pagina("3").run()
+    assert not at.exception
+    assert any("No hay casos confirmados" in i.value for i in at.info)
+
+
+def test_dashboard_filtra_agregados_por_municipio(confirmados):
+    at = _pagina("2").run()
+    assert not at.exception
+    municipio = at.sidebar.multiselect[-1]
+    assert municipio.label == "Municipio:"
+    municipio.set_value(["15001"]).run()                          # TUNJA: registros pares
+    assert not at.exception
+    assert "**Filtrados:** 15 registros" in [m.value for m in at.sidebar.markdown]
+    sexo = next(pio.from_json(c.proto.spec) for c in at.get("plotly_chart")
+                if "Distribución por Sexo" in c.proto.spec)
+    assert {t.name: int(_valores(t.y).sum()) for t in sexo.data} == {"Normal": 9, "Hipotiroidismo": 6}
+
+
+def test_alertas_avisa_si_los_sms_son_simulados(confirmados, monkeypatch):
+    from utils import alertas
+    monkeypatch.setattr(alertas, "SMS_SIMULADO", True)
+    at = _pagina("3").run()
+    assert any("modo de prueba" in w.value for w in at.warning)
+    monkeypatch.setattr(alertas, "SMS_SIMULADO", False)
+    at = _pagina("3").run()
+    assert not any("modo de prueba" in w.value for w in at.warning)
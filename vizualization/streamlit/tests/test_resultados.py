@@ -0,0 +1,86 @@
+# tests/test_resultados.py
+import pandas as pd
+import pytest
+
+from utils import resultados
+from utils.constantes import FIELDNAMES
+from utils.csv_helpers import actualizar_registro, guardar_registros, leer_registros
+from utils.resultados import cargar_resultados, conciliar, leer_export, resumir
+
+from conftest import fila
+
+REGISTRO = [
+    fila(1),                                                    # sin resultado
+    fila(2, tsh_neonatal="20", ficha_id_2="900002"),            # espera la 2ª muestra
+    fila(3, tsh_neonatal="5"),
+    fila(4, tsh_neonatal="6"),
+    fila(5, ficha_id="777"), fila(6, ficha_id="777"),           # ficha en dos registros
+]
+EXPORT = [
+    ["300001", "18",  "2024-08-10"],    # por actualizar, requiere 2ª muestra
+    ["900002", "30",  "10/08/2024"],    # 2ª muestra: confirma el caso
+    ["300003", "5",   "2024-08-10"],    # sin cambios
+    ["300004", "9",   "2024-08-10"],    # ya tiene resultado
+    ["777",    "4",   "2024-08-10"],    # ficha ambigua
+    ["123456", "4",   "2024-08-10"],    # sin coincidencia
+    ["300001", "7",   "2024-08-10"],    # repetida en el archivo
+    ["",       "4",   "2024-08-10"],
+    ["300005", "abc", "2024-08-10"],
+    ["300005", "4",   "ayer"],
+]
+
+
+def _export():
+    return leer_export(pd.DataFrame(EXPORT, columns=["Código muestra", "Resultado TSH", "Fecha resultado"]))
+
+
+def test_leer_export_detecta_columnas():
+    export = _export()
+    assert list(export.columns) == ["fila", "ficha", "tsh", "fecha"]
+    assert export["fila"].iloc[0] == 2
+    with pytest.raises(ValueError, match="columna de tsh"):
+        leer_export(pd.DataFrame({"ficha": ["1"], "fecha": ["2024-01-01"]}))
+
+
+def test_conciliar_estados():
+    reg = pd.DataFrame(REGISTRO, columns=FIELDNAMES)
+    rep = conciliar(_export(), reg)
+    assert rep["estado"].tolist() == [
+        "por actualizar", "por actualizar", "sin cambios", "ya tiene resultado", "ficha ambigua",
+        "sin coincidencia", "repetida en el archivo", "inválida: sin ficha",
+        "inválida: TSH debe ser un número", "inválida: fecha",
+    ]
+    assert rep["muestra"].tolist()[:2] == [1, 2]
+    assert rep["requiere_2a"].tolist()[:2] == [True, False]
+    assert rep["confirma_caso"].tolist()[:2] == [False, True]
+    assert conciliar(_export(), reg, sobrescribir=True)["estado"].iloc[3] == "por actualizar"
+
+
+def test_resumen_cuenta_cada_caso_confirmado_una_vez():
+    reg = pd.DataFrame([fila(1, ficha_id_2="900001")], columns=FIELDNAMES)
+    export = leer_export(pd.DataFrame([["300001", "20", "2024-08-10"], ["900001", "30", "2024-08-12"]],
+                                      columns=["ficha", "tsh", "fecha"]))
+    rep = conciliar(export, reg)
+    assert rep["confirma_caso"].tolist() == [True, True]
+    assert resumir(rep)["confirmados"] == 1
+
+
+def test_cargar_resultados_reintenta_ante_conflicto(datos, monkeypatch):
+    guardar_registros(pd.DataFrame(REGISTRO, columns=FIELDNAMES))
+    original = resultados.actualizar_registros
+    llamadas = []
+
+    def con_otro_operador(cambios, versiones):
+        if not llamadas:                                # alguien guarda entre lectura y escritura
+            actualizar_registro(1, {"direccion": "CALLE 1"})
+        llamadas.append(sorted(cambios))
+        return original(cambios, versiones)
+    monkeypatch.setattr(resultados, "actualizar_registros", con_otro_operador)
+
+    reporte, resumen = cargar_resultados(_export())
+    assert len(llamadas) == 2
+    assert resumen["actualizado"] == 2 and resumen["confirmados"] == 1
+    reg = leer_registros().set_index("id")
+    assert reg.loc["1", "tsh_neonatal"] == "18.0" and reg.loc["1", "direccion"] == "CALLE 1"
+    assert reg.loc["2", "resultado_muestra_2"] == "30.0" and reg.loc["2", "contador"] == "1"
+    assert reg.loc["4", "tsh_neonatal"] == "6"
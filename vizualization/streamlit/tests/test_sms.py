@@ -0,0 +1,69 @@
+# tests/test_sms.py
+import json
+
+import pytest
+
+from utils import sms
+from utils.sms import enviar_lote, normalizar_telefono
+
+
+@pytest.mark.parametrize("entrada, esperado", [
+    ("3001234567", "+573001234567"),
+    ("+57 300 123-4567", "+573001234567"),
+    ("573001234567", "+573001234567"),
+    ("0057 3001234567", "+573001234567"),
+    ("0", ""),
+    ("", ""),
+])
+def test_normalizar_telefono(entrada, esperado):
+    assert normalizar_telefono(entrada) == esperado
+
+
+@pytest.fixture
+def sin_cache():
+    sms.get_proveedor.cache_clear()
+    yield
+    sms.get_proveedor.cache_clear()
+
+
+@pytest.mark.parametrize("error, texto", [
+    (FileNotFoundError("No secrets found"), "Faltan credenciales"),
+    (KeyError("twilio"), "Faltan credenciales"),
+    (RuntimeError("otra cosa"), "Error de configuración SMS: otra cosa"),
+])
+def test_error_al_crear_proveedor_falla_cada_mensaje(sin_cache, monkeypatch, error, texto):
+    def proveedor():
+        raise error
+    monkeypatch.setattr(sms, "SMS_PROVEEDOR", "twilio")
+    monkeypatch.setattr(sms, "ProveedorTwilio", proveedor)
+    res = enviar_lote([("3001234567", "hola"), ("0", "sin número")], test_mode=False)
+    assert res[0][0] is False and texto in res[0][1]
+    assert res[1] == (False, "Teléfono vacío")
+
+
+def test_modo_prueba_escribe_archivo_enmascarado(sin_cache, datos, monkeypatch):
+    monkeypatch.setattr(sms, "SMS_ARCHIVO", str(datos / "sms.jsonl"))
+    res = enviar_lote([("3001234567", "Su bebé requiere control")], test_mode=True)
+    assert res[0] == (True, "[SIMULADO] → +57300*****67")
+    linea = json.loads((datos / "sms.jsonl").read_text(encoding="utf-8"))
+    assert linea["to"] == "+57300*****67" and linea["caracteres"] == 24
+    assert "3001234567" not in str(linea) and "bebé" not in str(linea)
+
+
+def test_modo_prueba_sin_archivo_no_escribe(sin_cache, datos, monkeypatch):
+    monkeypatch.setattr(sms, "SMS_ARCHIVO", "")
+    assert enviar_lote([("3001234567", "hola")], test_mode=True)[0][0] is True
+    assert list(datos.iterdir()) == []
+
+
+def test_proveedor_archivo_requiere_sms_archivo(sin_cache, monkeypatch):
+    monkeypatch.setattr(sms, "SMS_PROVEEDOR", "archivo")
+    monkeypatch.setattr(sms, "SMS_ARCHIVO", "")
+    assert not sms.proveedor_configurado()
+    with pytest.raises(ValueError, match="SMS_ARCHIVO"):
+        sms.get_proveedor(test_mode=False)
+
+
+def test_enmascarar_telefono():
+    assert sms.enmascarar_telefono("+573001234567") == "+57300*****67"
+    assert sms.enmascarar_telefono("123") == "***"
@@ -0,0 +1,63 @@
+# tests/test_snapshot.py
+import os
+
+import pandas as pd
+import pytest
+
+from utils import datos as datos_app
+from utils import snapshot
+from utils.constantes import SNAPSHOT_REGISTROS
+from utils.csv_helpers import actualizar_registro, version_registros
+
+
+@pytest.fixture
+def cachés():
+    datos_app._registros.clear()
+    datos_app._motor.clear()
+    yield
+    datos_app._registros.clear()
+    datos_app._motor.clear()
+
+
+def test_se_construye_y_reconstruye(registro):
+    df = snapshot.leer_snapshot()
+    assert len(df) == 5 and str(df["id"].dtype) == "Int64"
+    assert snapshot._version_snapshot(SNAPSHOT_REGISTROS) == version_registros()
+
+    actualizar_registro(3, {"tsh_neonatal": "21"})
+    df = snapshot.leer_snapshot(["id", "tsh_neonatal", "no_existe"])
+    assert list(df.columns) == ["id", "tsh_neonatal"]
+    assert df.set_index("id").loc[3, "tsh_neonatal"] == 21
+    assert snapshot._version_snapshot(SNAPSHOT_REGISTROS) == version_registros()
+
+
+def test_construir_no_reescribe_si_esta_al_dia(registro):
+    version = snapshot.construir_snapshot()
+    antes = os.stat(SNAPSHOT_REGISTROS).st_mtime_ns
+    assert snapshot.construir_snapshot() == version
+    assert os.stat(SNAPSHOT_REGISTROS).st_mtime_ns == antes
+    assert len(pd.read_parquet(SNAPSHOT_REGISTROS)) == 5
+
+
+def test_sin_pyarrow_tipa_el_registro(registro, monkeypatch):
+    monkeypatch.setattr(snapshot, "pq", None)
+    actualizar_registro(1, {"tsh_neonatal": "8.5"})
+    df = snapshot.leer_snapshot(["tsh_neonatal", "fecha_nacimiento", "no_existe"])
+    assert list(df.columns) == ["tsh_neonatal", "fecha_nacimiento"]
+    assert df["tsh_neonatal"].tolist() == [8.5, 0, 0, 0, 0]
+    assert df["fecha_nacimiento"].dtype.kind == "M"
+    assert len(snapshot.leer_snapshot().columns) > 30
+    assert not os.path.exists(SNAPSHOT_REGISTROS)                    # no se escribe nada
+
+
+def test_registros_por_conjunto_de_columnas(registro, cachés):
+    actualizar_registro(2, {"tsh_neonatal": "20", "resultado_muestra_2": "16"})
+    df = datos_app.cargar_registros(["peso", "confirmado_hipotiroidismo"])
+    assert list(df.columns) == ["peso", "tsh_neonatal", "resultado_muestra_2",
+                                "sospecha_hipotiroidismo", "confirmado_hipotiroidismo"]
+    assert df["confirmado_hipotiroidismo"].sum() == 1
+    assert len(datos_app.cargar_registros().columns) > 30            # completo: otra entrada
+
+    motor = datos_app.cargar_motor_filtros(["peso"])
+    assert "peso" in motor.df.columns and "direccion" not in motor.df.columns
+    assert motor.mascara(banderas={"confirmado": True}).sum() == 1
@@ -0,0 +1,57 @@
+# tests/test_umbral.py
+import numpy as np
+import pandas as pd
+
+from utils.umbral import BarridoUmbral
+
+
+def _datos(n=500, semilla=0):
+    rnd = np.random.default_rng(semilla)
+    tsh1 = np.round(rnd.exponential(6, n), 1)
+    tsh2 = np.where(rnd.random(n) < 0.5, np.round(rnd.exponential(8, n), 1), 0.0)
+    sexo = pd.Series(rnd.choice(["FEMENINO", "MASCULINO", ""], n))
+    return tsh1, tsh2, sexo
+
+
+def _fuerza_bruta(tsh1, tsh2, umbral):
+    return int((tsh1 >= umbral).sum()), int(((tsh1 >= umbral) & (tsh2 >= umbral)).sum())
+
+
+def test_en_igual_que_contar():
+    tsh1, tsh2, _ = _datos()
+    b = BarridoUmbral(tsh1, tsh2)
+    for umbral in [0.5, 5, 5.5, 15, 30, 1000]:
+        sosp, conf = _fuerza_bruta(tsh1, tsh2, umbral)
+        r = b.en(umbral)
+        assert (r["sospechosos"], r["confirmados"]) == (sosp, conf)
+        assert r["tasa_confirmacion"] == conf / sosp if sosp else np.isnan(r["tasa_confirmacion"])
+
+
+def test_curva():
+    tsh1, tsh2, _ = _datos()
+    c = BarridoUmbral(tsh1, tsh2).curva()
+    assert list(c.columns) == ["umbral", "sospechosos", "confirmados", "tasa_confirmacion", "incidencia"]
+    for _, f in c.iterrows():
+        sosp, conf = _fuerza_bruta(tsh1, tsh2, f["umbral"])
+        assert (f["sospechosos"], f["confirmados"]) == (sosp, conf)
+        assert f["incidencia"] == conf / len(tsh1) * 100
+    assert c["sospechosos"].is_monotonic_decreasing
+
+
+def test_por_grupo_excluye_vacios():
+    tsh1, tsh2, sexo = _datos()
+    g = BarridoUmbral(tsh1, tsh2, {"sexo": sexo}).por_grupo("sexo", 10)
+    assert g["sexo"].tolist() == ["FEMENINO", "MASCULINO"]
+    for _, f in g.iterrows():
+        m = (sexo == f["sexo"]).to_numpy()
+        assert f["total"] == m.sum()
+        assert (f["sospechosos"], f["confirmados"]) == _fuerza_bruta(tsh1[m], tsh2[m], 10)
+
+
+def test_vacio():
+    b = BarridoUmbral([], [], {"sexo": pd.Series([], dtype=str)})
+    r = b.en(5)
+    assert (r["sospechosos"], r["confirmados"]) == (0, 0) and np.isnan(r["tasa_confirmacion"])
+    assert b.curva([5, 10])["sospechosos"].tolist() == [0, 0]
+    assert b.por_grupo("sexo", 5).empty
+    assert b.por_grupo("no_existe", 5).empty
@@ -0,0 +1,41 @@
+# tests/test_validaciones.py
+import numpy as np
+import pandas as pd
+
+from utils.validaciones import (
+    ALTO, BAJO, NO_NUMERICO, TEXTOS_PESO, TEXTOS_TSH, VACIO, VALIDO,
+    mensajes, reporte_registros, val_peso, val_peso_lote, val_tsh, val_tsh_lote,
+)
+
+from conftest import fila
+
+VALORES_TSH  = ["", "abc", "0,01", "999", "12,5"]
+VALORES_PESO = ["", "x", "100", "9000", "3100"]
+
+
+def test_codigos_por_lote():
+    v, codigos = val_tsh_lote(VALORES_TSH)
+    assert codigos.tolist() == [VACIO, NO_NUMERICO, BAJO, ALTO, VALIDO]
+    assert v[-1] == 12.5 and np.isnan(v[:-1]).all()
+    _, codigos = val_tsh_lote(["0", "3"], pendiente_cero=True)
+    assert codigos.tolist() == [VACIO, VALIDO]
+
+
+def test_mensajes_iguales_a_los_de_un_valor():
+    _, codigos = val_tsh_lote(VALORES_TSH)
+    esperado = [val_tsh(t, "TSH 2")[1] or "" for t in VALORES_TSH]
+    assert mensajes(codigos, "TSH 2", TEXTOS_TSH).tolist() == esperado
+
+    _, codigos = val_peso_lote(VALORES_PESO)
+    esperado = [val_peso(t)[1] or "" for t in VALORES_PESO]
+    assert mensajes(codigos, "Peso", TEXTOS_PESO).tolist() == esperado
+    # La unidad la dan los textos, no la etiqueta
+    assert mensajes([ALTO], "Peso al nacer", TEXTOS_PESO)[0].startswith("Peso al nacer imposible")
+
+
+def test_reporte_registros():
+    df = pd.DataFrame([fila(1), fila(2, tsh_neonatal="0", peso="abc"),
+                       fila(3, resultado_muestra_2="999")])
+    reporte = reporte_registros(df)
+    assert reporte[["id", "campo"]].values.tolist() == [["3", "resultado_muestra_2"], ["2", "peso"]]
+    assert reporte["motivo"].tolist()[1] == "Peso debe ser un número"
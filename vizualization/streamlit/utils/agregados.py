@@ -0,0 +1,206 @@
+# utils/agregados.py
+# ─── Agregados materializados del registro para el dashboard ─────────────────
+#
+# Conteos por (mes, sexo, prematuro, tipo_muestra, departamento, municipio,
+# rango_tsh, estado). guardar_registro / actualizar_registro los ajustan de
+# forma incremental (+1 / −1 por fila) y las figuras de resumen, evolución e
+# incidencia leen estos grupos en lugar de recorrer todos los registros.
+#
+# El archivo guarda la versión del registro a la que corresponde; si no
+# coincide (edición externa, compactación) se reconstruye en la próxima lectura.
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.almacen import get_almacen
+from utils.archivos import bloqueo_archivo, escribir_atomico
+from utils.constantes import FIELDNAMES, TSH_CORTE, tipar_registros
+
+DIMENSIONES = ["mes", "sexo", "prematuro", "tipo_muestra",
+               "departamento", "municipio", "rango_tsh", "estado"]
+MEDIDAS = ["n", "sospechosos", "confirmados"]
+
+# Rangos de TSH 1ª muestra (mIU/L); 0 = sin resultado
+CORTES_TSH  = [0, 5, 10, 15, 20, 30, 50, np.inf]
+ETIQUETAS_TSH = ["<5", "5-10", "10-15", "15-20", "20-30", "30-50", "≥50"]
+
+
+def _texto(s: pd.Series) -> pd.Series:
+    """Texto plano con "" para los vacíos (funciona con categóricas)."""
+    return s.astype(object).where(s.notna(), "").astype(str)
+
+
+def _col(df: pd.DataFrame, *nombres: str) -> pd.Series:
+    """Primera columna disponible entre `nombres` (compatibilidad con CSV antiguos)."""
+    for n in nombres:
+        if n in df.columns:
+            return _texto(df[n])
+    return pd.Series("", index=df.index)
+
+
+def agrupar(df: pd.DataFrame) -> pd.DataFrame:
+    """Agregados de un registro tipado (ESQUEMA): una fila por grupo, con MEDIDAS."""
+    tsh1 = df["tsh_neonatal"]
+    sosp = tsh1 >= TSH_CORTE
+    conf = sosp & (df["resultado_muestra_2"] >= TSH_CORTE)
+
+    claves = pd.DataFrame({
+        "mes":          _texto(df["fecha_nacimiento"].dt.strftime("%Y-%m")),
+        "sexo":         _col(df, "sexo"),
+        "prematuro":    df["prematuro"].astype(bool),
+        "tipo_muestra": _col(df, "tipo_muestra"),
+        "departamento": _col(df, "nombre_departamento", "departamento"),
+        "municipio":    _col(df, "cod_municipio"),
+        "rango_tsh":    _texto(pd.cut(tsh1.where(tsh1 > 0), CORTES_TSH,
+                                      labels=ETIQUETAS_TSH, right=False)).replace("", "pendiente"),
+        "estado":       np.select([tsh1 == 0, conf, sosp],
+                                  ["pendiente", "confirmado", "sospechoso"], "normal"),
+        "n":            1,
+        "sospechosos":  sosp.astype(int),
+        "confirmados":  conf.astype(int),
+    }, index=df.index)
+    return claves.groupby(DIMENSIONES, sort=False).sum().reset_index()
+
+
+def _path() -> str:
+    return get_almacen().path + ".agregados.json"
+
+
+def _leer(path: str) -> tuple[str | None, dict[tuple, list[int]]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None, {}
+    k = len(DIMENSIONES)
+    return data["version"], {tuple(f[:k]): f[k:] for f in data["filas"]}
+
+
+def _escribir(path: str, version: str, grupos: dict[tuple, list[int]]):
+    filas = [list(k) + v for k, v in grupos.items() if v[0] > 0]
+    escribir_atomico(path, json.dumps({"version": version, "filas": filas}, ensure_ascii=False))
+
+
+def _a_grupos(agg: pd.DataFrame) -> dict[tuple, list[int]]:
+    k = len(DIMENSIONES)
+    return {tuple(x.item() if hasattr(x, "item") else x for x in f[:k]): [int(x) for x in f[k:]]
+            for f in agg[DIMENSIONES + MEDIDAS].itertuples(index=False)}
+
+
+def reconstruir() -> pd.DataFrame:
+    """Recalcula los agregados desde el registro completo y los persiste."""
+    almacen = get_almacen()
+    path = _path()
+    with bloqueo_archivo(almacen.path):
+        version = almacen.version()
+        df = tipar_registros(almacen.leer())
+        agg = agrupar(df) if not df.empty else pd.DataFrame(columns=DIMENSIONES + MEDIDAS)
+        _escribir(path, version, _a_grupos(agg))
+    return agg
+
+
+def leer_agregados() -> pd.DataFrame:
+    """Agregados vigentes; los reconstruye si no corresponden a la versión actual."""
+    version, grupos = _leer(_path())
+    if version != get_almacen().version():
+        return reconstruir()
+    filas = [list(k) + v for k, v in grupos.items()]
+    agg = pd.DataFrame(filas, columns=DIMENSIONES + MEDIDAS)
+    agg["prematuro"] = agg["prematuro"].astype(bool)
+    return agg
+
+
+# Filtro del sidebar (utils.filtros) → dimensión de los agregados
+_DIMENSION_FILTRO = {"sexo": "sexo", "tipo_muestra": "tipo_muestra",
+                     "departamento": "departamento", "municipio": "municipio"}
+
+
+def filtrar(agg: pd.DataFrame, selecciones: dict[str, list] | None = None,
+            banderas: dict[str, bool] | None = None) -> pd.DataFrame:
+    """
+    Grupos de `agg` que cumplen los mismos `selecciones` y `banderas` que
+    MotorFiltros.mascara aplica a las filas (una lista vacía no filtra).
+    """
+    m = pd.Series(True, index=agg.index)
+    for nombre, sel in (selecciones or {}).items():
+        if not sel:
+            continue
+        if nombre == "año":
+            m &= agg["mes"].str[:4].isin([str(a) for a in sel])
+        elif nombre in _DIMENSION_FILTRO:
+            m &= agg[_DIMENSION_FILTRO[nombre]].isin(sel)
+    estado = agg["estado"]
+    for nombre, valor in (banderas or {}).items():
+        if nombre == "prematuro":
+            m &= agg["prematuro"] if valor else ~agg["prematuro"]
+        elif nombre == "sospecha":
+            sosp = estado.isin(["sospechoso", "confirmado"])
+            m &= sosp if valor else ~sosp
+        elif nombre == "confirmado":
+            m &= (estado == "confirmado") == valor
+        elif nombre == "pendiente":
+            m &= (estado == "pendiente") == valor
+    return agg[m]
+
+
+def _sumar(grupos: dict[tuple, list[int]], filas: pd.DataFrame, signo: int):
+    """Suma (o resta, signo −1) los grupos de `filas` (texto, FIELDNAMES) a `grupos`."""
+    df = tipar_registros(filas.reindex(columns=FIELDNAMES).fillna("").astype(str))
+    for k, v in _a_grupos(agrupar(df)).items():
+        actual = grupos.setdefault(k, [0] * len(MEDIDAS))
+        grupos[k] = [a + signo * d for a, d in zip(actual, v)]
+
+
+def _vigentes(path: str, version_antes: str) -> dict[tuple, list[int]] | None:
+    """Grupos persistidos si están al día con `version_antes`; si no, los descarta (None)."""
+    version, grupos = _leer(path)
+    if version != version_antes:
+        if os.path.isfile(path):
+            os.remove(path)
+        return None
+    return grupos
+
+
+def registrar_cambio(viejo: dict | None, nuevo: dict | None,
+                     version_antes: str, version_despues: str):
+    """
+    Ajusta los agregados tras escribir una fila: resta el grupo de `viejo`
+    y suma el de `nuevo`. Se llama con el bloqueo del registro tomado.
+    Si los agregados no estaban al día con `version_antes`, se descartan
+    y se reconstruirán en la próxima lectura.
+    """
+    path = _path()
+    grupos = _vigentes(path, version_antes)
+    if grupos is None:
+        return
+    for fila, signo in [(viejo, -1), (nuevo, 1)]:
+        if fila is None:
+            continue
+        fila = {c: "" if fila.get(c) is None else str(fila[c]) for c in FIELDNAMES}
+        _sumar(grupos, pd.DataFrame([fila]), signo)
+    _escribir(path, version_despues, grupos)
+
+
+def registrar_altas(filas: pd.DataFrame, version_antes: str, version_despues: str):
+    """Suma un lote de filas nuevas (una sola agrupación vectorizada). Mismo contrato que registrar_cambio."""
+    path = _path()
+    grupos = _vigentes(path, version_antes)
+    if grupos is None:
+        return
+    _sumar(grupos, filas, 1)
+    _escribir(path, version_despues, grupos)
+
+
+def registrar_cambios(viejas: pd.DataFrame, nuevas: pd.DataFrame,
+                      version_antes: str, version_despues: str):
+    """Resta `viejas` y suma `nuevas` (actualización por lote). Mismo contrato que registrar_cambio."""
+    path = _path()
+    grupos = _vigentes(path, version_antes)
+    if grupos is None:
+        return
+    _sumar(grupos, viejas, -1)
+    _sumar(grupos, nuevas, 1)
+    _escribir(path, version_despues, grupos)
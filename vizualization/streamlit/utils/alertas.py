@@ -0,0 +1,117 @@
+# utils/alertas.py
+# ─── Avisos automáticos de casos confirmados ─────────────────────────────────
+#
+# Cuando una escritura convierte un registro en caso confirmado (TSH 1ª y 2ª
+# ≥ TSH_CORTE), csv_helpers.actualizar_registros calcula aquí los avisos al
+# paciente y a la IRS (avisos_nuevos) y el almacén los guarda junto con la
+# actualización: bajo el mismo bloqueo en el CSV, en la misma transacción en
+# SQLite. No depende de que ningún proceso se haya suscrito a nada.
+#
+# despachar_avisos() los pasa después a la bandeja de SMS y los retira del
+# registro; el envío lo hace el hilo trabajador de la bandeja. Lo que quede
+# sin despachar (el proceso murió, la bandeja estaba ocupada) se despacha en
+# la próxima escritura o al abrir el Formulario o la API. La bandeja es
+# idempotente, así que un aviso ya encolado (p. ej. desde Alertas con la misma
+# plantilla) no se repite.
+
+import logging
+
+import pandas as pd
+
+from utils.almacen import get_almacen
+from utils.archivos import bloqueo_archivo
+from utils.bandeja import get_bandeja
+from utils.constantes import (
+    PLANTILLA_SMS_IRS, PLANTILLA_SMS_PACIENTE, SMS_SIMULADO, SMS_TELEFONO_IRS, TSH_CORTE,
+)
+from utils.sms import proveedor_configurado
+
+_log = logging.getLogger(__name__)
+
+
+def _tsh(valor) -> float:
+    try:
+        return float(str(valor).replace(",", "."))
+    except ValueError:
+        return 0.0
+
+
+def es_confirmado(fila: dict | None) -> bool:
+    return bool(fila) and _tsh(fila.get("tsh_neonatal")) >= TSH_CORTE \
+        and _tsh(fila.get("resultado_muestra_2")) >= TSH_CORTE
+
+
+def confirmados(df: pd.DataFrame) -> pd.Series:
+    """es_confirmado por columnas sobre el registro como texto (listados de la API)."""
+    def tsh(col: str) -> pd.Series:
+        return pd.to_numeric(df[col].astype(str).str.replace(",", ".", regex=False),
+                             errors="coerce").fillna(0)
+    return (tsh("tsh_neonatal") >= TSH_CORTE) & (tsh("resultado_muestra_2") >= TSH_CORTE)
+
+
+def avisos_caso(fila: dict, telefono_irs: str = SMS_TELEFONO_IRS) -> list[dict]:
+    """Mensajes para la bandeja: paciente (telefono_1 o telefono_2) e IRS, si hay teléfono."""
+    tsh = str(fila.get("resultado_muestra_2", ""))
+    ars = fila.get("ars") or "su EPS"
+    tel = next((t.strip() for t in (fila.get("telefono_1", ""), fila.get("telefono_2", ""))
+                if str(t).strip() not in ("", "0")), "")
+    avisos = []
+    for destino, telefono, plantilla in [("Paciente", tel, PLANTILLA_SMS_PACIENTE),
+                                         ("IRS", telefono_irs, PLANTILLA_SMS_IRS)]:
+        if telefono:
+            avisos.append({"id_caso": fila["id"], "destino": destino, "telefono": telefono,
+                           "plantilla": plantilla,
+                           "mensaje": plantilla.replace("{tsh}", tsh).replace("{ars}", ars)})
+    return avisos
+
+
+# Banner de Formulario y Alertas mientras los avisos automáticos son simulados
+AVISO_SIMULADOS = ("**Avisos automáticos en modo de prueba:** los SMS de casos confirmados se "
+                   "registran como SIMULADOS y no llegan a pacientes ni a la IRS. Configura el "
+                   "proveedor (st.secrets['twilio'] o SMS_URL) o define SMS_SIMULADO=0.")
+
+
+def avisos_simulados() -> bool:
+    """Modo de los avisos automáticos: SMS_SIMULADO si está definido; si no, simulados sin proveedor."""
+    return SMS_SIMULADO if SMS_SIMULADO is not None else not proveedor_configurado()
+
+
+def avisos_nuevos(viejos: dict[str, dict], nuevos: dict[str, dict]) -> list[dict]:
+    """
+    Avisos de las filas {id: fila} que la escritura acaba de confirmar, cada
+    uno con el modo (`simulado`) vigente al momento de guardar.
+    """
+    avisos = [a for i, nuevo in nuevos.items()
+              if es_confirmado(nuevo) and not es_confirmado(viejos.get(i))
+              for a in avisos_caso(nuevo)]
+    if avisos:
+        simulado = avisos_simulados()
+        for a in avisos:
+            a["simulado"] = simulado
+    return avisos
+
+
+def despachar_avisos() -> int:
+    """
+    Pasa a la bandeja los avisos guardados con las escrituras y los retira del
+    registro. Descarta los de casos que ya no están confirmados (una escritura
+    del CSV interrumpida entre el aviso y el delta). Retorna cuántos encoló.
+    Un error se registra en el log y los avisos quedan para el próximo despacho.
+    """
+    almacen = get_almacen()
+    try:
+        if not almacen.avisos_pendientes():
+            return 0
+        with bloqueo_archivo(almacen.path):
+            pendientes = almacen.avisos_pendientes()
+            filas = almacen.obtener_registros({a["id_caso"] for _, a in pendientes})
+            vigentes = [a for _, a in pendientes if es_confirmado(filas.get(str(a["id_caso"])))]
+            for simulado in (True, False):
+                parte = [a for a in vigentes if a["simulado"] is simulado]
+                if parte:
+                    get_bandeja().encolar(parte, simulado)
+            almacen.quitar_avisos([clave for clave, _ in pendientes])
+        return len(vigentes)
+    except Exception:
+        _log.exception("No se pudieron despachar los avisos; quedan para el próximo despacho")
+        return 0
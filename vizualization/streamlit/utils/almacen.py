@@ -0,0 +1,610 @@
+# utils/almacen.py
+# ─── Backends de almacenamiento del registro (CSV / SQLite) ───────────────────
+#
+# csv_helpers expone siempre las mismas funciones; aquí vive la implementación
+# concreta. El backend activo se elige con ALMACEN_REGISTROS ("csv" o "sqlite").
+#
+# Importar el CSV existente a SQLite (una sola vez), desde vizualization/streamlit:
+#     python -m utils.almacen importar
+# Compactar el journal de actualizaciones del CSV:
+#     python -m utils.almacen compactar
+
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+import pandas as pd
+
+from utils.archivos import bloqueo_archivo, escribir_atomico
+from utils.constantes import ALMACEN_REGISTROS, CSV_REGISTROS, DB_REGISTROS, FIELDNAMES
+
+# Columnas con índice en SQLite (id ya es la clave primaria)
+COLUMNAS_INDEXADAS = ["ficha_id", "ficha_id_2", "numero_documento"]
+
+
+def _version_archivos(*paths: str) -> str:
+    partes = []
+    for p in paths:
+        try:
+            st_ = os.stat(p)
+            partes.append(f"{st_.st_mtime_ns}:{st_.st_size}")
+        except FileNotFoundError:
+            partes.append("-")
+    return "|".join(partes)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CSV
+# ══════════════════════════════════════════════════════════════════════════════
+
+class AlmacenCSV:
+    """
+    Registro en un único CSV. Cada lectura recorre el archivo completo.
+    Los ids salen de "<csv>.seq", protegido con bloqueo de archivo.
+
+    Las actualizaciones no reescriben el CSV: se agregan como deltas JSON a
+    "<csv>.journal" y los lectores combinan base + journal. compactar() los
+    incorpora al CSV con un reemplazo atómico (automático al superar
+    MAX_JOURNAL_BYTES).
+
+    Los avisos que una actualización debe generar (utils.alertas) se agregan a
+    "<csv>.avisos" bajo el mismo bloqueo, justo antes del delta: si el proceso
+    muere entre los dos, queda un aviso de más que el despacho descarta al
+    ver que el caso no está confirmado, nunca una confirmación sin aviso.
+
+    obtener_registros y buscar_por_ficha no recorren el CSV: usan un índice
+    id → byte de inicio de la fila (y ficha_id → ids), propio de cada proceso,
+    que solo lee lo agregado al final del archivo y se reconstruye cuando el
+    archivo se reemplaza (compactar).
+    """
+
+    MAX_JOURNAL_BYTES = 256 * 1024
+
+    def __init__(self, path: str = CSV_REGISTROS):
+        self.path         = path
+        self.path_seq     = path + ".seq"
+        self.path_journal = path + ".journal"
+        self.path_avisos  = path + ".avisos"
+        self._posiciones: dict | None = None
+        self._lock_posiciones = threading.Lock()
+
+    def version(self) -> str:
+        """Token que cambia con cada escritura (mtime + tamaño de base y journal)."""
+        return _version_archivos(self.path, self.path_journal)
+
+    def _leer_base(self) -> pd.DataFrame:
+        if not os.path.isfile(self.path):
+            return pd.DataFrame(columns=FIELDNAMES)
+        return pd.read_csv(self.path, dtype=str)
+
+    @staticmethod
+    def _leer_lineas(path: str) -> list[dict]:
+        """Objetos de un archivo JSON por línea; ignora una línea truncada."""
+        objetos = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        objetos.append(json.loads(linea))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return objetos
+
+    @staticmethod
+    def _agregar_lineas(path: str, lineas: list[str]) -> int:
+        """Agrega `lineas` en una sola escritura sincronizada. Retorna el tamaño final."""
+        texto = "\n".join(lineas) + "\n"
+        with open(path, "a+b") as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":    # última línea truncada por un corte previo
+                    texto = "\n" + texto
+            f.write(texto.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def _leer_journal(self) -> dict[str, dict]:
+        """Deltas acumulados {id: {col: valor}}; el último gana. Ignora una línea truncada."""
+        deltas: dict[str, dict] = {}
+        for d in self._leer_lineas(self.path_journal):
+            deltas.setdefault(str(d["id"]), {}).update(d["campos"])
+        return deltas
+
+    def leer(self) -> pd.DataFrame:
+        """Todas las filas como texto (base + journal); los vacíos quedan como NaN."""
+        df = self._leer_base()
+        deltas = self._leer_journal()
+        if df.empty or not deltas:
+            return df
+        upd = pd.DataFrame.from_dict(deltas, orient="index")
+        upd = upd[[c for c in upd.columns if c in df.columns and c != "id"]]
+        df.index = df["id"]
+        df.update(upd)
+        return df.reset_index(drop=True)
+
+    def _max_id(self) -> int:
+        """Mayor id presente en el CSV (recorrido completo, solo para reconstruir .seq)."""
+        if not os.path.isfile(self.path):
+            return 0
+        with open(self.path, encoding="utf-8") as f:
+            ids = [r.get("id", "") for r in csv.DictReader(f)]
+        try:
+            return max((int(float(i)) for i in ids if i), default=0)
+        except ValueError:
+            return len(ids)
+
+    def reservar_ids(self, n: int) -> int:
+        """Reserva `n` ids consecutivos en O(1) y retorna el primero."""
+        with bloqueo_archivo(self.path):
+            try:
+                with open(self.path_seq, encoding="utf-8") as f:
+                    ultimo = int(f.read().strip())
+            except (FileNotFoundError, ValueError):
+                ultimo = self._max_id()
+            escribir_atomico(self.path_seq, str(ultimo + n))
+        return ultimo + 1
+
+    def next_id(self) -> int:
+        """Reserva y retorna el siguiente id en O(1); dos llamadas nunca repiten id."""
+        return self.reservar_ids(1)
+
+    def guardar(self, row: dict):
+        with bloqueo_archivo(self.path):
+            existe = os.path.isfile(self.path)
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                if not existe:
+                    w.writeheader()
+                w.writerow(row)
+
+    def guardar_registros(self, df: pd.DataFrame):
+        """Agrega muchas filas (texto, columnas FIELDNAMES) en una sola escritura sincronizada."""
+        texto = df.reindex(columns=FIELDNAMES).to_csv(index=False, header=False)
+        with bloqueo_archivo(self.path):
+            existe = os.path.isfile(self.path)
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                if not existe:
+                    f.write(",".join(FIELDNAMES) + "\n")
+                f.write(texto)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def fichas(self) -> set[str]:
+        """Conjunto de ficha_id ya registrados (solo lee esa columna y el journal)."""
+        if not os.path.isfile(self.path):
+            return set()
+        fichas = pd.read_csv(self.path, dtype=str, usecols=["ficha_id"])["ficha_id"]
+        extra = {d["ficha_id"] for d in self._leer_journal().values() if "ficha_id" in d}
+        return {f.strip() for f in fichas.dropna()} | {f.strip() for f in extra}
+
+    def actualizar(self, id_registro: int, campos: dict):
+        """Agrega un delta al journal (costo constante, sincronizado a disco)."""
+        self.actualizar_registros({id_registro: campos})
+
+    def actualizar_registros(self, cambios: dict[int, dict], avisos: list[dict] | None = None):
+        """
+        Agrega un delta por fila {id: campos} al journal en una sola escritura
+        sincronizada; antes, bajo el mismo bloqueo, los `avisos` a "<csv>.avisos".
+        """
+        lineas = []
+        for id_registro, campos in cambios.items():
+            campos = {c: str(v) for c, v in campos.items() if c in FIELDNAMES and c != "id"}
+            if campos:
+                lineas.append(json.dumps({"id": str(id_registro), "campos": campos}, ensure_ascii=False))
+        if not lineas:
+            return
+        with bloqueo_archivo(self.path):
+            if avisos:
+                self._agregar_lineas(self.path_avisos,
+                                     [json.dumps(a, ensure_ascii=False) for a in avisos])
+            if self._agregar_lineas(self.path_journal, lineas) > self.MAX_JOURNAL_BYTES:
+                self.compactar()
+
+    def avisos_pendientes(self) -> list[tuple[int, dict]]:
+        """Avisos escritos por actualizar_registros aún sin despachar: (clave, aviso)."""
+        return list(enumerate(self._leer_lineas(self.path_avisos)))
+
+    def quitar_avisos(self, claves: list[int]):
+        """Retira los avisos ya despachados (llamar bajo el bloqueo del registro, como el despacho)."""
+        quitar = set(claves)
+        with bloqueo_archivo(self.path):
+            quedan = [a for i, a in self.avisos_pendientes() if i not in quitar]
+            if quedan:
+                escribir_atomico(self.path_avisos,
+                                 "".join(json.dumps(a, ensure_ascii=False) + "\n" for a in quedan))
+            elif os.path.isfile(self.path_avisos):
+                os.remove(self.path_avisos)
+
+    def compactar(self):
+        """Incorpora el journal al CSV base. Si se interrumpe, el journal sigue siendo válido."""
+        with bloqueo_archivo(self.path):
+            if not os.path.isfile(self.path_journal):
+                return
+            df = self.leer()
+            if os.path.isfile(self.path):
+                escribir_atomico(self.path, df.to_csv(index=False))
+            os.remove(self.path_journal)
+
+    def obtener(self, id_registro: int) -> dict | None:
+        """Fila con el id dado como dict de texto (recorre el archivo)."""
+        return self.obtener_registros([id_registro]).get(str(id_registro))
+
+    @staticmethod
+    def _leer_fila(f, inicio: int) -> bytes:
+        """Bytes de la fila que empieza en `inicio` (incluye saltos de línea entre comillas)."""
+        f.seek(inicio)
+        partes, comillas = [], 0
+        for linea in f:
+            partes.append(linea)
+            comillas += linea.count(b'"')
+            if comillas % 2 == 0:
+                break
+        return b"".join(partes)
+
+    @staticmethod
+    def _id_fila(fila: bytes) -> str:
+        return fila.split(b",", 1)[0].strip().strip(b'"').decode("utf-8")
+
+    @staticmethod
+    def _columna_fila(fila: bytes, k: int) -> str:
+        """Valor de la columna `k` de una fila CSV completa ("" si no la tiene)."""
+        campos = next(csv.reader(io.StringIO(fila.decode("utf-8"))), [])
+        return campos[k] if k < len(campos) else ""
+
+    def _indice_posiciones(self, reconstruir: bool = False) -> tuple[bytes, dict[str, int]]:
+        """
+        (encabezado, {id: byte de inicio de su fila}) del CSV base. Mientras el
+        archivo solo crece se leen únicamente las filas nuevas; otro inodo o un
+        tamaño menor (compactar) lo reconstruye. Solo indexa filas completas.
+        De paso mantiene p["fichas"] {ficha_id: [ids en orden del archivo]}.
+        """
+        with self._lock_posiciones:
+            try:
+                st_ = os.stat(self.path)
+            except FileNotFoundError:
+                self._posiciones = None
+                return b"", {}
+            p = self._posiciones
+            if reconstruir or p is None or p["inodo"] != (st_.st_dev, st_.st_ino) \
+                    or st_.st_size < p["tamano"]:
+                p = {"inodo": (st_.st_dev, st_.st_ino), "tamano": 0, "encabezado": b"",
+                     "filas": {}, "fichas": {}, "col_ficha": None}
+            if st_.st_size > p["tamano"]:
+                with open(self.path, "rb") as f:
+                    if p["tamano"] == 0:
+                        p["encabezado"] = f.readline()
+                        p["tamano"] = f.tell()
+                        columnas = next(csv.reader([p["encabezado"].decode("utf-8-sig")]), [])
+                        if "ficha_id" in columnas:
+                            p["col_ficha"] = columnas.index("ficha_id")
+                    f.seek(p["tamano"])
+                    pos = inicio = p["tamano"]
+                    partes, comillas = [], 0
+                    for linea in f:
+                        if not linea.endswith(b"\n"):      # fila a medio escribir
+                            break
+                        pos += len(linea)
+                        partes.append(linea)
+                        comillas += linea.count(b'"')
+                        if comillas % 2 == 0:
+                            fila = b"".join(partes)
+                            id_fila = self._id_fila(fila)
+                            p["filas"][id_fila] = inicio
+                            if p["col_ficha"] is not None:
+                                ficha = self._columna_fila(fila, p["col_ficha"]).strip()
+                                if ficha:
+                                    p["fichas"].setdefault(ficha, []).append(id_fila)
+                            inicio, partes, comillas = pos, [], 0
+                    p["tamano"] = inicio
+            self._posiciones = p
+            return p["encabezado"], p["filas"]
+
+    def obtener_registros(self, ids) -> dict[str, dict]:
+        """{id: fila como dict de texto} de los ids dados (acceso directo, sin recorrer el CSV)."""
+        ids = [str(i) for i in ids]
+        for reconstruir in (False, True):
+            encabezado, posiciones = self._indice_posiciones(reconstruir)
+            if not encabezado:
+                return {}
+            filas, valido = [], True
+            with open(self.path, "rb") as f:
+                for i in ids:
+                    if i in posiciones:
+                        fila = self._leer_fila(f, posiciones[i])
+                        if self._id_fila(fila) != i:          # el archivo cambió bajo el índice
+                            valido = False
+                            break
+                        filas.append(fila)
+            if valido:
+                break
+        if not filas:
+            return {}
+        # Mismo parser que leer() para que los valores coincidan exactamente
+        df = pd.read_csv(io.BytesIO(encabezado + b"".join(filas)), dtype=str)
+        deltas = self._leer_journal()
+        out = {}
+        for r in df.to_dict("records"):
+            r.update({c: v for c, v in deltas.get(r["id"], {}).items() if c in r and c != "id"})
+            out[r["id"]] = {c: "" if pd.isna(v) else v for c, v in r.items()}
+        return out
+
+    def buscar_por_ficha(self, ficha: str) -> pd.Series | None:
+        """
+        Primera fila (en orden del archivo) con ese ficha_id, sin recorrer el
+        CSV: candidatos del índice más los ids cuyo ficha_id cambió en el journal.
+        """
+        ficha = ficha.strip()
+        if not ficha:
+            return None
+        for reconstruir in (False, True):
+            _, posiciones = self._indice_posiciones(reconstruir)
+            p = self._posiciones or {}
+            candidatos = list(p.get("fichas", {}).get(ficha, []))
+            candidatos += [i for i, d in self._leer_journal().items()
+                           if str(d.get("ficha_id", "")).strip() == ficha]
+            filas = self.obtener_registros(dict.fromkeys(candidatos))
+            coinciden = [i for i in dict.fromkeys(candidatos)
+                         if i in filas and filas[i]["ficha_id"].strip() == ficha]
+            if coinciden:
+                i = min(coinciden, key=lambda i: posiciones.get(i, float("inf")))
+                return pd.Series(filas[i])
+            try:
+                st_ = os.stat(self.path)
+            except FileNotFoundError:
+                return None
+            if (st_.st_dev, st_.st_ino) == p.get("inodo"):  # sin compactar entre índice y journal
+                return None
+        return None
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SQLITE
+# ══════════════════════════════════════════════════════════════════════════════
+
+class AlmacenSQLite:
+    """
+    Registro en SQLite con índices sobre id, ficha_id, ficha_id_2 y
+    numero_documento: búsquedas y actualizaciones en O(log n).
+    Todas las columnas (salvo id) se guardan como TEXT, igual que en el CSV.
+    Los ids salen de la tabla `secuencias`, incrementada dentro de una transacción.
+    Los avisos de una actualización (utils.alertas) se insertan en la tabla
+    `avisos` dentro de la misma transacción que el UPDATE.
+    """
+
+    def __init__(self, path: str = DB_REGISTROS):
+        self.path = path
+        self._crear_esquema()
+
+    @contextmanager
+    def conexion(self):
+        """Conexión nueva por operación (Streamlit ejecuta cada sesión en su hilo)."""
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _crear_esquema(self):
+        columnas = ",\n".join(f'    "{c}" TEXT' for c in FIELDNAMES if c != "id")
+        with self.conexion() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(f"CREATE TABLE IF NOT EXISTS registros (\n"
+                        f"    id INTEGER PRIMARY KEY,\n{columnas}\n)")
+            for c in COLUMNAS_INDEXADAS:
+                con.execute(f'CREATE INDEX IF NOT EXISTS ix_registros_{c} ON registros("{c}")')
+            con.execute("CREATE TABLE IF NOT EXISTS secuencias ("
+                        "nombre TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+            con.execute("CREATE TABLE IF NOT EXISTS avisos ("
+                        "id INTEGER PRIMARY KEY AUTOINCREMENT, aviso TEXT NOT NULL)")
+
+    def version(self) -> str:
+        """Token que cambia con cada escritura (contador en `secuencias`)."""
+        with self.conexion() as con:
+            r = con.execute("SELECT valor FROM secuencias WHERE nombre = 'version'").fetchone()
+        return f"sqlite:{r[0] if r else 0}"
+
+    @staticmethod
+    def _tocar_version(con: sqlite3.Connection):
+        """Incrementa el contador de versión dentro de la transacción de escritura."""
+        con.execute("INSERT INTO secuencias (nombre, valor) VALUES ('version', 1) "
+                    "ON CONFLICT(nombre) DO UPDATE SET valor = valor + 1")
+
+    @staticmethod
+    def _fila(row: dict) -> list:
+        """Valores en el orden de FIELDNAMES; None para los vacíos."""
+        vals = []
+        for c in FIELDNAMES:
+            v = row.get(c, "")
+            if c == "id":
+                vals.append(int(v))
+            else:
+                vals.append(None if v is None or str(v) == "" else str(v))
+        return vals
+
+    def leer(self) -> pd.DataFrame:
+        cols = ", ".join(f'"{c}"' for c in FIELDNAMES)
+        with self.conexion() as con:
+            return pd.read_sql_query(f"SELECT {cols} FROM registros ORDER BY id", con, dtype=str)
+
+    def reservar_ids(self, n: int) -> int:
+        """Reserva `n` ids consecutivos y retorna el primero; la primera vez parte de MAX(id)."""
+        with self.conexion() as con:
+            con.execute(
+                "INSERT INTO secuencias (nombre, valor) "
+                "VALUES ('registros', (SELECT COALESCE(MAX(id), 0) + ? FROM registros)) "
+                "ON CONFLICT(nombre) DO UPDATE SET valor = valor + ?",
+                (n, n),
+            )
+            ultimo = con.execute(
+                "SELECT valor FROM secuencias WHERE nombre = 'registros'").fetchone()[0]
+        return ultimo - n + 1
+
+    def next_id(self) -> int:
+        """Reserva y retorna el siguiente id."""
+        return self.reservar_ids(1)
+
+    def guardar(self, row: dict):
+        marcas = ", ".join("?" for _ in FIELDNAMES)
+        with self.conexion() as con:
+            con.execute(f"INSERT INTO registros VALUES ({marcas})", self._fila(row))
+            self._tocar_version(con)
+
+    def guardar_registros(self, df: pd.DataFrame):
+        """Inserta muchas filas (texto, columnas FIELDNAMES) en una sola transacción."""
+        marcas = ", ".join("?" for _ in FIELDNAMES)
+        d = df.reindex(columns=FIELDNAMES).astype(object)
+        d = d.where(d.notna() & (d != ""), None)           # vacío → NULL, como _fila
+        d["id"] = d["id"].astype(int)
+        with self.conexion() as con:
+            con.executemany(f"INSERT INTO registros VALUES ({marcas})",
+                            d.itertuples(index=False, name=None))
+            self._tocar_version(con)
+
+    def fichas(self) -> set[str]:
+        """Conjunto de ficha_id ya registrados (recorre el índice de ficha_id)."""
+        with self.conexion() as con:
+            return {r[0] for r in con.execute(
+                "SELECT ficha_id FROM registros WHERE ficha_id IS NOT NULL")}
+
+    def actualizar(self, id_registro: int, campos: dict):
+        self.actualizar_registros({id_registro: campos})
+
+    def actualizar_registros(self, cambios: dict[int, dict], avisos: list[dict] | None = None):
+        """
+        Aplica {id: campos} en una sola transacción (un solo incremento de
+        versión), junto con la inserción de los `avisos`.
+        """
+        sentencias = []
+        for id_registro, campos in cambios.items():
+            campos = {c: v for c, v in campos.items() if c in FIELDNAMES and c != "id"}
+            if campos:
+                asignaciones = ", ".join(f'"{c}" = ?' for c in campos)
+                sentencias.append((f"UPDATE registros SET {asignaciones} WHERE id = ?",
+                                   [str(v) for v in campos.values()] + [int(id_registro)]))
+        if not sentencias:
+            return
+        with self.conexion() as con:
+            for sql, valores in sentencias:
+                con.execute(sql, valores)
+            if avisos:
+                con.executemany("INSERT INTO avisos (aviso) VALUES (?)",
+                                [(json.dumps(a, ensure_ascii=False),) for a in avisos])
+            self._tocar_version(con)
+
+    def avisos_pendientes(self) -> list[tuple[int, dict]]:
+        """Avisos escritos por actualizar_registros aún sin despachar: (clave, aviso)."""
+        with self.conexion() as con:
+            return [(i, json.loads(a)) for i, a in con.execute("SELECT id, aviso FROM avisos ORDER BY id")]
+
+    def quitar_avisos(self, claves: list[int]):
+        """Retira los avisos ya despachados."""
+        with self.conexion() as con:
+            con.executemany("DELETE FROM avisos WHERE id = ?", [(int(i),) for i in claves])
+
+    def obtener(self, id_registro: int) -> dict | None:
+        cols = ", ".join(f'"{c}"' for c in FIELDNAMES)
+        with self.conexion() as con:
+            r = con.execute(f"SELECT {cols} FROM registros WHERE id = ?",
+                            (int(id_registro),)).fetchone()
+        if r is None:
+            return None
+        return {c: "" if v is None else str(v) for c, v in zip(FIELDNAMES, r)}
+
+    def obtener_registros(self, ids) -> dict[str, dict]:
+        """{id: fila como dict de texto} de los ids dados (por la clave primaria)."""
+        ids = [int(i) for i in ids]
+        cols = ", ".join(f'"{c}"' for c in FIELDNAMES)
+        filas = {}
+        with self.conexion() as con:
+            for i in range(0, len(ids), 900):                 # límite de parámetros de SQLite
+                parte = ids[i:i + 900]
+                marcas = ", ".join("?" for _ in parte)
+                for r in con.execute(f"SELECT {cols} FROM registros WHERE id IN ({marcas})", parte):
+                    fila = {c: "" if v is None else str(v) for c, v in zip(FIELDNAMES, r)}
+                    filas[fila["id"]] = fila
+        return filas
+
+    def buscar_por_ficha(self, ficha: str) -> pd.Series | None:
+        cols = ", ".join(f'"{c}"' for c in FIELDNAMES)
+        with self.conexion() as con:
+            r = con.execute(f"SELECT {cols} FROM registros WHERE ficha_id = ? LIMIT 1",
+                            (ficha.strip(),)).fetchone()
+        if r is None:
+            return None
+        return pd.Series(["" if v is None else str(v) for v in r], index=FIELDNAMES)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SELECCIÓN E IMPORTACIÓN
+# ══════════════════════════════════════════════════════════════════════════════
+
+@lru_cache(maxsize=1)
+def get_almacen() -> AlmacenCSV | AlmacenSQLite:
+    """Backend activo según ALMACEN_REGISTROS (una instancia por proceso)."""
+    if ALMACEN_REGISTROS == "sqlite":
+        return AlmacenSQLite()
+    if ALMACEN_REGISTROS != "csv":
+        raise ValueError(f"ALMACEN_REGISTROS desconocido: {ALMACEN_REGISTROS!r}")
+    return AlmacenCSV()
+
+
+def importar_csv(origen: str = CSV_REGISTROS, destino: str = DB_REGISTROS,
+                 lote: int = 5000) -> int:
+    """
+    Copia el CSV de registros a SQLite en una sola transacción, con los avisos
+    aún sin despachar. Reejecutarlo es seguro: las filas con el mismo id se
+    reemplazan. Retorna el número de filas importadas.
+    """
+    almacen_csv = AlmacenCSV(origen)
+    almacen_csv.compactar()
+    avisos = almacen_csv.avisos_pendientes()
+    db = AlmacenSQLite(destino)
+    marcas = ", ".join("?" for _ in FIELDNAMES)
+    sql = f"INSERT OR REPLACE INTO registros VALUES ({marcas})"
+    total = 0
+    with open(origen, encoding="utf-8") as f, db.conexion() as con:
+        buffer = []
+        for row in csv.DictReader(f):
+            row["ficha_id"] = (row.get("ficha_id") or "").strip()
+            buffer.append(db._fila(row))
+            if len(buffer) >= lote:
+                con.executemany(sql, buffer)
+                total += len(buffer)
+                buffer.clear()
+        con.executemany(sql, buffer)
+        total += len(buffer)
+        # La secuencia se reconstruye desde MAX(id) en el próximo next_id()
+        con.execute("DELETE FROM secuencias WHERE nombre = 'registros'")
+        con.executemany("INSERT INTO avisos (aviso) VALUES (?)",
+                        [(json.dumps(a, ensure_ascii=False),) for _, a in avisos])
+        db._tocar_version(con)
+    almacen_csv.quitar_avisos([i for i, _ in avisos])
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Utilidades del almacén de registros")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("importar", help="Importa el CSV de registros a SQLite")
+    imp.add_argument("--csv", default=CSV_REGISTROS)
+    imp.add_argument("--db",  default=DB_REGISTROS)
+    com = sub.add_parser("compactar", help="Incorpora el journal de actualizaciones al CSV")
+    com.add_argument("--csv", default=CSV_REGISTROS)
+    args = parser.parse_args()
+
+    if args.cmd == "importar":
+        n = importar_csv(args.csv, args.db)
+        print(f"{n} registros importados a {args.db}")
+    elif args.cmd == "compactar":
+        AlmacenCSV(args.csv).compactar()
+        print(f"Journal incorporado a {args.csv}")
@@ -0,0 +1,324 @@
+# utils/api.py
+# ─── API JSON del registro para integraciones (LIS, secretaría de salud) ─────
+#
+# Desde vizualization/streamlit:
+#     python -m utils.api                                  # http://127.0.0.1:8600
+#     API_TOKEN=secreto python -m utils.api --host 0.0.0.0
+#
+# Proceso aparte de Streamlit (http.server de la biblioteca estándar, un hilo
+# por conexión) sobre las mismas funciones que usan las páginas: csv_helpers
+# (bloqueo y concurrencia optimista), importar (validación por lote),
+# resultados (conciliación) y alertas (un caso que queda confirmado encola
+# sus SMS).
+#
+#   GET  /salud                           versión del registro
+#   GET  /registros                       listado paginado
+#   GET  /registros/ficha/<ficha>         registros con esa ficha (1ª o 2ª muestra)
+#   GET  /confirmados                     casos confirmados, paginado
+#   GET  /agregados?por=departamento,mes  n / sospechosos / confirmados por grupo
+#   POST /registros                       alta en lote (como utils.importar)
+#   POST /resultados                      resultados en lote {ficha, tsh, fecha}
+#                                         (como utils.resultados)
+#
+# Los POST reciben un arreglo JSON o JSON-lines (Content-Type
+# application/x-ndjson) y aceptan ?simular=1; /resultados también
+# ?sobrescribir=1. En la respuesta, `posicion` es el índice de la fila en
+# el cuerpo enviado.
+#
+# Listados: ?pagina=1&por_pagina=100 (hasta API_MAX_POR_PAGINA) o, para
+# sincronizar, ?despues_de=<id> (ids mayores, en orden). Con ?formato=jsonl
+# o Accept: application/x-ndjson se envía todo el resultado como una fila
+# JSON por línea, por bloques (Transfer-Encoding: chunked).
+#
+# Con API_TOKEN definido se exige "Authorization: Bearer <token>".
+
+import argparse
+import hmac
+import json
+import logging
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from utils.agregados import DIMENSIONES, MEDIDAS, leer_agregados
+from utils.alertas import confirmados, despachar_avisos
+from utils.busqueda import IndiceBusqueda
+from utils.constantes import (
+    API_MAX_BYTES, API_MAX_POR_PAGINA, API_POR_PAGINA, API_PUERTO, API_TOKEN,
+)
+from utils.csv_helpers import ConflictoConcurrencia, leer_registros, version_registros
+from utils.importar import importar_bloques
+from utils.resultados import cargar_resultados
+
+_log = logging.getLogger(__name__)
+
+BLOQUE_JSONL = 2000                    # filas por fragmento en las respuestas JSON-lines
+TIPOS_JSONL = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+
+
+class ErrorAPI(Exception):
+    """Error con código HTTP: se responde {"error": mensaje}."""
+
+    def __init__(self, estado: int, mensaje: str):
+        self.estado = estado
+        super().__init__(mensaje)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DATOS (una copia por proceso y versión del registro)
+# ══════════════════════════════════════════════════════════════════════════════
+
+@lru_cache(maxsize=1)
+def _registros(version: str) -> pd.DataFrame:
+    """Registro como texto, con id numérico (`_id`) y la marca de caso confirmado."""
+    df = leer_registros()
+    df["_id"] = pd.to_numeric(df["id"], errors="coerce")
+    df["_confirmado"] = confirmados(df) if not df.empty else False
+    return df
+
+
+@lru_cache(maxsize=1)
+def _indice(version: str) -> IndiceBusqueda:
+    return IndiceBusqueda(_registros(version))
+
+
+def _publicas(df: pd.DataFrame) -> pd.DataFrame:
+    return df[[c for c in df.columns if not c.startswith("_")]]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CONSULTAS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _entero(consulta: dict, nombre: str, defecto: int, minimo: int = 1, maximo: int | None = None) -> int:
+    try:
+        v = int(consulta.get(nombre, defecto))
+    except ValueError:
+        raise ErrorAPI(400, f"{nombre} debe ser un entero")
+    if v < minimo or (maximo is not None and v > maximo):
+        raise ErrorAPI(400, f"{nombre} fuera de rango ({minimo}–{maximo or '∞'})")
+    return v
+
+
+def _bandera(consulta: dict, nombre: str) -> bool:
+    return consulta.get(nombre, "0").lower() in ("1", "true", "si", "sí")
+
+
+def listado(df: pd.DataFrame, consulta: dict, jsonl: bool):
+    """
+    Página {"total", "pagina", "por_pagina", "registros"} de `df` o, con
+    `jsonl`, el DataFrame completo para enviarlo por bloques.
+    `despues_de` filtra ids mayores (df debe traer `_id`).
+    """
+    if "despues_de" in consulta:
+        desde = _entero(consulta, "despues_de", 0, minimo=0)
+        df = df[df["_id"] > desde].sort_values("_id", kind="stable")
+    if jsonl:
+        return df
+    por_pagina = _entero(consulta, "por_pagina", API_POR_PAGINA, maximo=API_MAX_POR_PAGINA)
+    pagina = _entero(consulta, "pagina", 1)
+    inicio = (pagina - 1) * por_pagina
+    return {"total": len(df), "pagina": pagina, "por_pagina": por_pagina,
+            "registros": _filas(df.iloc[inicio:inicio + por_pagina])}
+
+
+def _filas(df: pd.DataFrame) -> list[dict]:
+    return json.loads(_publicas(df).to_json(orient="records", force_ascii=False))
+
+
+def agregados(consulta: dict) -> pd.DataFrame:
+    """Suma de MEDIDAS por las dimensiones de ?por= (sin `por`: el total)."""
+    por = [c for c in consulta.get("por", "").split(",") if c]
+    desconocidas = set(por) - set(DIMENSIONES)
+    if desconocidas:
+        raise ErrorAPI(400, f"Dimensiones desconocidas: {', '.join(sorted(desconocidas))} "
+                            f"(disponibles: {', '.join(DIMENSIONES)})")
+    agg = leer_agregados()
+    if not por:
+        return pd.DataFrame([agg[MEDIDAS].sum().astype(int).to_dict()])
+    return agg.groupby(por, sort=True)[MEDIDAS].sum().reset_index()
+
+
+def leer_cuerpo(cuerpo: bytes, tipo: str) -> pd.DataFrame:
+    """Arreglo JSON de objetos o JSON-lines → DataFrame (ValueError si no)."""
+    texto = cuerpo.decode("utf-8-sig")
+    if any(t in tipo for t in TIPOS_JSONL):
+        filas = [json.loads(linea) for linea in texto.splitlines() if linea.strip()]
+    else:
+        filas = json.loads(texto or "[]")
+    if not isinstance(filas, list) or not all(isinstance(f, dict) for f in filas):
+        raise ValueError("El cuerpo debe ser un arreglo de objetos JSON (o JSON-lines)")
+    return pd.DataFrame(filas, dtype=object)
+
+
+def crear_registros(df: pd.DataFrame, simular: bool) -> dict:
+    """POST /registros: importar_bloques sobre las filas recibidas."""
+    if df.empty:
+        return {"resumen": {"leidas": 0, "importadas": 0}, "rechazadas": []}
+    resumen, rechazadas = importar_bloques([df], simular=simular)
+    if not rechazadas.empty:
+        rechazadas = pd.DataFrame({"posicion": rechazadas["fila"] - 2,
+                                   "ficha_id": rechazadas["ficha_id"],
+                                   "motivo": rechazadas["motivo"]})
+    return {"resumen": resumen, "rechazadas": _filas(rechazadas)}
+
+
+def cargar(df: pd.DataFrame, simular: bool, sobrescribir: bool) -> dict:
+    """POST /resultados: cargar_resultados sobre las filas recibidas."""
+    if df.empty:
+        return {"resumen": {"filas": 0}, "reporte": []}
+    reporte, resumen = cargar_resultados(df, simular=simular, sobrescribir=sobrescribir)
+    reporte = reporte.rename(columns={"fila": "posicion"})
+    reporte["posicion"] -= 2
+    return {"resumen": resumen, "reporte": _filas(reporte)}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# HTTP
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _json(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False,
+                      default=lambda o: o.item() if hasattr(o, "item") else str(o)).encode("utf-8")
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"            # keep-alive y respuestas chunked
+    server_version = "HipotiroidismoAPI/1"
+
+    # ── Respuestas ────────────────────────────────────────────────────────────
+    def _enviar(self, estado: int, obj):
+        cuerpo = _json(obj)
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _enviar_jsonl(self, df: pd.DataFrame):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        df = _publicas(df)
+        for i in range(0, len(df), BLOQUE_JSONL):
+            trozo = df.iloc[i:i + BLOQUE_JSONL].to_json(orient="records", lines=True, force_ascii=False)
+            datos = (trozo.rstrip("\n") + "\n").encode("utf-8")
+            self.wfile.write(f"{len(datos):X}\r\n".encode() + datos + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, formato, *args):
+        _log.info("%s " + formato, self.address_string(), *args)
+
+    # ── Despacho ──────────────────────────────────────────────────────────────
+    def _atender(self, metodo: str):
+        try:
+            url = urlsplit(self.path)
+            consulta = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            partes = [unquote(p) for p in url.path.strip("/").split("/") if p]
+            self._autorizar()                       # antes de leer el cuerpo
+            cuerpo = self._cuerpo() if metodo == "POST" else b""
+            respuesta = self._rutear(metodo, partes, consulta, cuerpo)
+        except ErrorAPI as e:
+            respuesta = (e.estado, {"error": str(e)})
+        except ConflictoConcurrencia as e:
+            respuesta = (409, {"error": str(e)})
+        except ValueError as e:
+            respuesta = (400, {"error": str(e)})
+        except Exception:
+            _log.exception("Error atendiendo %s %s", metodo, self.path)
+            respuesta = (500, {"error": "Error interno"})
+        estado, obj = respuesta
+        if isinstance(obj, pd.DataFrame):
+            self._enviar_jsonl(obj)
+        else:
+            self._enviar(estado, obj)
+
+    def _cuerpo(self) -> bytes:
+        largo = int(self.headers.get("Content-Length") or 0)
+        if largo > API_MAX_BYTES:
+            self.close_connection = True            # no se lee el cuerpo
+            raise ErrorAPI(413, f"Cuerpo mayor a {API_MAX_BYTES // 2**20} MB; divídelo en lotes")
+        return self.rfile.read(largo)
+
+    def _autorizar(self):
+        if not API_TOKEN:
+            return
+        recibido = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(recibido.encode(), API_TOKEN.encode()):
+            self.close_connection = True            # el cuerpo, si lo hay, no se lee
+            raise ErrorAPI(401, "Token inválido o ausente (Authorization: Bearer <token>)")
+
+    def _rutear(self, metodo: str, partes: list[str], consulta: dict, cuerpo: bytes):
+        """(estado, objeto); un DataFrame como objeto se responde como JSON-lines."""
+        jsonl = consulta.get("formato") == "jsonl" or \
+            any(t in self.headers.get("Accept", "") for t in TIPOS_JSONL)
+        version = version_registros()
+
+        if metodo == "GET":
+            if partes == ["salud"]:
+                return 200, {"ok": True, "version": version}
+            if partes == ["registros"]:
+                return 200, listado(_registros(version), consulta, jsonl)
+            if len(partes) == 3 and partes[:2] == ["registros", "ficha"]:
+                posiciones = _indice(version).exacto(partes[2], ("ficha_id", "ficha_id_2"))
+                if not posiciones:
+                    raise ErrorAPI(404, f"No hay registros con la ficha {partes[2]}")
+                return 200, {"registros": _filas(_registros(version).iloc[posiciones])}
+            if partes == ["confirmados"]:
+                df = _registros(version)
+                return 200, listado(df[df["_confirmado"]], consulta, jsonl)
+            if partes == ["agregados"]:
+                agg = agregados(consulta)
+                return 200, (agg if jsonl else {"grupos": _filas(agg)})
+
+        if metodo == "POST":
+            tipo = self.headers.get("Content-Type", "")
+            if partes == ["registros"]:
+                return 200, crear_registros(leer_cuerpo(cuerpo, tipo), _bandera(consulta, "simular"))
+            if partes == ["resultados"]:
+                return 200, cargar(leer_cuerpo(cuerpo, tipo), _bandera(consulta, "simular"),
+                                   _bandera(consulta, "sobrescribir"))
+
+        rutas = {"salud", "registros", "confirmados", "agregados", "resultados"}
+        if partes and partes[0] in rutas:
+            raise ErrorAPI(405, f"Método {metodo} no permitido en /{'/'.join(partes)}")
+        raise ErrorAPI(404, f"Ruta desconocida: /{'/'.join(partes)}")
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+
+def crear_servidor(host: str = "127.0.0.1", puerto: int = API_PUERTO) -> ThreadingHTTPServer:
+    """
+    Servidor listo para serve_forever(); con puerto 0 el sistema elige uno
+    libre (server_address[1]), p. ej. para probarlo desde otro hilo.
+    """
+    despachar_avisos()                 # los que una escritura anterior dejó sin despachar
+    servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API JSON del registro de tamizaje")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=API_PUERTO)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    servidor = crear_servidor(args.host, args.puerto)
+    if not API_TOKEN and args.host not in ("127.0.0.1", "localhost"):
+        print("⚠ API_TOKEN no está definido: cualquiera en la red puede escribir en el registro")
+    print(f"API en http://{args.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
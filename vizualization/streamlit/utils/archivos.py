@@ -0,0 +1,78 @@
+# utils/archivos.py
+# ─── Bloqueo de archivos y escrituras atómicas ────────────────────────────────
+#
+# Streamlit ejecuta cada sesión en su propio hilo y puede haber varios procesos
+# sobre los mismos archivos: el bloqueo combina un RLock (hilos) con flock /
+# msvcrt.locking sobre "<archivo>.lock" (procesos). Es reentrante por hilo.
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class _Bloqueo:
+    def __init__(self, path: str):
+        self.path  = path + ".lock"
+        self.rlock = threading.RLock()
+        self.nivel = 0
+        self.f     = None
+
+    def __enter__(self):
+        self.rlock.acquire()
+        if self.nivel == 0:
+            try:
+                self.f = open(self.path, "a+")
+                if fcntl:
+                    fcntl.flock(self.f, fcntl.LOCK_EX)
+                else:
+                    self.f.seek(0)
+                    msvcrt.locking(self.f.fileno(), msvcrt.LK_LOCK, 1)
+            except BaseException:
+                if self.f:
+                    self.f.close()
+                self.rlock.release()
+                raise
+        self.nivel += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.nivel -= 1
+        if self.nivel == 0:
+            try:
+                if fcntl:
+                    fcntl.flock(self.f, fcntl.LOCK_UN)
+                else:
+                    self.f.seek(0)
+                    msvcrt.locking(self.f.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                self.f.close()
+                self.f = None
+        self.rlock.release()
+
+
+_bloqueos: dict[str, _Bloqueo] = {}
+_bloqueos_guard = threading.Lock()
+
+
+def bloqueo_archivo(path: str) -> _Bloqueo:
+    """Context manager de bloqueo exclusivo sobre `path` (entre hilos y procesos)."""
+    key = os.path.abspath(path)
+    with _bloqueos_guard:
+        if key not in _bloqueos:
+            _bloqueos[key] = _Bloqueo(key)
+        return _bloqueos[key]
+
+
+def escribir_atomico(path: str, texto: str):
+    """Escribe `texto` en un temporal y lo renombra: nunca deja el archivo a medias."""
+    tmp = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(texto)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,243 @@
+# utils/bandeja.py
+# ─── Bandeja de salida de SMS (SQLite) ───────────────────────────────────────
+#
+# Las páginas no envían: encolan. Cada mensaje queda en DB_SMS con su estado
+# (pendiente → enviando → enviado / fallido) e intentos, y un hilo trabajador
+# por proceso drena la cola con utils.sms.enviar_lote. Así el envío no depende
+# de la sesión del navegador y, tras un reinicio, lo pendiente se retoma.
+#
+# Idempotencia: (caso, teléfono E.164, plantilla, simulado) es único. Volver a
+# encolar el mismo aviso — otra operadora, otro clic — no lo duplica.
+# Un mensaje "enviando" cuyo proceso murió se vuelve a reclamar pasado
+# SEGUNDOS_RECLAMO.
+#
+# Desde vizualization/streamlit:
+#     python -m utils.bandeja estado
+#     python -m utils.bandeja drenar       # envía lo pendiente y termina
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+
+from utils.constantes import DB_SMS
+from utils.sms import enviar_lote, normalizar_telefono
+
+_log = logging.getLogger(__name__)
+
+LOTE = 100
+SEGUNDOS_RECLAMO = 300
+COLUMNAS_HISTORIAL = ["id", "id_caso", "destino", "telefono", "estado", "intentos",
+                      "detalle", "simulado", "creado", "actualizado"]
+
+
+def clave_plantilla(texto: str) -> str:
+    """Identificador corto de una plantilla (o de un mensaje escrito a mano)."""
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class Bandeja:
+    def __init__(self, path: str = DB_SMS):
+        self.path = os.path.abspath(path)          # el hilo trabajador no sigue al cwd
+        self._hay_trabajo = threading.Event()
+        self._crear_esquema()
+
+    @contextmanager
+    def conexion(self):
+        """Conexión nueva por operación (la usan la página y el hilo trabajador)."""
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _crear_esquema(self):
+        with self.conexion() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""CREATE TABLE IF NOT EXISTS mensajes (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_caso     TEXT NOT NULL,
+                destino     TEXT NOT NULL,
+                telefono    TEXT NOT NULL,
+                plantilla   TEXT NOT NULL,
+                mensaje     TEXT NOT NULL,
+                simulado    INTEGER NOT NULL,
+                estado      TEXT NOT NULL DEFAULT 'pendiente',
+                intentos    INTEGER NOT NULL DEFAULT 0,
+                detalle     TEXT NOT NULL DEFAULT '',
+                creado      TEXT NOT NULL,
+                actualizado TEXT NOT NULL,
+                reclamado   REAL,
+                UNIQUE (id_caso, telefono, plantilla, simulado)
+            )""")
+            con.execute("CREATE INDEX IF NOT EXISTS ix_mensajes_estado ON mensajes(estado)")
+
+    # ── Encolar ──────────────────────────────────────────────────────────────
+    def encolar(self, mensajes: list[dict], simulado: bool = True) -> tuple[list[int], int]:
+        """
+        mensajes: [{id_caso, destino, telefono, mensaje, plantilla}] — `plantilla`
+        es el texto con {tsh}/{ars} (o el mensaje si no hay). Retorna (ids de
+        la bandeja en el mismo orden, cuántos eran nuevos).
+        """
+        ahora = _ahora()
+        filas = [(str(m["id_caso"]), m["destino"], normalizar_telefono(m["telefono"]),
+                  clave_plantilla(m.get("plantilla") or m["mensaje"]), m["mensaje"],
+                  int(simulado), ahora, ahora) for m in mensajes]
+        with self.conexion() as con:
+            antes = con.total_changes
+            con.executemany(
+                "INSERT OR IGNORE INTO mensajes (id_caso, destino, telefono, plantilla, mensaje, "
+                "simulado, creado, actualizado) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+            nuevos = con.total_changes - antes
+            ids = [con.execute(
+                "SELECT id FROM mensajes WHERE id_caso = ? AND telefono = ? AND plantilla = ? "
+                "AND simulado = ?", (f[0], f[2], f[3], f[5])).fetchone()[0] for f in filas]
+        if nuevos:
+            self._hay_trabajo.set()
+        return ids, nuevos
+
+    # ── Trabajador ───────────────────────────────────────────────────────────
+    def reclamar(self, n: int = LOTE) -> list[tuple]:
+        """
+        Marca hasta `n` mensajes pendientes (o "enviando" abandonados) como
+        "enviando" y los retorna como (id, telefono, mensaje, simulado).
+        """
+        ahora = time.time()
+        with self.conexion() as con:
+            return con.execute(
+                "UPDATE mensajes SET estado = 'enviando', intentos = intentos + 1, "
+                "reclamado = ?, actualizado = ? "
+                "WHERE id IN (SELECT id FROM mensajes WHERE estado = 'pendiente' "
+                "             OR (estado = 'enviando' AND reclamado < ?) ORDER BY id LIMIT ?) "
+                "RETURNING id, telefono, mensaje, simulado",
+                (ahora, _ahora(), ahora - SEGUNDOS_RECLAMO, n)).fetchall()
+
+    def marcar(self, resultados: list[tuple[int, bool, str]]):
+        """Registra el resultado de cada envío: (id, éxito, detalle)."""
+        ahora = _ahora()
+        with self.conexion() as con:
+            con.executemany(
+                "UPDATE mensajes SET estado = ?, detalle = ?, actualizado = ?, reclamado = NULL "
+                "WHERE id = ?",
+                [("enviado" if ok else "fallido", detalle, ahora, i) for i, ok, detalle in resultados])
+
+    def drenar(self) -> int:
+        """
+        Envía todo lo pendiente, lote a lote. Retorna cuántos mensajes se
+        procesaron. Si el envío de una parte del lote falla por completo (p. ej.
+        el proveedor no se puede crear) esos mensajes quedan "fallido" con el
+        error, no "enviando".
+        """
+        total = 0
+        while lote := self.reclamar():
+            for simulado in (True, False):
+                parte = [r for r in lote if bool(r[3]) is simulado]
+                if not parte:
+                    continue
+                try:
+                    res = enviar_lote([(tel, msg) for _, tel, msg, _ in parte], simulado)
+                except Exception as e:
+                    _log.exception("Envío de %d SMS falló", len(parte))
+                    res = [(False, f"Error: {e}")] * len(parte)
+                self.marcar([(r[0], ok, det) for r, (ok, det) in zip(parte, res)])
+            total += len(lote)
+        return total
+
+    def _trabajar(self):
+        """Bucle del hilo trabajador: ningún error lo termina (se registra y se sigue)."""
+        while True:
+            self._hay_trabajo.wait(timeout=5)
+            self._hay_trabajo.clear()
+            try:
+                self.drenar()
+            except Exception:
+                _log.exception("Bandeja de SMS: error al drenar; se reintenta en 5 s")
+                time.sleep(5)
+
+    def reintentar_fallidos(self) -> int:
+        """Devuelve los fallidos a la cola. Retorna cuántos."""
+        with self.conexion() as con:
+            n = con.execute("UPDATE mensajes SET estado = 'pendiente', actualizado = ? "
+                            "WHERE estado = 'fallido'", (_ahora(),)).rowcount
+        if n:
+            self._hay_trabajo.set()
+        return n
+
+    # ── Consulta ─────────────────────────────────────────────────────────────
+    def estados(self, ids: list[int] | None = None) -> dict[str, int]:
+        """Conteo por estado, de todos los mensajes o de los `ids` dados."""
+        with self.conexion() as con:
+            if ids is None:
+                filas = con.execute("SELECT estado, COUNT(*) FROM mensajes GROUP BY estado")
+            else:
+                marcas = ", ".join("?" for _ in ids)
+                filas = con.execute(f"SELECT estado, COUNT(*) FROM mensajes WHERE id IN ({marcas}) "
+                                    "GROUP BY estado", list(ids))
+            return dict(filas.fetchall())
+
+    def consultar(self, ids: list[int]) -> pd.DataFrame:
+        """Filas de los `ids` dados, en ese orden."""
+        cols = ", ".join(COLUMNAS_HISTORIAL)
+        marcas = ", ".join("?" for _ in ids)
+        with self.conexion() as con:
+            df = pd.read_sql_query(f"SELECT {cols} FROM mensajes WHERE id IN ({marcas})",
+                                   con, params=list(ids))
+        return df.set_index("id", drop=False).reindex(ids).reset_index(drop=True)
+
+    def historial(self, limite: int = 500) -> pd.DataFrame:
+        """Últimos mensajes de la bandeja, del más reciente al más antiguo."""
+        cols = ", ".join(COLUMNAS_HISTORIAL)
+        with self.conexion() as con:
+            return pd.read_sql_query(f"SELECT {cols} FROM mensajes ORDER BY id DESC LIMIT ?",
+                                     con, params=(limite,))
+
+    def esperar(self, ids: list[int], segundos: float = 10) -> dict[str, int]:
+        """Espera hasta que los `ids` dejen de estar en cola (o se acabe el tiempo)."""
+        fin = time.monotonic() + segundos
+        while True:
+            conteo = self.estados(ids)
+            if not (conteo.get("pendiente") or conteo.get("enviando")) or time.monotonic() > fin:
+                return conteo
+            time.sleep(0.2)
+
+
+@lru_cache(maxsize=1)
+def get_bandeja(path: str = DB_SMS) -> Bandeja:
+    """Bandeja compartida por el proceso, con su hilo trabajador ya en marcha."""
+    bandeja = Bandeja(path)
+    threading.Thread(target=bandeja._trabajar, name="bandeja-sms", daemon=True).start()
+    bandeja._hay_trabajo.set()                     # retoma lo que quedó pendiente
+    return bandeja
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandeja de salida de SMS")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("estado", help="Mensajes por estado")
+    sub.add_parser("drenar", help="Envía lo pendiente y termina")
+    sub.add_parser("reintentar", help="Devuelve los fallidos a la cola")
+    args = parser.parse_args()
+
+    bandeja = Bandeja()
+    if args.cmd == "estado":
+        for estado, n in sorted(bandeja.estados().items()):
+            print(f"  {estado:<12}{n:>8,}")
+    elif args.cmd == "drenar":
+        from utils.alertas import despachar_avisos
+        despachar_avisos()                         # avisos que quedaron en el registro
+        print(f"{bandeja.drenar():,} mensajes procesados")
+    elif args.cmd == "reintentar":
+        print(f"{bandeja.reintentar_fallidos():,} mensajes devueltos a la cola")
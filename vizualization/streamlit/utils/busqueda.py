@@ -0,0 +1,109 @@
+# utils/busqueda.py
+# ─── Índice de búsqueda de pacientes ─────────────────────────────────────────
+#
+# Se construye una vez por versión del registro (utils.datos.cargar_indice_busqueda):
+#   · claves exactas — ficha_id, ficha_id_2, numero_documento, historia_clinica
+#     → posiciones de fila (diccionarios de groupby().indices);
+#   · apellidos normalizados ("APELLIDO1 APELLIDO2" y "APELLIDO2", sin tildes)
+#     en un arreglo ordenado: un prefijo es el rango [searchsorted(p),
+#     searchsorted(p + "\uffff")).
+# Cada consulta es un acceso a diccionario más dos búsquedas binarias, sin
+# recorrer el registro.
+
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Campo → etiqueta, en el orden en que se muestran las coincidencias exactas
+CAMPOS_EXACTOS = {
+    "ficha_id":         "Ficha",
+    "ficha_id_2":       "Ficha 2",
+    "numero_documento": "Documento",
+    "historia_clinica": "Historia clínica",
+}
+
+
+def clave_texto(texto) -> str:
+    """Como divipola.clave (sin tildes, mayúsculas, espacios normalizados), solo ASCII."""
+    s = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(s.upper().split())
+
+
+def claves_texto(s: pd.Series) -> pd.Series:
+    """clave_texto por fila, calculada una vez por valor distinto (los apellidos se repiten)."""
+    s = s.fillna("").astype(str)
+    # astype(str): sobre una serie vacía, map devuelve float64 y no se puede concatenar texto
+    return s.map({v: clave_texto(v) for v in s.unique()}).astype(str)
+
+
+class IndiceBusqueda:
+    """Búsquedas exactas y por prefijo de apellido sobre el registro como texto."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True).fillna("")
+        self._exactos: dict[str, dict[str, np.ndarray]] = {}
+        for c in CAMPOS_EXACTOS:
+            if c not in self.df.columns:
+                continue
+            valores = self.df[c].astype(str).str.strip().str.upper()
+            grupos = valores.groupby(valores, sort=False).indices
+            self._exactos[c] = {k: v for k, v in grupos.items() if k not in ("", "0")}
+
+        ap1 = claves_texto(self.df.get("apellido_1", pd.Series("", index=self.df.index)))
+        ap2 = claves_texto(self.df.get("apellido_2", pd.Series("", index=self.df.index)))
+        completo = (ap1 + " " + ap2).str.strip()
+        claves = pd.concat([completo, ap2[ap2 != ""]])
+        claves = claves[claves != ""]
+        orden = np.argsort(claves.to_numpy(dtype=str), kind="stable")
+        self._apellidos = claves.to_numpy(dtype=str)[orden]
+        self._pos_apellidos = claves.index.to_numpy()[orden]
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def exacto(self, valor: str, campos=CAMPOS_EXACTOS) -> list[int]:
+        """Filas cuyo ficha_id, ficha_id_2, documento o historia clínica (o solo `campos`) es `valor`."""
+        v = str(valor).strip().upper()
+        vistas, filas = set(), []
+        for campo, tabla in self._exactos.items():
+            if campo not in campos:
+                continue
+            for p in tabla.get(v, ()):
+                if p not in vistas:
+                    vistas.add(p)
+                    filas.append(int(p))
+        return filas
+
+    def por_apellido(self, prefijo: str, limite: int = 20) -> list[int]:
+        """Filas con un apellido (o "apellido1 apellido2") que empieza por `prefijo`."""
+        p = clave_texto(prefijo)
+        if not p:
+            return []
+        lo = np.searchsorted(self._apellidos, p, side="left")
+        hi = np.searchsorted(self._apellidos, p + "\uffff", side="left")
+        # Cada fila aparece a lo sumo dos veces: 2·limite claves bastan para `limite` filas
+        candidatas = self._pos_apellidos[lo:min(hi, lo + 2 * limite)].tolist()
+        return list(dict.fromkeys(candidatas))[:limite]
+
+    def buscar(self, texto: str, limite: int = 20) -> list[int]:
+        """Coincidencias exactas primero, luego por prefijo de apellido (si hay letras)."""
+        filas = self.exacto(texto)
+        if any(ch.isalpha() for ch in str(texto)) and len(filas) < limite:
+            vistas = set(filas)
+            filas += [p for p in self.por_apellido(texto, limite) if p not in vistas]
+        return filas[:limite]
+
+    def fila(self, pos: int) -> pd.Series:
+        """Registro completo (texto) en la posición `pos`, como buscar_por_ficha."""
+        return self.df.iloc[pos]
+
+    def etiqueta(self, pos: int) -> str:
+        r = self.df.iloc[pos]
+        partes = [f"Ficha {r.get('ficha_id', '')}",
+                  f"{r.get('apellido_1', '')} {r.get('apellido_2', '')}".strip() or "—"]
+        if r.get("numero_documento", ""):
+            partes.append(f"Doc. {r['numero_documento']}")
+        if r.get("fecha_nacimiento", ""):
+            partes.append(f"nac. {r['fecha_nacimiento']}")
+        return " · ".join(partes)
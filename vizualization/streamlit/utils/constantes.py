@@ -1,14 +1,58 @@
 # utils/constantes.py
 # ─── Todas las constantes compartidas entre páginas ───────────────────────────
 
+import os as _os
+
 CSV_REGISTROS = "../../data/hipotiroidismo_registros.csv"
+DB_REGISTROS  = "../../data/hipotiroidismo_registros.db"
+SNAPSHOT_REGISTROS = "../../data/hipotiroidismo_registros.parquet"
+DB_SMS = "../../data/hipotiroidismo_sms.db"
+CSV_MUNICIPIOS = "../../data/municipios.csv"
+
+# Backend de almacenamiento del registro: "csv" (por defecto) o "sqlite"
+ALMACEN_REGISTROS = _os.environ.get("ALMACEN_REGISTROS", "csv").lower()
 
 TSH_MIN   = 0.1
 TSH_MAX   = 300.0
 TSH_CORTE = 15.0
+# Rango y paso del slider de umbral del dashboard (mIU/L)
+UMBRAL_MIN  = 1.0
+UMBRAL_MAX  = 30.0
+UMBRAL_PASO = 0.5
+# Por encima de este número de puntos los scatter se dibujan como densidad
+MAX_PUNTOS_SCATTER = int(_os.environ.get("MAX_PUNTOS_SCATTER", "20000"))
 PESO_MIN  = 400
 PESO_MAX  = 8000
 
+# Envío masivo de SMS: hilos, tope del proveedor (mensajes por segundo) y reintentos
+SMS_TRABAJADORES = int(_os.environ.get("SMS_TRABAJADORES", "16"))
+SMS_POR_SEGUNDO  = float(_os.environ.get("SMS_POR_SEGUNDO", "10"))
+SMS_REINTENTOS   = 3
+# Proveedor de SMS: "twilio", "http" (SMS_URL, p. ej. un SMS falso local) o
+# "archivo" (SMS_ARCHIVO, sin red). El modo prueba no envía nada y solo deja
+# constancia en SMS_ARCHIVO si se define (vacío: ningún archivo). Ese archivo
+# lleva el teléfono enmascarado y no el texto; ubicarlo fuera de data/, p. ej.
+# SMS_ARCHIVO=/tmp/sms_simulados.jsonl.
+SMS_URL       = _os.environ.get("SMS_URL", "")
+SMS_PROVEEDOR = _os.environ.get("SMS_PROVEEDOR", "http" if SMS_URL else "twilio").lower()
+SMS_ARCHIVO   = _os.environ.get("SMS_ARCHIVO", "")
+# Avisos automáticos al confirmar un caso: reales si hay un proveedor
+# configurado (utils.alertas.avisos_simulados); SMS_SIMULADO=1 los fuerza a
+# simulados y SMS_SIMULADO=0 a reales. Sin SMS_TELEFONO_IRS solo se avisa al paciente
+SMS_SIMULADO      = {"1": True, "0": False}.get(_os.environ.get("SMS_SIMULADO", ""))
+SMS_TELEFONO_IRS  = _os.environ.get("SMS_TELEFONO_IRS", "")
+PLANTILLA_SMS_PACIENTE = ("Alerta: El TSH neonatal de su hijo(a) es {tsh} mIU/L. "
+                          "Contacte a {ars} urgente.")
+PLANTILLA_SMS_IRS      = "Caso confirmado: TSH {tsh} mIU/L — ARS {ars}. Requiere seguimiento."
+
+# API de integraciones (python -m utils.api). Sin API_TOKEN no se exige
+# autenticación: solo para uso local.
+API_TOKEN          = _os.environ.get("API_TOKEN", "")
+API_PUERTO         = int(_os.environ.get("API_PUERTO", "8600"))
+API_POR_PAGINA     = 100
+API_MAX_POR_PAGINA = 5000
+API_MAX_BYTES      = 50 * 1024 * 1024
+
 FIELDNAMES = [
     "id", "ficha_id", "fecha_ingreso", "institucion", "ars",
     "historia_clinica", "tipo_documento", "numero_documento",
@@ -24,62 +68,136 @@ FIELDNAMES = [
     "resultado_rechazada", "fecha_resultado_rechazada",
 ]
 
+# Encabezados de la base histórica del laboratorio (bd.xlsx) → FIELDNAMES.
+# Ciudad / Departamento son nombres; la carga masiva los resuelve a códigos DANE.
+NOMBRES_LEGADOS = {
+    "Id": "id",
+    "No de ficha": "ficha_id",
+    "Fecha de ingreso": "fecha_ingreso",
+    "Institucion": "institucion",
+    "ARS": "ars",
+    "Historia clinica": "historia_clinica",
+    "Tipo de Documento": "tipo_documento",
+    "Numero de Documento": "numero_documento",
+    "Ciudad": "ciudad",
+    "Departamento": "departamento",
+    "Telefono uno": "telefono_1",
+    "Telefono dos": "telefono_2",
+    "Direccion": "direccion",
+    "Primer Apellido": "apellido_1",
+    "Segundo Apellido": "apellido_2",
+    "Nombre Hijo de": "nombre_hijo",
+    "Fecha de Nacimiento": "fecha_nacimiento",
+    "Peso": "peso",
+    "Sexo": "sexo",
+    "Prematuro": "prematuro",
+    "Transfundido": "transfundido",
+    "Informacion completa": "informacion_completa",
+    "Muestra adecuada": "muestra_adecuada",
+    "Destino muestra": "destino_muestra",
+    "Tipo de muestra": "tipo_muestra",
+    "Fecha toma de la muestra": "fecha_toma_muestra",
+    "Fecha de resultado": "fecha_resultado",
+    "Resultados TSH neonatal": "tsh_neonatal",
+    "No de ficha dos": "ficha_id_2",
+    "Tipo de muestra 2": "tipo_muestra_2",
+    "Fecha toma de la muestra 2": "fecha_toma_muestra_2",
+    "Fecha resultado muestra 2": "fecha_resultado_muestra_2",
+    "Resultado toma de muestra 2": "resultado_muestra_2",
+    "Contador": "contador",
+    "muestra rechazada": "muestra_rechazada",
+    "Fecha toma rechazada": "fecha_toma_rechazada",
+    "Tipo de Vinculacion": "tipo_vinculacion",
+    "Resultado Rechazada": "resultado_rechazada",
+    "Fecha resultado rechazada": "fecha_resultado_rechazada",
+}
+
+# ── Esquema: tipo de cada columna al cargar el registro para análisis ────────
+# "str" | "int" | "float" | "fecha" | "bool" | "cat" (categórica, pocos valores)
+ESQUEMA = {
+    "id": "int", "ficha_id": "str", "fecha_ingreso": "fecha",
+    "institucion": "cat", "ars": "cat",
+    "historia_clinica": "str", "tipo_documento": "cat", "numero_documento": "str",
+    "cod_municipio": "cat", "nombre_municipio": "cat",
+    "cod_departamento": "cat", "nombre_departamento": "cat",
+    "telefono_1": "str", "telefono_2": "str", "direccion": "str",
+    "apellido_1": "str", "apellido_2": "str", "nombre_hijo": "str",
+    "fecha_nacimiento": "fecha", "peso": "float", "sexo": "cat",
+    "prematuro": "bool", "transfundido": "bool",
+    "informacion_completa": "bool", "muestra_adecuada": "bool", "destino_muestra": "cat",
+    "tipo_muestra": "cat", "fecha_toma_muestra": "fecha", "fecha_resultado": "fecha",
+    "tsh_neonatal": "float",
+    "ficha_id_2": "str", "tipo_muestra_2": "cat", "fecha_toma_muestra_2": "fecha",
+    "fecha_resultado_muestra_2": "fecha", "resultado_muestra_2": "float", "contador": "int",
+    "muestra_rechazada": "bool", "fecha_toma_rechazada": "fecha", "tipo_vinculacion": "cat",
+    "resultado_rechazada": "float", "fecha_resultado_rechazada": "fecha",
+}
+# TSH vacío = pendiente de resultado; se carga como 0
+COLUMNAS_TSH = ["tsh_neonatal", "resultado_muestra_2"]
+
 import pandas as _pd
 
-def cargar_municipios(path: str = "../../data/municipios.csv") -> _pd.DataFrame:
+
+def tipar_registros(df: _pd.DataFrame) -> _pd.DataFrame:
+    """
+    Aplica ESQUEMA al registro leído como texto (vectorizado, columna a columna).
+    bool: VERDADERO → True; FALSO o vacío → False, como el checkbox del formulario.
+    Las columnas que no están en ESQUEMA (p. ej. ciudad en CSV antiguos) quedan como texto.
+    """
+    df = df.copy()
+    for col in df.columns:
+        tipo = ESQUEMA.get(col, "str")
+        s = df[col]
+        if tipo == "str":
+            df[col] = s.fillna("")
+        elif tipo == "fecha":
+            df[col] = _pd.to_datetime(s, errors="coerce", format="ISO8601")
+        elif tipo == "float":
+            df[col] = _pd.to_numeric(s, errors="coerce")
+        elif tipo == "int":
+            df[col] = _pd.to_numeric(s, errors="coerce").astype("Int64")
+        elif tipo == "bool":
+            df[col] = s.isin(["VERDADERO", "True"])
+        elif tipo == "cat":
+            df[col] = s.where(s != "").astype("category")
+    for col in COLUMNAS_TSH:
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+    return df
+
+
+def cargar_municipios(path: str = CSV_MUNICIPIOS) -> _pd.DataFrame:
     """
     Carga el CSV de municipios con columnas normalizadas.
     Retorna DataFrame con: cod_depto, nombre_depto, cod_municipio, nombre_municipio
+    (lectura compartida con utils.divipola, una vez por proceso).
     """
-    try:
-        df = _pd.read_csv(path, dtype=str, sep=None, engine="python")
-        df.columns = (
-            df.columns.str.strip()
-                      .str.lower()
-                      .str.replace(" ", "_")
-                      .str.replace(":", "")
-                      .str.normalize("NFKD")
-                      .str.encode("ascii", errors="ignore")
-                      .str.decode("ascii")
-        )
-        # Mapear nombres de columnas flexiblemente
-        rename = {}
-        for c in df.columns:
-            if "codigo" in c and "departamento" in c:  rename[c] = "cod_depto"
-            elif "nombre" in c and "departamento" in c: rename[c] = "nombre_depto"
-            elif "codigo" in c and "municipio" in c:    rename[c] = "cod_municipio"
-            elif "nombre" in c and "municipio" in c:    rename[c] = "nombre_municipio"
-        df = df.rename(columns=rename)
-        # Limpiar y normalizar
-        for col in ["cod_depto","nombre_depto","cod_municipio","nombre_municipio"]:
-            if col in df.columns:
-                df[col] = df[col].str.strip()
-        return df[["cod_depto","nombre_depto","cod_municipio","nombre_municipio"]].dropna()
-    except Exception:
-        return _pd.DataFrame(columns=["cod_depto","nombre_depto","cod_municipio","nombre_municipio"])
+    from utils.divipola import get_divipola
+    return get_divipola(path).tabla[["cod_depto","nombre_depto","cod_municipio","nombre_municipio"]]
 
 
 def get_departamentos(df_mun: _pd.DataFrame) -> list[dict]:
-    """Lista de dicts {cod, nombre} ordenada por nombre."""
+    """Lista de dicts {cod, nombre} de `df_mun`, ordenada por nombre."""
     if df_mun.empty:
         return []
-    return (
-        df_mun[["cod_depto","nombre_depto"]]
-        .drop_duplicates()
-        .sort_values("nombre_depto")
-        .rename(columns={"cod_depto":"cod","nombre_depto":"nombre"})
-        .to_dict("records")
+    from utils.divipola import clave
+    deptos = df_mun[["cod_depto", "nombre_depto"]].drop_duplicates("cod_depto")
+    return sorted(
+        ({"cod": c, "nombre": n} for c, n in deptos.itertuples(index=False)),
+        key=lambda d: clave(d["nombre"]),
     )
 
 
 def get_municipios(df_mun: _pd.DataFrame, cod_depto: str) -> list[dict]:
-    """Lista de dicts {cod, nombre} para el departamento dado."""
+    """Lista de dicts {cod, nombre} de `df_mun` para el departamento dado."""
     if df_mun.empty or not cod_depto:
         return []
-    sub = df_mun[df_mun["cod_depto"] == cod_depto].sort_values("nombre_municipio")
-    return sub[["cod_municipio","nombre_municipio"]].rename(
-        columns={"cod_municipio":"cod","nombre_municipio":"nombre"}
-    ).to_dict("records")
+    from utils.divipola import clave
+    sub = df_mun[df_mun["cod_depto"] == str(cod_depto).zfill(2)]
+    return sorted(
+        ({"cod": c, "nombre": n} for c, n in sub[["cod_municipio", "nombre_municipio"]].itertuples(index=False)),
+        key=lambda m: clave(m["nombre"]),
+    )
 
 TIPOS_DOC    = ["Seleccionar...", "CC", "CE", "PA", "RC", "TI"]
 TIPOS_MUESTRA= ["Seleccionar...", "CORDON", "TALON", "VENA"]
@@ -1,61 +1,145 @@
 # utils/csv_helpers.py
-# ─── Operaciones CRUD sobre el CSV de registros ───────────────────────────────
+# ─── Operaciones CRUD sobre el registro ───────────────────────────────────────
+#
+# Las páginas solo usan estas funciones. El almacenamiento real (CSV o SQLite)
+# lo decide utils.almacen según ALMACEN_REGISTROS.
+#
+# Concurrencia: toda escritura ocurre bajo bloqueo_archivo (hilos y procesos).
+# Además, quien edita un registro que leyó antes puede pasar su version_fila;
+# si bajo el bloqueo la fila ya no coincide (otro operador la guardó entre
+# tanto) no se escribe nada y se lanza ConflictoConcurrencia con la fila actual.
+#
+# Una actualización que confirma un caso guarda sus avisos de SMS en la misma
+# escritura (utils.alertas) y luego los despacha a la bandeja.
 
-import csv
-import os
+import hashlib
 
 import pandas as pd
 
-from utils.constantes import CSV_REGISTROS, FIELDNAMES
+from utils.agregados import registrar_altas, registrar_cambio, registrar_cambios
+from utils.alertas import avisos_nuevos, despachar_avisos
+from utils.almacen import get_almacen
+from utils.archivos import bloqueo_archivo
+from utils.constantes import FIELDNAMES
+
+
+class ConflictoConcurrencia(Exception):
+    """
+    Uno o más registros cambiaron desde que se leyeron. `actuales` tiene esas
+    filas como están ahora ({id: dict de texto}); no se escribió nada.
+    """
+
+    def __init__(self, actuales: dict[str, dict]):
+        self.actuales = actuales
+        ids = ", ".join(sorted(actuales, key=int))
+        cuales = "el registro" if len(actuales) == 1 else "los registros"
+        super().__init__(f"Otro usuario modificó {cuales} {ids} mientras se editaba")
+
+
+def version_fila(fila) -> str:
+    """Huella del contenido de una fila (dict o Series de texto) para detectar ediciones concurrentes."""
+    valores = []
+    for c in FIELDNAMES:
+        v = fila.get(c, "")
+        valores.append("" if pd.isna(v) else str(v))
+    return hashlib.sha1("\x1f".join(valores).encode("utf-8")).hexdigest()[:16]
 
 
 def leer_registros() -> pd.DataFrame:
-    """Lee el CSV de registros. Retorna DataFrame vacío si no existe."""
-    if not os.path.isfile(CSV_REGISTROS):
-        return pd.DataFrame(columns=FIELDNAMES)
-    return pd.read_csv(CSV_REGISTROS, dtype=str).fillna("")
+    """Lee todos los registros como texto. Retorna DataFrame vacío si no hay datos."""
+    return get_almacen().leer().fillna("")
+
+
+def version_registros() -> str:
+    """Token que cambia cada vez que el registro se escribe (para cachés y snapshots)."""
+    return get_almacen().version()
 
 
 def next_id() -> int:
     """Retorna el siguiente ID autoincremental."""
-    if not os.path.isfile(CSV_REGISTROS):
-        return 1
-    with open(CSV_REGISTROS, encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-    if not rows:
-        return 1
-    try:
-        return max(int(r.get("id", 0)) for r in rows) + 1
-    except Exception:
-        return len(rows) + 1
+    return get_almacen().next_id()
+
+
+def reservar_ids(n: int) -> int:
+    """Reserva `n` ids consecutivos y retorna el primero (cargas masivas)."""
+    return get_almacen().reservar_ids(n)
 
 
 def guardar_registro(row: dict):
-    """Agrega una fila nueva al CSV."""
-    existe = os.path.isfile(CSV_REGISTROS)
-    with open(CSV_REGISTROS, "a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        if not existe:
-            w.writeheader()
-        w.writerow(row)
+    """Agrega una fila nueva al registro y la suma a los agregados."""
+    almacen = get_almacen()
+    with bloqueo_archivo(almacen.path):
+        antes = almacen.version()
+        almacen.guardar(row)
+        registrar_cambio(None, row, antes, almacen.version())
 
 
-def actualizar_registro(id_registro: int, campos: dict):
-    """Actualiza campos específicos en la fila con el id dado."""
-    df = leer_registros()
-    mask = df["id"].astype(str) == str(id_registro)
-    for col, val in campos.items():
-        if col in df.columns:
-            df.loc[mask, col] = str(val)
-    df.to_csv(CSV_REGISTROS, index=False)
+def guardar_registros(df: pd.DataFrame):
+    """Agrega un lote de filas (texto, con id ya asignado) en una sola escritura."""
+    if df.empty:
+        return
+    almacen = get_almacen()
+    with bloqueo_archivo(almacen.path):
+        antes = almacen.version()
+        almacen.guardar_registros(df)
+        registrar_altas(df, antes, almacen.version())
+
+
+def fichas_registradas() -> set[str]:
+    """Conjunto de ficha_id existentes (para descartar duplicados en cargas masivas)."""
+    return get_almacen().fichas()
+
+
+def actualizar_registro(id_registro: int, campos: dict, version: str | None = None):
+    """
+    Actualiza campos específicos en la fila con el id dado (y sus agregados).
+    Con `version` (version_fila de la fila leída) lanza ConflictoConcurrencia
+    si la fila cambió desde entonces. Si la actualización confirma el caso,
+    encola sus avisos de SMS (utils.alertas).
+    """
+    actualizar_registros({id_registro: campos},
+                         None if version is None else {id_registro: version})
+
+
+def actualizar_registros(cambios: dict[int, dict], versiones: dict[int, str] | None = None):
+    """
+    Actualiza muchas filas {id: campos} en una sola escritura (journal o
+    transacción) y ajusta los agregados en una pasada. `versiones`
+    {id: version_fila} se verifica bajo el bloqueo: si alguna fila cambió,
+    ConflictoConcurrencia y no se escribe ninguna. Los avisos de los casos
+    que quedan confirmados se escriben con la actualización y se despachan
+    a la bandeja de SMS al soltar el bloqueo.
+    """
+    cambios = {int(i): campos for i, campos in cambios.items()}
+    versiones = {int(i): v for i, v in (versiones or {}).items()}
+    if not cambios:
+        return
+    almacen = get_almacen()
+    with bloqueo_archivo(almacen.path):
+        antes = almacen.version()
+        viejos = almacen.obtener_registros(cambios.keys())
+        cambiados = {i: v for i, v in viejos.items()
+                     if int(i) in versiones and version_fila(v) != versiones[int(i)]}
+        if cambiados:
+            raise ConflictoConcurrencia(cambiados)
+        nuevos = {i: {**v, **{c: str(x) for c, x in cambios[int(i)].items()}} for i, v in viejos.items()}
+        avisos = avisos_nuevos(viejos, nuevos)
+        almacen.actualizar_registros(cambios, avisos)
+        if viejos:
+            registrar_cambios(pd.DataFrame(list(viejos.values()), columns=FIELDNAMES),
+                              pd.DataFrame(list(nuevos.values()), columns=FIELDNAMES),
+                              antes, almacen.version())
+    if avisos:
+        despachar_avisos()
 
 
 def buscar_por_ficha(ficha: str) -> pd.Series | None:
     """Retorna la fila cuyo ficha_id coincide, o None si no existe."""
-    df = leer_registros()
-    if df.empty:
-        return None
-    match = df[df["ficha_id"].str.strip() == ficha.strip()]
-    if match.empty:
-        return None
-    return match.iloc[0]
+    return get_almacen().buscar_por_ficha(ficha)
+
+
+def compactar_registros():
+    """Incorpora las actualizaciones pendientes al archivo base (solo backend CSV)."""
+    almacen = get_almacen()
+    if hasattr(almacen, "compactar"):
+        almacen.compactar()
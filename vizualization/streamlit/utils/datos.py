@@ -0,0 +1,155 @@
+# utils/datos.py
+# ─── Registro tipado compartido por las páginas de análisis ──────────────────
+#
+# Dashboard y Alertas leen la misma copia en memoria (st.cache_resource: un
+# solo objeto por proceso, no una copia por sesión). Las páginas la filtran o
+# proyectan, nunca la modifican in place.
+#
+# La caché se indexa por version_registros(): cada guardado del Formulario
+# cambia la versión y la próxima lectura reconstruye solo esta entrada, sin
+# tocar las demás cachés (municipios, etc.). Y por conjunto de columnas: el
+# Dashboard pide solo las que usan sus filtros y pestañas, y el snapshot
+# Parquet lee únicamente esas.
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.agregados import leer_agregados
+from utils.constantes import COLUMNAS_TSH, TSH_CORTE
+from utils.busqueda import IndiceBusqueda
+from utils.csv_helpers import leer_registros, version_registros
+from utils.filtros import COLUMNAS_MOTOR, MotorFiltros, motor_registros
+from utils.graficos import ajustar_tendencia
+from utils.snapshot import leer_snapshot
+from utils.umbral import BarridoUmbral
+
+
+# Derivadas de COLUMNAS_TSH; no están en el snapshot
+BANDERAS_TSH = ["sospecha_hipotiroidismo", "confirmado_hipotiroidismo"]
+
+
+@st.cache_resource(max_entries=4, show_spinner="Cargando registros…")
+def _registros(version: str, columnas: tuple[str, ...] | None) -> pd.DataFrame:
+    if columnas is not None:
+        columnas = list(dict.fromkeys([c for c in columnas if c not in BANDERAS_TSH] + COLUMNAS_TSH))
+    df = leer_snapshot(columnas)
+    if df.empty:
+        return df
+    df["sospecha_hipotiroidismo"]   = df["tsh_neonatal"] >= TSH_CORTE
+    df["confirmado_hipotiroidismo"] = df["sospecha_hipotiroidismo"] & (df["resultado_muestra_2"] >= TSH_CORTE)
+    return df
+
+
+def cargar_registros(columnas: list[str] | None = None) -> pd.DataFrame:
+    """
+    Registro tipado según ESQUEMA + banderas de sospecha y confirmación (versión
+    vigente). Con `columnas`, solo esas (más las de TSH); una copia por conjunto.
+    """
+    return _registros(version_registros(), None if columnas is None else tuple(columnas))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _confirmados(version: str) -> pd.DataFrame:
+    df = _registros(version, None)
+    return df if df.empty else df[df["confirmado_hipotiroidismo"]]
+
+
+def cargar_confirmados(version: str | None = None) -> pd.DataFrame:
+    """Casos confirmados del registro tipado (de `version`, o la vigente; copia compartida)."""
+    return _confirmados(version or version_registros())
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _orden_confirmados(version: str, columna: str, ascendente: bool) -> np.ndarray:
+    s = _confirmados(version)[columna].reset_index(drop=True)
+    return s.sort_values(ascending=ascendente, kind="stable", na_position="last").index.to_numpy()
+
+
+def cargar_orden_confirmados(columna: str, ascendente: bool, version: str | None = None) -> np.ndarray:
+    """
+    Posiciones de los confirmados ordenados por `columna` (vacíos al final).
+    Se ordena una vez por columna y sentido; cambiar de página solo corta el arreglo.
+    Con la `version` de cargar_confirmados, las posiciones corresponden a esa tabla
+    aunque el registro cambie entre las dos llamadas.
+    """
+    return _orden_confirmados(version or version_registros(), columna, ascendente)
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _agregados(version: str) -> pd.DataFrame:
+    return leer_agregados()
+
+
+def cargar_agregados() -> pd.DataFrame:
+    """Conteos por grupo (utils.agregados) de la versión vigente del registro."""
+    return _agregados(version_registros())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _motor(version: str, columnas: tuple[str, ...]) -> MotorFiltros:
+    return motor_registros(_registros(version, tuple(dict.fromkeys(COLUMNAS_MOTOR + list(columnas)))))
+
+
+def cargar_motor_filtros(columnas: list[str] | None = None) -> MotorFiltros:
+    """
+    Motor de filtros del dashboard (versión vigente) sobre las columnas que
+    necesitan los filtros más `columnas`, las que la página toma de las filas.
+    """
+    return _motor(version_registros(), tuple(columnas or ()))
+
+
+def _clave_filtros(selecciones: dict[str, list], banderas: dict[str, bool]) -> tuple:
+    """Selecciones y banderas del sidebar como tuplas (hashables para las cachés)."""
+    return (tuple(sorted((k, tuple(v)) for k, v in selecciones.items())),
+            tuple(sorted(banderas.items())))
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _barrido(version: str, columnas: tuple, selecciones: tuple, banderas: tuple) -> BarridoUmbral:
+    motor = _motor(version, columnas)
+    d = motor.tomar(motor.mascara(dict(selecciones), dict(banderas)),
+                    ["tsh_neonatal", "resultado_muestra_2", "sexo", "prematuro", "tipo_muestra"])
+    grupos = {c: d[c].astype(object).where(d[c].notna(), "")
+              for c in ["sexo", "prematuro", "tipo_muestra"] if c in d.columns}
+    return BarridoUmbral(d["tsh_neonatal"], d["resultado_muestra_2"], grupos)
+
+
+def cargar_barrido(selecciones: dict[str, list], banderas: dict[str, bool],
+                   columnas: list[str] | None = None) -> BarridoUmbral:
+    """
+    Barrido de umbral (utils.umbral) de las filas que pasan los filtros.
+    Se ordena una vez por estado de filtros; mover el slider solo consulta.
+    `columnas`: las mismas de cargar_motor_filtros, para compartir el motor.
+    """
+    return _barrido(version_registros(), tuple(columnas or ()), *_clave_filtros(selecciones, banderas))
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _tendencia_peso(version: str, columnas: tuple, selecciones: tuple,
+                    banderas: tuple) -> tuple[float, float] | None:
+    motor = _motor(version, columnas)
+    d = motor.tomar(motor.mascara(dict(selecciones), dict(banderas)), ["peso", "tsh_neonatal"])
+    if "peso" not in d.columns:
+        return None
+    d = d[(d["peso"] > 0) & (d["tsh_neonatal"] > 0)]
+    return ajustar_tendencia(d["peso"] / 1000, d["tsh_neonatal"])
+
+
+def cargar_tendencia_peso(selecciones: dict[str, list], banderas: dict[str, bool],
+                          columnas: list[str] | None = None):
+    """
+    Recta peso (kg) vs TSH de las filas filtradas; se ajusta una vez por estado
+    de filtros. `columnas` como en cargar_barrido (deben incluir "peso").
+    """
+    return _tendencia_peso(version_registros(), tuple(columnas or ()), *_clave_filtros(selecciones, banderas))
+
+
+@st.cache_resource(max_entries=1, show_spinner="Indexando registros…")
+def _indice(version: str) -> IndiceBusqueda:
+    return IndiceBusqueda(leer_registros())
+
+
+def cargar_indice_busqueda() -> IndiceBusqueda:
+    """Índice de búsqueda de pacientes (utils.busqueda) de la versión vigente del registro."""
+    return _indice(version_registros())
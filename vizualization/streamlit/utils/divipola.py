@@ -0,0 +1,124 @@
+# utils/divipola.py
+# ─── Índice DIVIPOLA (departamentos y municipios DANE) ───────────────────────
+#
+# municipios.csv se lee una sola vez por proceso (get_divipola, lru_cache) con
+# el parser C de pandas y se compila en diccionarios: código → nombre,
+# nombre → código y departamento → municipios ya ordenados. Cada interacción
+# de la cascada del Formulario es una consulta O(1), sin recorrer la tabla.
+#
+# Las búsquedas por nombre no distinguen mayúsculas, tildes ni espacios
+# repetidos ("Bogotá, d.c." == "BOGOTA, D.C.").
+
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+from utils.constantes import CSV_MUNICIPIOS
+
+COLUMNAS_DIVIPOLA = ["cod_depto", "nombre_depto", "cod_municipio", "nombre_municipio",
+                     "lat", "lon"]
+
+
+def clave(texto) -> str:
+    """Clave de búsqueda: sin tildes, en mayúsculas y con espacios normalizados."""
+    s = unicodedata.normalize("NFKD", str(texto))
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return " ".join(s.upper().split())
+
+
+def detectar_separador(path: str) -> str:
+    """"," o ";" según el encabezado (evita el parser lento de sep=None)."""
+    with open(path, encoding="utf-8-sig") as f:
+        encabezado = f.readline()
+    return ";" if encabezado.count(";") > encabezado.count(",") else ","
+
+
+def leer_divipola(path: str = CSV_MUNICIPIOS) -> pd.DataFrame:
+    """
+    Tabla normalizada de municipios.csv con COLUMNAS_DIVIPOLA (códigos con
+    ceros a la izquierda; lat/lon float, NaN si el archivo no las trae).
+    """
+    df = pd.read_csv(path, dtype=str, sep=detectar_separador(path), encoding="utf-8-sig")
+    cols = {clave(c).lower(): c for c in df.columns}
+
+    def buscar(*partes):
+        return next((c for k, c in cols.items() if all(p in k for p in partes)), None)
+
+    origen = {
+        "cod_depto":        buscar("codigo", "departamento"),
+        "nombre_depto":     buscar("nombre", "departamento"),
+        "cod_municipio":    buscar("codigo", "municipio"),
+        "nombre_municipio": buscar("nombre", "municipio"),
+        "lat":              buscar("latitud"),
+        "lon":              buscar("longitud"),
+    }
+    out = pd.DataFrame({k: df[c].str.strip() if c else None for k, c in origen.items()})
+    out = out.dropna(subset=["cod_depto", "nombre_depto", "cod_municipio", "nombre_municipio"])
+    out["cod_depto"]     = out["cod_depto"].str.zfill(2)
+    out["cod_municipio"] = out["cod_municipio"].str.zfill(5)
+    for c in ["lat", "lon"]:
+        out[c] = pd.to_numeric(out[c].astype(str).str.replace(",", ".", regex=False), errors="coerce")
+    return out.reset_index(drop=True)[COLUMNAS_DIVIPOLA]
+
+
+class Divipola:
+    """Diccionarios de consulta construidos a partir de leer_divipola()."""
+
+    def __init__(self, tabla: pd.DataFrame):
+        self.tabla = tabla
+        deptos = tabla[["cod_depto", "nombre_depto"]].drop_duplicates("cod_depto")
+        self.departamentos: list[dict] = sorted(
+            ({"cod": c, "nombre": n} for c, n in deptos.itertuples(index=False)),
+            key=lambda d: clave(d["nombre"]),
+        )
+        self._nombre_depto = {d["cod"]: d["nombre"] for d in self.departamentos}
+        self._cod_depto    = {clave(d["nombre"]): d["cod"] for d in self.departamentos}
+
+        self._nombre_mun: dict[str, str] = {}
+        self._depto_mun:  dict[str, str] = {}
+        self._cod_mun:    dict[tuple[str, str], str] = {}
+        self._municipios: dict[str, list[dict]] = {}
+        for cd, cm, nm in tabla[["cod_depto", "cod_municipio", "nombre_municipio"]].itertuples(index=False):
+            self._nombre_mun[cm] = nm
+            self._depto_mun[cm]  = cd
+            self._cod_mun[(cd, clave(nm))] = cm
+            self._municipios.setdefault(cd, []).append({"cod": cm, "nombre": nm})
+        for lista in self._municipios.values():
+            lista.sort(key=lambda m: clave(m["nombre"]))
+
+    def __bool__(self) -> bool:
+        return bool(self.departamentos)
+
+    def nombre_departamento(self, cod: str) -> str:
+        return self._nombre_depto.get(str(cod).zfill(2), "")
+
+    def cod_departamento(self, nombre: str) -> str:
+        return self._cod_depto.get(clave(nombre), "")
+
+    def nombre_municipio(self, cod: str) -> str:
+        return self._nombre_mun.get(str(cod).zfill(5), "")
+
+    def departamento_de(self, cod_municipio: str) -> str:
+        """Código de departamento al que pertenece un municipio."""
+        return self._depto_mun.get(str(cod_municipio).zfill(5), "")
+
+    def cod_municipio(self, nombre: str, cod_depto: str) -> str:
+        """Código del municipio `nombre` dentro del departamento (los nombres se repiten entre departamentos)."""
+        return self._cod_mun.get((str(cod_depto).zfill(2), clave(nombre)), "")
+
+    def municipios(self, cod_depto: str) -> list[dict]:
+        """Municipios {cod, nombre} del departamento, ordenados por nombre."""
+        if not cod_depto:
+            return []
+        return self._municipios.get(str(cod_depto).zfill(2), [])
+
+
+@lru_cache(maxsize=4)
+def get_divipola(path: str = CSV_MUNICIPIOS) -> Divipola:
+    """Índice compartido por el proceso; vacío si municipios.csv no existe."""
+    try:
+        tabla = leer_divipola(path)
+    except FileNotFoundError:
+        tabla = pd.DataFrame(columns=COLUMNAS_DIVIPOLA)
+    return Divipola(tabla)
@@ -0,0 +1,73 @@
+# utils/exportar.py
+# ─── Exportación de tablas por bloques (CSV, CSV gzip, Parquet) ──────────────
+#
+# Las páginas no arman el archivo en cada rerun: st.download_button recibe
+# una función que llama a exportar() solo cuando el usuario hace clic. El
+# archivo se escribe por bloques de filas (CSV por trozos, Parquet por row
+# groups) a un archivo temporal en disco, comprimido si se pide, sin pasar
+# por un único string ni un buffer en memoria con todo el contenido.
+#
+# Streamlit lee ese archivo completo a bytes para servir la descarga (su
+# gestor de medios no transmite desde disco): en memoria queda una sola copia
+# del archivo final, no además la de construirlo.
+#
+# Sin pyarrow, Parquet no aparece en FORMATOS.
+
+import gzip
+import io
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+BLOQUE_EXPORT = 20_000
+
+# Formato → (extensión, tipo MIME)
+FORMATOS = {
+    "CSV":      (".csv", "text/csv"),
+    "CSV gzip": (".csv.gz", "application/gzip"),
+}
+if pq is not None:
+    FORMATOS["Parquet"] = (".parquet", "application/vnd.apache.parquet")
+
+
+def escribir(df: pd.DataFrame, formato: str, destino, bloque: int = BLOQUE_EXPORT):
+    """Escribe `df` en `destino` (archivo binario abierto) por bloques de `bloque` filas."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato!r} (disponibles: {', '.join(FORMATOS)})")
+    if formato == "Parquet":
+        esquema = pa.Schema.from_pandas(df, preserve_index=False)   # el mismo en todos los bloques
+        with pq.ParquetWriter(destino, esquema, compression="zstd") as w:
+            for i in range(0, len(df), bloque):
+                w.write_table(pa.Table.from_pandas(df.iloc[i:i + bloque], schema=esquema,
+                                                   preserve_index=False))
+        return
+    salida = gzip.GzipFile(fileobj=destino, mode="wb") if formato == "CSV gzip" else destino
+    try:
+        for i in range(0, max(len(df), 1), bloque):
+            trozo = df.iloc[i:i + bloque].to_csv(index=False, header=i == 0)
+            salida.write(trozo.encode("utf-8"))
+    finally:
+        if salida is not destino:
+            salida.close()                         # cierra el gzip, no el destino
+
+
+def exportar(df: pd.DataFrame, formato: str = "CSV") -> io.RawIOBase:
+    """
+    Archivo temporal (se borra al cerrarse) con `df` en `formato`, rebobinado y
+    listo para st.download_button (data=lambda: exportar(...)).
+    """
+    # Sin buffer de Python: st.download_button acepta io.RawIOBase, no BufferedRandom
+    archivo = tempfile.TemporaryFile(buffering=0)
+    try:
+        escribir(df, formato, archivo)
+    except BaseException:
+        archivo.close()
+        raise
+    archivo.seek(0)
+    return archivo
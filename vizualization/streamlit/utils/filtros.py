@@ -0,0 +1,82 @@
+# utils/filtros.py
+# ─── Motor de filtros por máscaras para el sidebar del dashboard ─────────────
+#
+# Se construye una vez por versión del registro: cada columna filtrable queda
+# como un array de códigos enteros (pd.factorize) y cada bandera como un array
+# bool. Un filtro "isin" es una tabla de búsqueda sobre los códigos, los
+# filtros se combinan con & en un único array y al final se hace un solo take
+# de las columnas que se van a graficar (nada de copias intermedias).
+
+import numpy as np
+import pandas as pd
+
+from utils.constantes import TSH_CORTE
+
+# Columnas del registro que lee motor_registros (filtros y barrido de umbral)
+COLUMNAS_MOTOR = ["fecha_nacimiento", "sexo", "tipo_muestra", "nombre_departamento",
+                  "departamento", "cod_municipio", "prematuro", "tsh_neonatal",
+                  "resultado_muestra_2"]
+
+
+class MotorFiltros:
+    def __init__(self, df: pd.DataFrame, categorias: dict[str, pd.Series],
+                 banderas: dict[str, pd.Series]):
+        self.df = df
+        self.n  = len(df)
+        self._codigos:    dict[str, np.ndarray] = {}
+        self._categorias: dict[str, pd.Index]   = {}
+        for nombre, serie in categorias.items():
+            codigos, cats = pd.factorize(serie, sort=True)   # -1 = vacío
+            self._codigos[nombre]    = codigos
+            self._categorias[nombre] = cats
+        self._banderas = {nombre: np.asarray(s, dtype=bool) for nombre, s in banderas.items()}
+
+    def valores(self, nombre: str) -> list:
+        """Valores posibles (ordenados) de un filtro; [] si la columna no existe."""
+        cats = self._categorias.get(nombre)
+        return [] if cats is None else cats.tolist()
+
+    def mascara(self, selecciones: dict[str, list] | None = None,
+                banderas: dict[str, bool] | None = None) -> np.ndarray:
+        """
+        Máscara combinada. `selecciones` {filtro: valores permitidos}; una lista
+        vacía no filtra. `banderas` {bandera: True/False} exige ese valor.
+        """
+        m = np.ones(self.n, dtype=bool)
+        for nombre, sel in (selecciones or {}).items():
+            if not sel or nombre not in self._codigos:
+                continue
+            idx = self._categorias[nombre].get_indexer(sel)
+            lut = np.zeros(len(self._categorias[nombre]) + 1, dtype=bool)  # último: código -1
+            lut[idx[idx >= 0]] = True
+            m &= lut[self._codigos[nombre]]
+        for nombre, valor in (banderas or {}).items():
+            b = self._banderas[nombre]
+            m &= b if valor else ~b
+        return m
+
+    def tomar(self, mascara: np.ndarray, columnas: list[str]) -> pd.DataFrame:
+        """Un solo take de las filas seleccionadas, solo con `columnas` existentes."""
+        cols = [c for c in columnas if c in self.df.columns]
+        if mascara.all():
+            return self.df[cols]
+        return self.df[cols].take(np.flatnonzero(mascara))
+
+
+def motor_registros(df: pd.DataFrame) -> MotorFiltros:
+    """Motor con los filtros del dashboard sobre el registro tipado (utils.datos)."""
+    categorias = {"año": df["fecha_nacimiento"].dt.year.astype("Int64")}
+    for nombre, cols in [("sexo", ["sexo"]), ("tipo_muestra", ["tipo_muestra"]),
+                         ("departamento", ["nombre_departamento", "departamento"]),
+                         ("municipio", ["cod_municipio"])]:
+        col = next((c for c in cols if c in df.columns), None)
+        if col:
+            categorias[nombre] = df[col].astype(object).where(df[col].notna() & (df[col] != ""))
+    tsh1 = df["tsh_neonatal"]
+    banderas = {
+        "prematuro":  df["prematuro"],
+        "sospecha":   tsh1 >= TSH_CORTE,
+        "confirmado": (tsh1 >= TSH_CORTE) & (df["resultado_muestra_2"] >= TSH_CORTE),
+        "pendiente":  tsh1 == 0,
+    }
+    return MotorFiltros(df, categorias, banderas)
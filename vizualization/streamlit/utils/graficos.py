@@ -12,7 +12,8 @@ import plotly.graph_objects as go
 import folium
 from streamlit_folium import st_folium
 
-from utils.constantes import TSH_CORTE
+from utils.constantes import MAX_PUNTOS_SCATTER, TSH_CORTE, TSH_MAX, TSH_MIN
+from utils.mapa import casos_por_municipio, geojson_casos
 
 # ── Paleta compartida ─────────────────────────────────────────────────────────
 COLOR_NORMAL    = "#4682B4"
@@ -20,19 +21,140 @@ COLOR_SOSPECHA  = "#FFA500"
 COLOR_CONFIRMADO= "#FF4500"
 COLOR_TSH       = "#3CB371"
 
+# Bins fijos de TSH, espaciados en escala log entre TSH_MIN y TSH_MAX
+BORDES_TSH = np.geomspace(TSH_MIN, TSH_MAX, 41)
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # RESUMEN EJECUTIVO
 # ══════════════════════════════════════════════════════════════════════════════
 
-def fig_embudo_diagnostico(df: pd.DataFrame) -> go.Figure:
+def _barras_tsh(valores, color: str, nombre: str = "Registros") -> go.Bar | None:
+    """
+    Histograma de TSH calculado aquí con np.histogram sobre BORDES_TSH: a
+    Plotly solo llegan las alturas de las barras. El eje x va en log10 (ver
+    _eje_log_tsh). Sin valores (> 0) retorna None.
+    """
+    v = np.asarray(valores, dtype=float)
+    v = np.clip(v[v > 0], TSH_MIN, TSH_MAX)
+    if v.size == 0:
+        return None
+    conteos, bordes = np.histogram(v, bins=BORDES_TSH)
+    no_vacios = np.flatnonzero(conteos)
+    i, j = no_vacios[0], no_vacios[-1] + 1                 # sin colas vacías
+    log_b = np.log10(bordes[i:j + 1])
+    return go.Bar(
+        x=(log_b[:-1] + log_b[1:]) / 2, y=conteos[i:j], width=np.diff(log_b),
+        customdata=np.column_stack([bordes[i:j], bordes[i + 1:j + 1]]),
+        hovertemplate="%{customdata[0]:.2f}–%{customdata[1]:.2f} mIU/L: %{y}<extra></extra>",
+        marker_color=color, name=nombre,
+    )
+
+
+def _eje_log_tsh(fig: go.Figure, titulo: str = "TSH (mIU/L)"):
+    """Marcas del eje x (en log10) rotuladas en mIU/L."""
+    marcas = [0.1, 0.5, 1, 2, 5, 10, 15, 20, 50, 100, 300]
+    fig.update_xaxes(title=titulo, tickvals=np.log10(marcas), ticktext=[str(m) for m in marcas])
+
+
+def resumen_cinco(valores) -> dict | None:
+    """
+    Cinco números de un boxplot: bigotes (Tukey, 1.5·IQR sobre datos reales),
+    cuartiles y mediana, más n. None si no hay valores.
+    """
+    v = np.sort(np.asarray(valores, dtype=float))
+    if v.size == 0:
+        return None
+    q1, mediana, q3 = np.quantile(v, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    return {
+        "n":       int(v.size),
+        "min":     float(v[np.searchsorted(v, q1 - 1.5 * iqr, side="left")]),
+        "q1":      float(q1),
+        "mediana": float(mediana),
+        "q3":      float(q3),
+        "max":     float(v[np.searchsorted(v, q3 + 1.5 * iqr, side="right") - 1]),
+    }
+
+
+def _fig_cajas_tsh(df: pd.DataFrame, grupo: str, titulo: str,
+                   tsh_umbral: float) -> tuple[go.Figure, float]:
+    """Boxplots de TSH 1ª por `grupo` desde resúmenes precalculados. Retorna (fig, máx. bigote)."""
+    d = df[df["tsh_neonatal"] > 0]
+    fig = go.Figure()
+    tope = 0.0
+    for i, (etiqueta, serie) in enumerate(d.groupby(grupo, observed=True, sort=True)["tsh_neonatal"]):
+        r = resumen_cinco(serie.to_numpy())
+        if r is None:
+            continue
+        tope = max(tope, r["max"])
+        fig.add_trace(go.Box(
+            x=[str(etiqueta)], q1=[r["q1"]], median=[r["mediana"]], q3=[r["q3"]],
+            lowerfence=[r["min"]], upperfence=[r["max"]], name=str(etiqueta),
+            marker_color=px.colors.qualitative.Plotly[i % len(px.colors.qualitative.Plotly)],
+            hovertext=f"n = {r['n']:,}",
+        ))
+    fig.update_layout(title=titulo, xaxis_title=grupo, yaxis_title="TSH (mIU/L)")
+    fig.add_hline(y=tsh_umbral, line_dash="dash", line_color="red",
+                  annotation_text=f"Umbral: {tsh_umbral}")
+    return fig, tope
+
+
+def _trazas_dispersion(x, y, confirmado, max_puntos: int = MAX_PUNTOS_SCATTER,
+                       nbins: int = 80) -> list:
+    """
+    Trazas de un scatter coloreado por confirmación. Hasta `max_puntos` se
+    dibuja cada punto; por encima, los no confirmados pasan a una densidad 2D
+    calculada aquí (np.histogram2d, recortada al p99.5) y los confirmados se
+    dibujan siempre todos, en WebGL.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    conf = np.asarray(confirmado, dtype=bool)
+    m_conf = dict(color=COLOR_CONFIRMADO, size=7)
+    if len(x) <= max_puntos:
+        return [
+            go.Scatter(x=x[~conf], y=y[~conf], mode="markers", name="No confirmado",
+                       marker=dict(color=COLOR_NORMAL, opacity=0.7)),
+            go.Scatter(x=x[conf], y=y[conf], mode="markers", name="Confirmado", marker=m_conf),
+        ]
+    trazas = [go.Scattergl(x=x[conf], y=y[conf], mode="markers", name="Confirmado", marker=m_conf)]
+    validos = ~conf & np.isfinite(x) & np.isfinite(y)
+    xs, ys = x[validos], y[validos]
+    if xs.size == 0:                               # todos confirmados (o sin valores)
+        return trazas
+    rango = [[xs.min(), np.quantile(xs, 0.995)], [ys.min(), np.quantile(ys, 0.995)]]
+    h, xe, ye = np.histogram2d(xs, ys, bins=nbins, range=rango)
+    return [
+        go.Heatmap(x=(xe[:-1] + xe[1:]) / 2, y=(ye[:-1] + ye[1:]) / 2,
+                   z=np.where(h.T > 0, h.T, np.nan), colorscale="Blues",
+                   name="No confirmado", colorbar=dict(title="Registros"),
+                   hovertemplate="x=%{x:.2f}<br>y=%{y:.2f}<br>registros=%{z}<extra></extra>"),
+        *trazas,
+    ]
+
+
+def ajustar_tendencia(x, y) -> tuple[float, float] | None:
+    """Recta de mínimos cuadrados (pendiente, intercepto); None con menos de 2 puntos."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    pendiente, intercepto = np.polyfit(x, y, 1)
+    return float(pendiente), float(intercepto)
+
+
+def _sin_vacios(agg: pd.DataFrame, col: str) -> pd.DataFrame:
+    """Grupos de `agg` con valor en `col` (los agregados usan "" para vacío)."""
+    return agg[agg[col] != ""]
+
+
+def fig_embudo_diagnostico(agg: pd.DataFrame) -> go.Figure:
     """
     Pirámide/embudo: Tamizados → Sospechosos → Confirmados.
-    Usa el DataFrame completo (sin filtrar) para mostrar totales reales.
+    Usa los agregados completos (sin filtrar) para mostrar totales reales.
     """
-    total = df.shape[0]
-    sosp  = int(df["sospecha_hipotiroidismo"].sum())
-    conf  = int(df["confirmado_hipotiroidismo"].sum())
+    total = int(agg["n"].sum())
+    sosp  = int(agg["sospechosos"].sum())
+    conf  = int(agg["confirmados"].sum())
 
     fig = go.Figure(go.Funnel(
         y=["Tamizados", f"TSH ≥ {TSH_CORTE}", "Confirmados"],
@@ -44,13 +166,10 @@ def fig_embudo_diagnostico(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def fig_distribucion_sexo(df: pd.DataFrame) -> go.Figure:
-    """Barras agrupadas: Normal vs Hipotiroidismo por sexo."""
-    sc = df.groupby(["sexo", "confirmado_hipotiroidismo"]).size().unstack(fill_value=0)
-    for v in [False, True]:
-        if v not in sc.columns:
-            sc[v] = 0
-    sc.columns = ["Normal", "Hipotiroidismo"]
+def fig_distribucion_sexo(agg: pd.DataFrame) -> go.Figure:
+    """Barras agrupadas: Normal vs Hipotiroidismo por sexo (desde agregados)."""
+    sc = _sin_vacios(agg, "sexo").groupby("sexo")[["n", "confirmados"]].sum()
+    sc = pd.DataFrame({"Normal": sc["n"] - sc["confirmados"], "Hipotiroidismo": sc["confirmados"]})
     return px.bar(
         sc.reset_index(), x="sexo", y=["Normal", "Hipotiroidismo"],
         barmode="group", title="Distribución por Sexo",
@@ -58,15 +177,10 @@ def fig_distribucion_sexo(df: pd.DataFrame) -> go.Figure:
     )
 
 
-def fig_distribucion_prematuridad(df: pd.DataFrame) -> go.Figure:
-    """Barras agrupadas: Normal vs Hipotiroidismo por prematuridad."""
-    pc = df.copy()
-    pc["prematuro"] = pc["prematuro"].fillna(False)
-    pc = pc.groupby(["prematuro", "confirmado_hipotiroidismo"]).size().unstack(fill_value=0)
-    for v in [False, True]:
-        if v not in pc.columns:
-            pc[v] = 0
-    pc.columns = ["Normal", "Hipotiroidismo"]
+def fig_distribucion_prematuridad(agg: pd.DataFrame) -> go.Figure:
+    """Barras agrupadas: Normal vs Hipotiroidismo por prematuridad (desde agregados)."""
+    pc = agg.groupby("prematuro")[["n", "confirmados"]].sum()
+    pc = pd.DataFrame({"Normal": pc["n"] - pc["confirmados"], "Hipotiroidismo": pc["confirmados"]})
     pc = pc.reset_index()
     pc["prematuro"] = pc["prematuro"].map({True: "Prematuro", False: "No Prematuro"})
     return px.bar(
@@ -76,21 +190,33 @@ def fig_distribucion_prematuridad(df: pd.DataFrame) -> go.Figure:
     )
 
 
-def graficar_mapa(df: pd.DataFrame):
-    city_coords = {
-        "Bogota":       [4.6097, -74.0817],
-        "Cundinamarca": [4.7000, -73.8000],
-    }
-    m = folium.Map(location=[4.6097, -74.0817], zoom_start=6, tiles="cartodbpositron")
-    for city, casos in df.groupby("ciudad")["confirmado_hipotiroidismo"].sum().items():
-        if city in city_coords:
-            folium.Marker(
-                location=city_coords[city],
-                popup=f"<b>{city}</b><br>Confirmados: {int(casos)}",
-                tooltip=city,
-                icon=folium.Icon(color="red", icon="plus-square", prefix="fa"),
-            ).add_to(m)
-    st_folium(m, width=700, height=500)
+def graficar_mapa(agg: pd.DataFrame):
+    """
+    Mapa de Colombia con un círculo por municipio (desde agregados): radio
+    según tamizados, rojo si hay confirmados. Una sola capa GeoJSON.
+    """
+    casos = casos_por_municipio(agg)
+    m = folium.Map(location=[4.5709, -74.2973], zoom_start=5, tiles="cartodbpositron")
+    if not casos.empty:
+        n_max = max(int(casos["n"].max()), 1)
+
+        def estilo(feature):
+            p = feature["properties"]
+            color = COLOR_CONFIRMADO if p["confirmados"] else COLOR_NORMAL
+            return {"radius": 3 + 17 * (p["n"] / n_max) ** 0.5, "color": color,
+                    "fillColor": color, "fillOpacity": 0.6, "weight": 1}
+
+        folium.GeoJson(
+            geojson_casos(casos),
+            name="Casos por municipio",
+            marker=folium.CircleMarker(),
+            style_function=estilo,
+            tooltip=folium.GeoJsonTooltip(
+                fields=["municipio", "departamento", "n", "sospechosos", "confirmados"],
+                aliases=["Municipio", "Departamento", "Tamizados", "Sospechosos", "Confirmados"],
+            ),
+        ).add_to(m)
+    st_folium(m, width=700, height=500, returned_objects=[])
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -98,21 +224,45 @@ def graficar_mapa(df: pd.DataFrame):
 # ══════════════════════════════════════════════════════════════════════════════
 
 def fig_histograma_tsh(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE) -> go.Figure:
-    """Histograma de TSH neonatal con línea de umbral. Recorta outliers al p99."""
-    cap = df["tsh_neonatal"].quantile(0.99)
-    fig = px.histogram(
-        df[df["tsh_neonatal"] <= cap], x="tsh_neonatal", nbins=30,
-        color_discrete_sequence=[COLOR_TSH],
-        labels={"tsh_neonatal": "TSH (mIU/L)"},
-        title="Distribución de TSH Neonatal",
-    )
+    """Histograma de TSH neonatal (bins log precalculados) con línea de umbral."""
+    fig = go.Figure()
+    barras = _barras_tsh(df["tsh_neonatal"], COLOR_TSH)
+    if barras is not None:
+        fig.add_trace(barras)
+    fig.update_layout(title="Distribución de TSH Neonatal", yaxis_title="Registros", bargap=0)
+    _eje_log_tsh(fig)
     fig.add_vline(
-        x=tsh_umbral, line_dash="dash", line_color="red",
+        x=np.log10(tsh_umbral), line_dash="dash", line_color="red",
         annotation_text=f"Umbral: {tsh_umbral}",
     )
     return fig
 
 
+def fig_sensibilidad_umbral(curva: pd.DataFrame, tsh_umbral: float = TSH_CORTE) -> go.Figure:
+    """
+    Sospechosos y confirmados en cada umbral del rango (BarridoUmbral.curva),
+    con la tasa de confirmación en el eje derecho y el umbral actual marcado.
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=curva["umbral"], y=curva["sospechosos"], name="Sospechosos",
+                             mode="lines", line=dict(color=COLOR_SOSPECHA)))
+    fig.add_trace(go.Scatter(x=curva["umbral"], y=curva["confirmados"], name="Confirmados",
+                             mode="lines", line=dict(color=COLOR_CONFIRMADO)))
+    fig.add_trace(go.Scatter(x=curva["umbral"], y=curva["tasa_confirmacion"] * 100,
+                             name="Tasa confirmación (%)", mode="lines", yaxis="y2",
+                             line=dict(color=COLOR_NORMAL, dash="dot")))
+    fig.add_vline(x=tsh_umbral, line_dash="dash", line_color="red",
+                  annotation_text=f"Umbral: {tsh_umbral}")
+    fig.update_layout(
+        title="Sensibilidad al Umbral de TSH",
+        xaxis_title="Umbral TSH (mIU/L)", yaxis_title="Casos",
+        yaxis2=dict(title="Tasa confirmación (%)", overlaying="y", side="right",
+                    range=[0, 100], showgrid=False),
+        legend=dict(orientation="h", y=-0.2),
+    )
+    return fig
+
+
 def fig_scatter_tsh1_vs_tsh2(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE) -> go.Figure | None:
     """
     Scatter TSH 1ª vs TSH 2ª muestra, coloreado por confirmación.
@@ -122,13 +272,10 @@ def fig_scatter_tsh1_vs_tsh2(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE) ->
     d = d[d["resultado_muestra_2"] > 0]
     if d.empty:
         return None
-    fig = px.scatter(
-        d, x="tsh_neonatal", y="resultado_muestra_2",
-        color="confirmado_hipotiroidismo",
-        color_discrete_map={True: COLOR_CONFIRMADO, False: COLOR_NORMAL},
-        title="TSH 1ª vs 2ª Muestra",
-        labels={"tsh_neonatal": "TSH 1ª (mIU/L)", "resultado_muestra_2": "TSH 2ª (mIU/L)"},
-    )
+    fig = go.Figure(_trazas_dispersion(d["tsh_neonatal"], d["resultado_muestra_2"],
+                                       d["confirmado_hipotiroidismo"]))
+    fig.update_layout(title="TSH 1ª vs 2ª Muestra",
+                      xaxis_title="TSH 1ª (mIU/L)", yaxis_title="TSH 2ª (mIU/L)")
     fig.add_hline(y=tsh_umbral, line_dash="dash", line_color="red")
     fig.add_vline(x=tsh_umbral, line_dash="dash", line_color="red")
     return fig
@@ -136,24 +283,15 @@ def fig_scatter_tsh1_vs_tsh2(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE) ->
 
 def fig_boxplot_tsh_sexo(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE) -> go.Figure:
     """Boxplot TSH por sexo."""
-    fig = px.box(df, x="sexo", y="tsh_neonatal", color="sexo",
-                 points="outliers", title="TSH por Sexo",
-                 labels={"tsh_neonatal": "TSH (mIU/L)"})
-    fig.add_hline(y=tsh_umbral, line_dash="dash", line_color="red",
-                  annotation_text=f"Umbral: {tsh_umbral}")
+    fig, _ = _fig_cajas_tsh(df, "sexo", "TSH por Sexo", tsh_umbral)
     fig.update_yaxes(range=[0, 40])
     return fig
 
 
 def fig_boxplot_tsh_prematuridad(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE) -> go.Figure:
     """Boxplot TSH por prematuridad."""
-    ymax = max(30, df["tsh_neonatal"].quantile(0.95)) if not df.empty else 30
-    fig = px.box(df, x="prematuro", y="tsh_neonatal", color="prematuro",
-                 points="outliers", title="TSH por Prematuridad",
-                 labels={"tsh_neonatal": "TSH (mIU/L)"})
-    fig.add_hline(y=tsh_umbral, line_dash="dash", line_color="red",
-                  annotation_text=f"Umbral: {tsh_umbral}")
-    fig.update_yaxes(range=[0, ymax])
+    fig, tope = _fig_cajas_tsh(df, "prematuro", "TSH por Prematuridad", tsh_umbral)
+    fig.update_yaxes(range=[0, max(30, tope)])
     return fig
 
 
@@ -161,25 +299,21 @@ def fig_boxplot_tsh_prematuridad(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE
 # ANÁLISIS TEMPORAL
 # ══════════════════════════════════════════════════════════════════════════════
 
-def fig_evolucion_temporal(df: pd.DataFrame) -> go.Figure | None:
+def fig_evolucion_temporal(agg: pd.DataFrame) -> go.Figure | None:
     """
     Líneas de sospechosos y confirmados por mes, con tasa de confirmación en eje Y2.
-    Retorna None si no hay datos de fecha válidos.
+    Lee los agregados por mes. Retorna None si no hay datos de fecha válidos.
     """
-    if "fecha_nacimiento" not in df.columns or df["fecha_nacimiento"].isna().all():
+    agg = _sin_vacios(agg, "mes")
+    if agg.empty:
         return None
 
-    tmp = df.copy()
-    tmp["año_mes"] = tmp["fecha_nacimiento"].dt.to_period("M")
     temp = (
-        tmp.groupby("año_mes")
-        .agg(
-            sospechosos=("sospecha_hipotiroidismo", "sum"),
-            confirmados=("confirmado_hipotiroidismo", "sum"),
-        )
+        agg.groupby("mes")
+        .agg(sospechosos=("sospechosos", "sum"), confirmados=("confirmados", "sum"))
         .reset_index()
     )
-    temp["año_mes"] = temp["año_mes"].dt.to_timestamp()
+    temp["año_mes"] = pd.to_datetime(temp["mes"], format="%Y-%m")
     temp["tasa"]    = temp["confirmados"] / temp["sospechosos"].replace(0, np.nan)
 
     fig = go.Figure()
@@ -213,35 +347,40 @@ def fig_evolucion_temporal(df: pd.DataFrame) -> go.Figure | None:
 # FACTORES DE RIESGO
 # ══════════════════════════════════════════════════════════════════════════════
 
-def fig_peso_vs_tsh(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE) -> go.Figure | None:
-    """Scatter peso al nacer vs TSH con línea de tendencia."""
+def fig_peso_vs_tsh(df: pd.DataFrame, tsh_umbral: float = TSH_CORTE,
+                    tendencia: tuple[float, float] | None = None) -> go.Figure | None:
+    """
+    Scatter peso al nacer vs TSH. `tendencia` es la recta (pendiente,
+    intercepto) de ajustar_tendencia; la página la calcula y la cachea.
+    """
     if "peso" not in df.columns:
         return None
-    dr = df.copy()
-    dr["peso_kg"] = pd.to_numeric(dr["peso"], errors="coerce") / 1000
-    dr = dr.dropna(subset=["peso_kg", "tsh_neonatal"])
+    dr = df[(df["peso"] > 0) & (df["tsh_neonatal"] > 0)]
     if dr.empty:
         return None
-    fig = px.scatter(
-        dr, x="peso_kg", y="tsh_neonatal",
-        color="confirmado_hipotiroidismo",
-        color_discrete_map={True: COLOR_CONFIRMADO, False: COLOR_NORMAL},
-        title="Peso al Nacer vs TSH",
-        labels={"peso_kg": "Peso (kg)", "tsh_neonatal": "TSH (mIU/L)"},
-        trendline="ols", opacity=0.7,
-    )
+    peso_kg = dr["peso"].to_numpy(dtype=float) / 1000
+    fig = go.Figure(_trazas_dispersion(peso_kg, dr["tsh_neonatal"],
+                                       dr["confirmado_hipotiroidismo"]))
+    if tendencia:
+        pendiente, intercepto = tendencia
+        xs = np.array([peso_kg.min(), peso_kg.max()])
+        fig.add_trace(go.Scatter(x=xs, y=pendiente * xs + intercepto, mode="lines",
+                                 name="Tendencia (MCO)", line=dict(color="black")))
+    fig.update_layout(title="Peso al Nacer vs TSH",
+                      xaxis_title="Peso (kg)", yaxis_title="TSH (mIU/L)")
     fig.add_hline(y=tsh_umbral, line_dash="dash", line_color="red",
                   annotation_text=f"Umbral: {tsh_umbral}")
     return fig
 
 
-def fig_incidencia_por_tipo_muestra(df: pd.DataFrame) -> go.Figure | None:
-    """Barras de incidencia (%) por tipo de muestra."""
-    if "tipo_muestra" not in df.columns or "id" not in df.columns:
+def fig_incidencia_por_tipo_muestra(agg: pd.DataFrame) -> go.Figure | None:
+    """Barras de incidencia (%) por tipo de muestra (desde agregados)."""
+    agg = _sin_vacios(agg, "tipo_muestra")
+    if agg.empty:
         return None
     tm = (
-        df.groupby("tipo_muestra")
-        .agg(total=("id", "count"), conf=("confirmado_hipotiroidismo", "sum"))
+        agg.groupby("tipo_muestra")
+        .agg(total=("n", "sum"), conf=("confirmados", "sum"))
         .reset_index()
     )
     tm["incidencia"] = (tm["conf"] / tm["total"]) * 100
@@ -253,13 +392,14 @@ def fig_incidencia_por_tipo_muestra(df: pd.DataFrame) -> go.Figure | None:
     )
 
 
-def fig_incidencia_por_sexo(df: pd.DataFrame) -> go.Figure | None:
-    """Barras de incidencia (%) por sexo."""
-    if "sexo" not in df.columns or "id" not in df.columns:
+def fig_incidencia_por_sexo(agg: pd.DataFrame) -> go.Figure | None:
+    """Barras de incidencia (%) por sexo (desde agregados)."""
+    agg = _sin_vacios(agg, "sexo")
+    if agg.empty:
         return None
     sx = (
-        df.groupby("sexo")
-        .agg(total=("id", "count"), conf=("confirmado_hipotiroidismo", "sum"))
+        agg.groupby("sexo")
+        .agg(total=("n", "sum"), conf=("confirmados", "sum"))
         .reset_index()
     )
     sx["incidencia"] = (sx["conf"] / sx["total"]) * 100
@@ -276,10 +416,12 @@ def fig_incidencia_por_sexo(df: pd.DataFrame) -> go.Figure | None:
 # ══════════════════════════════════════════════════════════════════════════════
 
 def fig_tsh_confirmados(df: pd.DataFrame) -> go.Figure:
-    """Histograma de TSH 2ª muestra en casos confirmados."""
-    return px.histogram(
-        df, x="resultado_muestra_2", nbins=20,
-        title="Distribución TSH 2ª Muestra (Confirmados)",
-        labels={"resultado_muestra_2": "TSH 2ª (mIU/L)"},
-        color_discrete_sequence=[COLOR_CONFIRMADO],
-    )
+    """Histograma de TSH 2ª muestra en casos confirmados (bins log precalculados)."""
+    fig = go.Figure()
+    barras = _barras_tsh(df["resultado_muestra_2"], COLOR_CONFIRMADO, "Confirmados")
+    if barras is not None:
+        fig.add_trace(barras)
+    fig.update_layout(title="Distribución TSH 2ª Muestra (Confirmados)",
+                      yaxis_title="Registros", bargap=0)
+    _eje_log_tsh(fig, "TSH 2ª (mIU/L)")
+    return fig
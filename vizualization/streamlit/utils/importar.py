@@ -0,0 +1,279 @@
+# utils/importar.py
+# ─── Carga masiva de registros históricos (CSV / Excel) ──────────────────────
+#
+# Desde vizualization/streamlit:
+#     python -m utils.importar ../../data/bd.xlsx
+#     python -m utils.importar lote.csv --rechazos rechazos.csv --simular
+#
+# El archivo se lee por bloques (CSV con chunksize, Excel en modo read_only),
+# los encabezados de la base antigua se traducen con NOMBRES_LEGADOS, cada
+# bloque se normaliza y valida con val_tsh_lote / val_peso_lote (columnas
+# completas, no fila a fila) y se descartan fichas repetidas. Las filas válidas se
+# escriben al final en una sola operación: un bloque de ids reservado de una
+# vez y una única escritura/transacción en el almacén.
+
+import argparse
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.constantes import ESQUEMA, FIELDNAMES, NOMBRES_LEGADOS
+from utils.csv_helpers import fichas_registradas, guardar_registros, reservar_ids
+from utils.divipola import clave, detectar_separador, get_divipola
+from utils.limpieza import limpiar_texto
+from utils.validaciones import (
+    TEXTOS_PESO, TEXTOS_TSH, VACIO, VALIDO, mensajes, val_peso_lote, val_tsh_lote,
+)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+BLOQUE = 50_000
+VERDADEROS = {"VERDADERO", "TRUE", "SI", "S", "1"}
+FALSOS     = {"FALSO", "FALSE", "NO", "N", "0"}
+COLUMNAS_FECHA = [c for c, t in ESQUEMA.items() if t == "fecha"]
+COLUMNAS_BOOL  = [c for c, t in ESQUEMA.items() if t == "bool"]
+# Resultados opcionales en la base histórica: vacío = pendiente
+COLUMNAS_TSH_IMPORTAR = {"tsh_neonatal": "TSH neonatal",
+                         "resultado_muestra_2": "TSH 2ª muestra",
+                         "resultado_rechazada": "TSH muestra rechazada"}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# LECTURA
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _celda(v) -> str:
+    """Valor de Excel como texto: fechas ISO, enteros sin ".0", vacíos como ""."""
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "VERDADERO" if v else "FALSO"
+    if isinstance(v, datetime):
+        return v.date().isoformat() if v.time() == datetime.min.time() else v.isoformat(sep=" ")
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _bloques_excel(path: str, bloque: int, hoja: str | None):
+    if openpyxl is None:
+        raise ImportError("Leer Excel requiere openpyxl (pip install openpyxl)")
+    libro = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        filas = (libro[hoja] if hoja else libro.active).iter_rows(values_only=True)
+        encabezado = [_celda(c).strip() for c in next(filas, [])]
+        buffer = []
+        for fila in filas:
+            buffer.append([_celda(c) for c in fila])
+            if len(buffer) >= bloque:
+                yield pd.DataFrame(buffer, columns=encabezado)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=encabezado)
+    finally:
+        libro.close()
+
+
+def leer_por_bloques(path: str, bloque: int = BLOQUE, hoja: str | None = None):
+    """DataFrames de texto de hasta `bloque` filas, en orden, sin cargar el archivo completo."""
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm"):
+        yield from _bloques_excel(path, bloque, hoja)
+    else:
+        yield from pd.read_csv(path, dtype=str, chunksize=bloque, encoding="utf-8-sig",
+                               keep_default_na=False, sep=detectar_separador(path))
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# NORMALIZACIÓN Y VALIDACIÓN
+# ══════════════════════════════════════════════════════════════════════════════
+
+def mapear_columnas(df: pd.DataFrame) -> pd.DataFrame:
+    """Renombra encabezados antiguos (NOMBRES_LEGADOS, sin importar tildes/mayúsculas) a FIELDNAMES."""
+    legados = {clave(k): v for k, v in NOMBRES_LEGADOS.items()}
+    rename = {}
+    for c in df.columns:
+        if c in FIELDNAMES:
+            continue
+        k = clave(c)
+        if k in legados:
+            rename[c] = legados[k]
+        elif k.lower().replace(" ", "_") in FIELDNAMES:
+            rename[c] = k.lower().replace(" ", "_")
+    return df.rename(columns=rename)
+
+
+def fechas_iso(s: pd.Series) -> pd.Series:
+    """Fechas a ISO (AAAA-MM-DD). Acepta ISO y dd/mm/aaaa; lo que no se entiende queda igual."""
+    f = pd.to_datetime(s, errors="coerce", format="ISO8601")
+    resto = f.isna() & (s != "")
+    if resto.any():
+        f[resto] = pd.to_datetime(s[resto], errors="coerce", format="%d/%m/%Y")
+    return f.dt.strftime("%Y-%m-%d").where(f.notna(), s)
+
+
+def _booleanos(s: pd.Series) -> pd.Series:
+    u = s.str.upper().str.replace("Í", "I", regex=False)
+    valores = np.select([u.isin(list(VERDADEROS)), u.isin(list(FALSOS))], ["VERDADERO", "FALSO"], "")
+    return pd.Series(valores, index=s.index)
+
+
+def _ubicacion(df: pd.DataFrame) -> pd.DataFrame:
+    """Completa códigos y nombres DANE desde los nombres antiguos de ciudad/departamento."""
+    div = get_divipola()
+    if "departamento" in df.columns and not df["cod_departamento"].ne("").any():
+        cods = {n: div.cod_departamento(n) for n in df["departamento"].unique()}
+        df["cod_departamento"] = df["departamento"].map(cods)
+    if "ciudad" in df.columns and not df["cod_municipio"].ne("").any():
+        pares = df[["ciudad", "cod_departamento"]].drop_duplicates().itertuples(index=False)
+        cods = {(c, d): div.cod_municipio(c, d) for c, d in pares}
+        df["cod_municipio"] = [cods[(c, d)] for c, d in zip(df["ciudad"], df["cod_departamento"])]
+    for nombre, cod, fn in [("nombre_departamento", "cod_departamento", div.nombre_departamento),
+                            ("nombre_municipio", "cod_municipio", div.nombre_municipio)]:
+        falta = df[nombre] == ""
+        nombres = {c: fn(c) for c in df.loc[falta, cod].unique()}
+        df.loc[falta, nombre] = df.loc[falta, cod].map(nombres)
+    return df
+
+
+def _validar(s: pd.Series, lote, campo: str, textos: tuple) -> tuple[pd.Series, pd.Series]:
+    """
+    Aplica un validador por lote (val_tsh_lote / val_peso_lote, con sus
+    TEXTOS_TSH / TEXTOS_PESO) a la columna.
+    Retorna (valores normalizados como texto, errores o ""); los vacíos se
+    dejan vacíos (resultado pendiente / dato no registrado).
+    """
+    v, codigos = lote(s)
+    valores = pd.Series(v, index=s.index).astype(str).where(codigos == VALIDO, "")
+    errores = pd.Series(mensajes(codigos, campo, textos), index=s.index).where(codigos != VACIO, "")
+    return valores, errores
+
+
+def normalizar_bloque(df: pd.DataFrame, limpiar: bool = False) -> pd.DataFrame:
+    """
+    Bloque leído → texto con FIELDNAMES (+ columnas antiguas) y una columna
+    `motivo` con el primer error de validación de cada fila ("" si es válida).
+    Con `limpiar` aplica antes las correcciones de fechas y peso de utils.limpieza.
+    """
+    df = mapear_columnas(df).fillna("").astype(str)
+    df = df.apply(lambda s: s.str.strip())
+    for c in FIELDNAMES:
+        if c not in df.columns:
+            df[c] = ""
+    df["ficha_id"] = df["ficha_id"].str.replace(r"\.0$", "", regex=True)
+
+    for c in COLUMNAS_FECHA:
+        df[c] = fechas_iso(df[c])
+    for c in COLUMNAS_BOOL:
+        df[c] = _booleanos(df[c])
+    df["contador"] = df["contador"].replace("", "0")
+    df = _ubicacion(df)
+    if limpiar:
+        df = limpiar_texto(df)
+
+    motivo = pd.Series("", index=df.index)
+    for c, nombre in COLUMNAS_TSH_IMPORTAR.items():
+        df[c], err = _validar(df[c], val_tsh_lote, nombre, TEXTOS_TSH)
+        motivo = motivo.where(motivo != "", err)
+    df["peso"], err = _validar(df["peso"], val_peso_lote, "Peso", TEXTOS_PESO)
+    motivo = motivo.where(motivo != "", err)
+    motivo = motivo.where(motivo != "", df["ficha_id"].eq("").map({True: "Sin número de ficha", False: ""}))
+    df["motivo"] = motivo
+    return df
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# IMPORTACIÓN
+# ══════════════════════════════════════════════════════════════════════════════
+
+def importar_bloques(bloques, simular: bool = False,
+                     limpiar: bool = False) -> tuple[dict, pd.DataFrame]:
+    """
+    Valida y escribe una secuencia de bloques crudos (DataFrames con los
+    encabezados del archivo). Retorna (resumen, filas descartadas con su
+    motivo). Lo usan importar() y la API (utils.api, POST /registros).
+    """
+    registradas = fichas_registradas()
+    vistas: set[str] = set()
+    validas, descartadas = [], []
+    resumen = {"leidas": 0, "importadas": 0, "invalidas": 0,
+               "duplicadas_registro": 0, "duplicadas_archivo": 0}
+    fila_inicial = 2                                # filas como en la hoja (encabezado = 1)
+
+    for crudo in bloques:
+        df = normalizar_bloque(crudo, limpiar)
+        df.insert(0, "fila", range(fila_inicial, fila_inicial + len(df)))
+        fila_inicial += len(df)
+        resumen["leidas"] += len(df)
+
+        fichas = df["ficha_id"].tolist()
+        en_registro = pd.Series([f in registradas for f in fichas], index=df.index) & (df["motivo"] == "")
+        df.loc[en_registro, "motivo"] = "Ficha ya registrada"
+        # Solo cuentan las filas aún válidas: una ficha rechazada no se importa,
+        # así que no vuelve repetida a la siguiente fila con ese número
+        libres = df["motivo"] == ""
+        en_vistas = pd.Series([f in vistas for f in fichas], index=df.index)
+        en_bloque = df.loc[libres, "ficha_id"].duplicated().reindex(df.index, fill_value=False)
+        repetida = (en_vistas | en_bloque) & libres
+        df.loc[repetida, "motivo"] = "Ficha repetida en el archivo"
+        resumen["duplicadas_registro"] += int(en_registro.sum())
+        resumen["duplicadas_archivo"]  += int(repetida.sum())
+
+        ok = df["motivo"] == ""
+        resumen["invalidas"] += int((~ok).sum() - en_registro.sum() - repetida.sum())
+        vistas.update(df.loc[ok, "ficha_id"])
+        validas.append(df.loc[ok, FIELDNAMES])
+        if (~ok).any():
+            descartadas.append(df.loc[~ok])
+
+    lote = pd.concat(validas, ignore_index=True) if validas else pd.DataFrame(columns=FIELDNAMES)
+    if not simular and not lote.empty:
+        primero = reservar_ids(len(lote))
+        lote["id"] = [str(i) for i in range(primero, primero + len(lote))]
+        guardar_registros(lote)
+    resumen["importadas"] = len(lote)
+    rechazadas = pd.concat(descartadas, ignore_index=True) if descartadas else pd.DataFrame()
+    return resumen, rechazadas
+
+
+def importar(path: str, bloque: int = BLOQUE, hoja: str | None = None,
+             simular: bool = False, rechazos: str | None = None,
+             limpiar: bool = False) -> dict:
+    """
+    Importa un archivo histórico al registro. Retorna un resumen con los
+    conteos: leidas, importadas, invalidas, duplicadas_registro, duplicadas_archivo.
+    Con `simular` valida todo pero no escribe. `rechazos`: CSV con las filas
+    descartadas y su motivo. `limpiar`: corrige fechas y pesos (utils.limpieza).
+    """
+    resumen, descartadas = importar_bloques(leer_por_bloques(path, bloque, hoja), simular, limpiar)
+    if rechazos and not descartadas.empty:
+        descartadas.to_csv(rechazos, index=False)
+    return resumen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga masiva de registros históricos")
+    parser.add_argument("archivo", help="CSV o Excel (.xlsx) con la base histórica")
+    parser.add_argument("--hoja", help="Hoja del Excel (por defecto la activa)")
+    parser.add_argument("--bloque", type=int, default=BLOQUE, help="Filas por bloque de lectura")
+    parser.add_argument("--rechazos", help="CSV donde guardar las filas descartadas y su motivo")
+    parser.add_argument("--simular", action="store_true", help="Valida sin escribir en el registro")
+    parser.add_argument("--limpiar", action="store_true",
+                        help="Corrige años de fechas y pesos mal digitados antes de validar")
+    args = parser.parse_args()
+
+    inicio = datetime.now()
+    r = importar(args.archivo, args.bloque, args.hoja, args.simular, args.rechazos, args.limpiar)
+    segundos = (datetime.now() - inicio).total_seconds()
+    accion = "validadas (simulación)" if args.simular else "importadas"
+    print(f"{r['leidas']:,} filas leídas en {segundos:.1f} s — {r['importadas']:,} {accion}")
+    print(f"  inválidas: {r['invalidas']:,} · ya registradas: {r['duplicadas_registro']:,}"
+          f" · repetidas en el archivo: {r['duplicadas_archivo']:,}")
+    if args.rechazos and r["leidas"] > r["importadas"]:
+        print(f"  detalle de descartadas en {args.rechazos}")
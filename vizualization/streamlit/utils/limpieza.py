@@ -0,0 +1,166 @@
+# utils/limpieza.py
+# ─── Limpieza de la base histórica (versión vectorizada del notebook) ────────
+#
+# Mismas reglas que notebooks/hipotiroidismo_congenito.ipynb, pero sobre
+# columnas completas (aritmética de fechas y máscaras) en lugar de iterrows /
+# apply(axis=1). Las funciones reciben el registro tipado (fechas datetime,
+# peso numérico) y retornan una copia corregida.
+#
+# Diferencia deliberada: donde el notebook fallaría con replace(year=...) por
+# una fecha imposible (29 de febrero en año no bisiesto) aquí la fecha se deja
+# como estaba.
+#
+# Comparación con las versiones del notebook: python -m benchmarks.limpieza
+
+import numpy as np
+import pandas as pd
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FECHAS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def con_año(fechas: pd.Series, años) -> pd.Series:
+    """Equivalente vectorizado de fecha.replace(year=año); NaT/NaN y fechas imposibles quedan igual."""
+    años = pd.Series(años, index=fechas.index)
+    nuevas = pd.to_datetime(
+        pd.DataFrame({"year": años, "month": fechas.dt.month, "day": fechas.dt.day}),
+        errors="coerce",
+    ) + (fechas - fechas.dt.normalize())
+    return nuevas.where(nuevas.notna(), fechas).astype(fechas.dtype)
+
+
+def dias_entre(desde: pd.Series, hasta: pd.Series) -> pd.Series:
+    return (hasta - desde).dt.days
+
+
+def corregir_año_resultado(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    fecha_resultado anterior a fecha_toma_muestra → fecha_resultado con el
+    año de la toma. Recalcula dias_pasados.
+    """
+    df = df.copy()
+    neg = dias_entre(df["fecha_toma_muestra"], df["fecha_resultado"]) < 0
+    df.loc[neg, "fecha_resultado"] = con_año(df.loc[neg, "fecha_resultado"],
+                                             df.loc[neg, "fecha_toma_muestra"].dt.year)
+    df["dias_pasados"] = dias_entre(df["fecha_toma_muestra"], df["fecha_resultado"])
+    return df
+
+
+def ajustar_año_toma(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    fecha_toma_muestra con el año de fecha_resultado, salvo cuando el
+    resultado es de enero (la toma puede ser de diciembre del año anterior).
+    Recalcula dias_pasados.
+    """
+    df = df.copy()
+    m = df["fecha_resultado"].notna() & df["fecha_toma_muestra"].notna() \
+        & (df["fecha_resultado"].dt.month != 1)
+    df.loc[m, "fecha_toma_muestra"] = con_año(df.loc[m, "fecha_toma_muestra"],
+                                              df.loc[m, "fecha_resultado"].dt.year)
+    df["dias_pasados"] = dias_entre(df["fecha_toma_muestra"], df["fecha_resultado"])
+    return df
+
+
+def _año_comun(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    Año más frecuente entre tres. Si los tres son distintos se toma el mismo
+    que max(set(años), key=años.count) en el notebook: el primero al recorrer
+    el set, que para enteros cercanos es el de menor año % 8.
+    """
+    distintos = np.stack([a, b, c])
+    primero_set = np.take_along_axis(distintos, np.argmin(distintos % 8, axis=0)[None], 0)[0]
+    return np.where((a == b) | (a == c), a, np.where(b == c, b, primero_set))
+
+
+def corregir_fechas_muestra2(df: pd.DataFrame, max_dias: int = 30) -> pd.DataFrame:
+    """
+    Filas con dias_pasados2 (resultado − toma de la 2ª muestra) negativo o
+    mayor a `max_dias`: las tres fechas de muestra toman el año más común
+    entre ellas y, si el resultado sigue antes de la toma, pasa al año
+    siguiente. Recalcula dias_pasados2.
+    """
+    df = df.copy()
+    cols = ["fecha_toma_muestra", "fecha_toma_muestra_2", "fecha_resultado_muestra_2"]
+    dias = dias_entre(df["fecha_toma_muestra_2"], df["fecha_resultado_muestra_2"])
+    m = ((dias < 0) | (dias > max_dias)) & df[cols].notna().all(axis=1)
+    if m.any():
+        sub = df.loc[m, cols]
+        años = [sub[c].dt.year.to_numpy() for c in cols]
+        comun = _año_comun(*años)
+        for c, año in zip(cols, años):
+            cambiar = año != comun
+            sub.loc[cambiar, c] = con_año(sub.loc[cambiar, c], comun[cambiar])
+        antes = sub["fecha_resultado_muestra_2"] < sub["fecha_toma_muestra_2"]
+        sub.loc[antes, "fecha_resultado_muestra_2"] = con_año(
+            sub.loc[antes, "fecha_resultado_muestra_2"], comun[antes.to_numpy()] + 1)
+        df.loc[m, cols] = sub
+    df["dias_pasados2"] = dias_entre(df["fecha_toma_muestra_2"], df["fecha_resultado_muestra_2"])
+    return df
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PESO Y TELÉFONOS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def convertir_peso(peso: pd.Series) -> pd.Series:
+    """
+    Corrige pesos mal digitados (en gramos, enteros):
+      más de 4 dígitos → los 4 primeros son la parte entera (36701 → 3670)
+      3 dígitos y < 500 → ×10 (120 → 1200)
+      2 dígitos → ×10 si > 50 (80 → 800), si no ×100 (37 → 3700)
+    1 o 4 dígitos, vacíos y valores no enteros quedan igual.
+    """
+    v = pd.to_numeric(peso, errors="coerce").to_numpy(dtype=float)
+    entero = np.isfinite(v) & (v >= 1) & (v == np.floor(v))
+    digitos = np.zeros(len(v), dtype=int)
+    digitos[entero] = np.floor(np.log10(v[entero])).astype(int) + 1
+    with np.errstate(invalid="ignore"):
+        nuevo = np.select(
+            [digitos > 4, (digitos == 3) & (v < 500), (digitos == 2) & (v > 50), digitos == 2],
+            [np.round(v / 10.0 ** (digitos - 4)), v * 10, v * 10, v * 100],
+            v,
+        )
+    return pd.Series(nuevo, index=peso.index).where(entero, peso)
+
+
+def tiene_10_digitos(telefono: pd.Series) -> pd.Series:
+    """True si el número tiene 10 caracteres (como len(str(numero))) o es 0 (sin teléfono)."""
+    if pd.api.types.is_integer_dtype(telefono):
+        v = telefono.to_numpy()
+        return pd.Series((v == 0) | ((v >= 10**9) & (v < 10**10)) | ((v <= -10**8) & (v > -10**9)),
+                         index=telefono.index)
+    t = telefono.astype(str).str.strip()
+    return (t == "0") | (t.str.len() == 10)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PIPELINE
+# ══════════════════════════════════════════════════════════════════════════════
+
+def limpiar(df: pd.DataFrame) -> pd.DataFrame:
+    """Aplica las correcciones en el orden del notebook sobre el registro tipado."""
+    df = corregir_año_resultado(df)
+    df = ajustar_año_toma(df)
+    df = corregir_fechas_muestra2(df)
+    df["peso"] = convertir_peso(df["peso"])
+    return df.drop(columns=["dias_pasados", "dias_pasados2"])
+
+
+def limpiar_texto(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    limpiar() sobre un bloque de texto (carga masiva): convierte solo las
+    columnas implicadas y las devuelve como texto ISO / número.
+    Las celdas que no se pueden interpretar no se tocan.
+    """
+    fechas = ["fecha_toma_muestra", "fecha_resultado", "fecha_toma_muestra_2",
+              "fecha_resultado_muestra_2"]
+    tip = pd.DataFrame({c: pd.to_datetime(df[c], errors="coerce", format="ISO8601") for c in fechas})
+    tip["peso"] = pd.to_numeric(df["peso"], errors="coerce")
+    tip = limpiar(tip)
+    df = df.copy()
+    for c in fechas:
+        df[c] = tip[c].dt.strftime("%Y-%m-%d").where(tip[c].notna(), df[c])
+    cambio = tip["peso"].notna() & (tip["peso"] != pd.to_numeric(df["peso"], errors="coerce"))
+    df.loc[cambio, "peso"] = tip.loc[cambio, "peso"].map(lambda p: str(int(p)))
+    return df
@@ -0,0 +1,53 @@
+# utils/mapa.py
+# ─── Casos por municipio sobre coordenadas DANE (data/municipios.csv) ────────
+#
+# Las coordenadas vienen del índice DIVIPOLA (utils.divipola: una lectura
+# por proceso, coma decimal "-75,581775" ya convertida). Los
+# conteos salen de los agregados (utils.agregados, dimensión "municipio" =
+# cod_municipio), así que el mapa trabaja con ~1.100 municipios como máximo,
+# nunca con una fila por registro.
+
+import pandas as pd
+
+from utils.constantes import CSV_MUNICIPIOS
+from utils.divipola import get_divipola
+
+COLUMNAS_COORDENADAS = ["municipio", "departamento", "lat", "lon"]
+MEDIDAS_MAPA = ["n", "sospechosos", "confirmados"]
+
+
+def coordenadas_municipios(path: str = CSV_MUNICIPIOS) -> pd.DataFrame:
+    """
+    Índice cod_municipio (5 dígitos) → municipio, departamento, lat, lon.
+    Vacío si el archivo no existe o no trae coordenadas.
+    """
+    t = get_divipola(path).tabla.dropna(subset=["lat", "lon"])
+    return (t.rename(columns={"nombre_municipio": "municipio", "nombre_depto": "departamento"})
+             .set_index("cod_municipio")[COLUMNAS_COORDENADAS])
+
+
+def casos_por_municipio(agg: pd.DataFrame) -> pd.DataFrame:
+    """Tamizados, sospechosos y confirmados por municipio, unidos a sus coordenadas."""
+    agg = agg[agg["municipio"] != ""]
+    if agg.empty:
+        return pd.DataFrame(columns=COLUMNAS_COORDENADAS + MEDIDAS_MAPA)
+    conteos = (
+        agg.assign(cod=agg["municipio"].astype(str).str.zfill(5))
+           .groupby("cod")[MEDIDAS_MAPA].sum()
+    )
+    return coordenadas_municipios().join(conteos, how="inner")
+
+
+def geojson_casos(casos: pd.DataFrame) -> dict:
+    """FeatureCollection de puntos (una feature por municipio) con los conteos como propiedades."""
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [f.lon, f.lat]},
+            "properties": {"cod": cod, "municipio": f.municipio, "departamento": f.departamento,
+                           "n": int(f.n), "sospechosos": int(f.sospechosos),
+                           "confirmados": int(f.confirmados)},
+        }
+        for cod, f in zip(casos.index, casos.itertuples(index=False))
+    ]
+    return {"type": "FeatureCollection", "features": features}
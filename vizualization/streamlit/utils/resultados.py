@@ -0,0 +1,225 @@
+# utils/resultados.py
+# ─── Carga de resultados desde el archivo del analizador de TSH ──────────────
+#
+# Desde vizualization/streamlit:
+#     python -m utils.resultados placa.csv --simular --reporte conciliacion.csv
+#
+# El archivo (ficha → TSH, fecha) se valida por columnas (val_tsh_lote,
+# fechas_iso), se cruza con el registro por ficha_id (1ª muestra) o ficha_id_2
+# (2ª muestra) con un merge — un hash join, no una búsqueda por fila — y
+# todas las actualizaciones se escriben con una sola llamada a
+# actualizar_registros: una línea de journal por registro / una transacción.
+# La escritura lleva la version_fila de cada registro leído; si otro operador
+# guardó alguno entre la lectura y la escritura, se vuelve a conciliar contra
+# el registro actual (hasta INTENTOS_CONFLICTO veces).
+#
+# El reporte de conciliación tiene una fila por fila del archivo con su estado:
+#   por actualizar / actualizado, sin cambios, sin coincidencia,
+#   ficha ambigua (la ficha está en más de un registro), repetida en el
+#   archivo, ya tiene resultado (sin `sobrescribir`) o inválida: <motivo>
+# y las marcas requiere_2a (TSH 1ª ≥ TSH_CORTE) y confirma_caso (el registro
+# pasa a confirmado con esta carga).
+
+import argparse
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.constantes import TSH_CORTE
+from utils.csv_helpers import (ConflictoConcurrencia, actualizar_registros, leer_registros,
+                               version_fila)
+from utils.divipola import clave
+from utils.importar import fechas_iso, leer_por_bloques
+from utils.validaciones import TEXTOS_TSH, VALIDO, mensajes, val_tsh_lote
+
+# Columna del reporte → fragmentos que se buscan en los encabezados del analizador
+# (en este orden: "Fecha resultado" es la fecha aunque contenga "resultado")
+COLUMNAS_EXPORT = {
+    "fecha": ("fecha", "date"),
+    "ficha": ("ficha", "muestra", "sample", "codigo"),
+    "tsh":   ("tsh", "resultado", "result", "valor"),
+}
+# Columnas del registro que llena cada muestra
+CAMPOS_MUESTRA = {
+    1: {"tsh": "tsh_neonatal", "fecha": "fecha_resultado"},
+    2: {"tsh": "resultado_muestra_2", "fecha": "fecha_resultado_muestra_2"},
+}
+INTENTOS_CONFLICTO = 3
+
+
+def leer_export(origen) -> pd.DataFrame:
+    """
+    Archivo del analizador (ruta CSV/Excel, archivo subido o DataFrame ya
+    leído, p. ej. el cuerpo de POST /resultados en utils.api) como texto con
+    columnas fila, ficha, tsh, fecha. ValueError si falta alguna columna.
+    """
+    if isinstance(origen, str):
+        df = pd.concat(list(leer_por_bloques(origen)), ignore_index=True)
+    elif isinstance(origen, pd.DataFrame):
+        df = origen.fillna("").astype(str)
+    else:
+        texto = origen.read()
+        if isinstance(texto, bytes):
+            texto = texto.decode("utf-8-sig")
+        encabezado = texto.split("\n", 1)[0]
+        sep = ";" if encabezado.count(";") > encabezado.count(",") else ","
+        df = pd.read_csv(io.StringIO(texto), dtype=str, sep=sep, keep_default_na=False)
+
+    libres = {c: clave(c).lower() for c in df.columns}
+    elegidas = {}
+    for destino, fragmentos in COLUMNAS_EXPORT.items():
+        col = next((c for f in fragmentos for c, k in libres.items() if f in k), None)
+        if col is None:
+            raise ValueError(f"El archivo no tiene columna de {destino} "
+                             f"(encabezados: {', '.join(df.columns)})")
+        elegidas[destino] = col
+        del libres[col]
+
+    out = pd.DataFrame({d: df[c].fillna("").astype(str).str.strip() for d, c in elegidas.items()})
+    out["ficha"] = out["ficha"].str.replace(r"\.0$", "", regex=True)
+    out.insert(0, "fila", range(2, len(out) + 2))                # como en la hoja (encabezado = 1)
+    return out[["fila", "ficha", "tsh", "fecha"]]
+
+
+def _tsh_registro(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s.str.replace(",", ".", regex=False), errors="coerce").fillna(0)
+
+
+def conciliar(export: pd.DataFrame, registros: pd.DataFrame, sobrescribir: bool = False) -> pd.DataFrame:
+    """Reporte de conciliación de `export` (leer_export) contra el registro como texto."""
+    rep = export.copy()
+    tsh, codigos = val_tsh_lote(rep["tsh"])
+    rep["tsh_valor"] = tsh
+    rep["fecha"] = fechas_iso(rep["fecha"])
+    fecha_ok = rep["fecha"].str.fullmatch(r"\d{4}-\d{2}-\d{2}")
+    estado = pd.Series(np.select(
+        [rep["ficha"] == "", codigos != VALIDO, ~fecha_ok],
+        ["inválida: sin ficha", "inválida: " + mensajes(codigos, "TSH", TEXTOS_TSH), "inválida: fecha"],
+        "",
+    ), index=rep.index)
+    valida = estado == ""
+    estado[valida & rep["ficha"].where(valida).duplicated()] = "repetida en el archivo"
+
+    # Hash join ficha → (id, muestra). Una ficha presente en más de un registro es ambigua.
+    reg = registros.fillna("")
+    claves = pd.concat([
+        pd.DataFrame({"ficha": reg[col].astype(str).str.strip(), "id": reg["id"], "muestra": m})
+        for m, col in [(1, "ficha_id"), (2, "ficha_id_2")] if col in reg.columns
+    ])
+    claves = claves[~claves["ficha"].isin(["", "0"])]
+    repetidas = claves["ficha"].duplicated(keep=False)
+    ambiguas = set(claves.loc[repetidas, "ficha"])
+    rep = rep.merge(claves[~repetidas], on="ficha", how="left")
+    estado.index = rep.index
+
+    libre = estado == ""
+    estado[libre & rep["ficha"].isin(ambiguas)] = "ficha ambigua"
+    estado[(estado == "") & rep["id"].isna()] = "sin coincidencia"
+
+    # Valor que ya tiene el registro en la casilla de esa muestra
+    reg_id = reg.set_index("id")
+    actual = pd.Series(0.0, index=rep.index)
+    for m, campos in CAMPOS_MUESTRA.items():
+        en_m = rep["muestra"] == m
+        actual[en_m] = _tsh_registro(reg_id[campos["tsh"]]).reindex(rep.loc[en_m, "id"]).to_numpy()
+    pendiente = estado == ""
+    estado[pendiente & (actual == rep["tsh_valor"])] = "sin cambios"
+    if not sobrescribir:
+        estado[(estado == "") & (actual > 0)] = "ya tiene resultado"
+    estado[estado == ""] = "por actualizar"
+    rep["estado"] = estado
+    rep["muestra"] = rep["muestra"].astype("Int64")
+
+    # Confirmación: TSH 1ª y 2ª ≥ TSH_CORTE después de la carga y no antes
+    act = rep[rep["estado"] == "por actualizar"]
+    ids = act["id"].unique()
+    antes = pd.DataFrame({m: _tsh_registro(reg_id[c["tsh"]]).reindex(ids)
+                          for m, c in CAMPOS_MUESTRA.items()})
+    despues = antes.copy()
+    for m in CAMPOS_MUESTRA:
+        nuevos = act[act["muestra"] == m].set_index("id")["tsh_valor"]
+        despues.loc[nuevos.index, m] = nuevos
+
+    def confirmado(t: pd.DataFrame) -> pd.Series:
+        return (t[1] >= TSH_CORTE) & (t[2] >= TSH_CORTE)
+
+    confirma = despues.index[confirmado(despues) & ~confirmado(antes)]
+    rep["requiere_2a"] = (rep["estado"] == "por actualizar") & (rep["muestra"] == 1) \
+        & (rep["tsh_valor"] >= TSH_CORTE)
+    rep["confirma_caso"] = (rep["estado"] == "por actualizar") & rep["id"].isin(confirma)
+    return rep[["fila", "ficha", "tsh", "fecha", "id", "muestra", "estado",
+                "requiere_2a", "confirma_caso", "tsh_valor"]]
+
+
+def cambios(reporte: pd.DataFrame) -> dict[int, dict]:
+    """{id: campos} a escribir para las filas "por actualizar" (ambas muestras juntas)."""
+    salida: dict[int, dict] = {}
+    act = reporte[reporte["estado"] == "por actualizar"]
+    for id_registro, muestra, valor, fecha in act[["id", "muestra", "tsh_valor", "fecha"]].itertuples(
+            index=False, name=None):
+        campos = CAMPOS_MUESTRA[int(muestra)]
+        c = salida.setdefault(int(id_registro), {})
+        c[campos["tsh"]] = float(valor)
+        c[campos["fecha"]] = fecha
+        if muestra == 2:
+            c["contador"] = "1"
+    return salida
+
+
+def resumir(reporte: pd.DataFrame) -> dict:
+    """Conteos por estado y de casos que requieren 2ª muestra / quedan confirmados."""
+    estados = reporte["estado"].str.replace(r"^inválida: .*", "inválida", regex=True)
+    return {"filas": len(reporte), **estados.value_counts().to_dict(),
+            "requieren_2a": int(reporte["requiere_2a"].sum()),
+            # un caso cuyas dos muestras llegan en el mismo archivo se cuenta una vez
+            "confirmados": int(reporte.loc[reporte["confirma_caso"], "id"].nunique())}
+
+
+def cargar_resultados(origen, simular: bool = False,
+                      sobrescribir: bool = False) -> tuple[pd.DataFrame, dict]:
+    """
+    Lee, concilia y (salvo `simular`) escribe los resultados del archivo en
+    una sola escritura. Retorna (reporte, resumen).
+    """
+    export = leer_export(origen)
+    for intento in range(1, INTENTOS_CONFLICTO + 1):
+        registros = leer_registros()
+        reporte = conciliar(export, registros, sobrescribir)
+        if simular:
+            break
+        nuevos = cambios(reporte)
+        leidos = registros[registros["id"].isin({str(i) for i in nuevos})]
+        try:
+            actualizar_registros(nuevos, {int(r["id"]): version_fila(r)
+                                          for r in leidos.to_dict("records")})
+        except ConflictoConcurrencia:
+            if intento == INTENTOS_CONFLICTO:
+                raise
+            continue
+        reporte["estado"] = reporte["estado"].replace("por actualizar", "actualizado")
+        break
+    return reporte.drop(columns="tsh_valor"), resumir(reporte)
+
+
+if __name__ == "__main__":
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Carga de resultados del analizador de TSH")
+    parser.add_argument("archivo", help="CSV (o Excel) con ficha, TSH y fecha de resultado")
+    parser.add_argument("--simular", action="store_true", help="Concilia sin escribir en el registro")
+    parser.add_argument("--sobrescribir", action="store_true",
+                        help="Reemplaza resultados que ya estaban registrados")
+    parser.add_argument("--reporte", help="CSV donde guardar el reporte de conciliación")
+    args = parser.parse_args()
+
+    inicio = datetime.now()
+    reporte, resumen = cargar_resultados(args.archivo, args.simular, args.sobrescribir)
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"{resumen.pop('filas'):,} filas en {segundos:.1f} s"
+          + (" (simulación)" if args.simular else ""))
+    for estado, n in resumen.items():
+        print(f"  {estado:<24}{n:>8,}")
+    if args.reporte:
+        reporte.to_csv(args.reporte, index=False)
+        print(f"  reporte en {args.reporte}")
@@ -1,34 +1,264 @@
 # utils/sms.py
-# ─── Envío de SMS vía Twilio ──────────────────────────────────────────────────
+# ─── Pasarela de SMS ──────────────────────────────────────────────────────────
+#
+# Un proveedor por proceso (get_proveedor, lru_cache), elegido con
+# SMS_PROVEEDOR:
+#     twilio    un Client de Twilio (credenciales en st.secrets["twilio"])
+#     http      POST JSON a SMS_URL con una sesión requests con pool de conexiones
+#     archivo   una línea JSON por mensaje en SMS_ARCHIVO, sin red
+# El modo prueba usa siempre el proveedor de archivo, que sin SMS_ARCHIVO no
+# escribe nada. El archivo guarda el teléfono enmascarado y el largo del
+# mensaje, nunca el número completo ni el texto. Los proveedores solo saben
+# enviar un mensaje; el resto vive aquí, una sola vez:
+#
+# enviar_lote normaliza los teléfonos a E.164 (+57 por defecto) y reparte los
+# mensajes en un pool de hilos que comparten el proveedor. Una cubeta de
+# fichas limita el ritmo a SMS_POR_SEGUNDO entre todos los hilos y los fallos
+# transitorios (429, 5xx, red) se reintentan con espera exponencial. El
+# progreso se informa desde el hilo que llama, así la página puede actualizar
+# su barra.
+#
+# Las credenciales y SMS_* se leen al crear el proveedor: cambiarlas requiere
+# reiniciar la app.
 
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+
+import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
 
+from utils.constantes import (
+    SMS_ARCHIVO, SMS_POR_SEGUNDO, SMS_PROVEEDOR, SMS_REINTENTOS, SMS_TRABAJADORES, SMS_URL,
+)
 
-def enviar_sms(telefono: str, mensaje: str, test_mode: bool = True) -> tuple[bool, str]:
+PREFIJO_PAIS = "57"
+
+
+class ErrorTransitorio(Exception):
+    """Fallo que vale la pena reintentar (límite de tasa, error del servidor, red)."""
+
+
+class LimiteTasa:
+    """Cubeta de fichas compartida por los hilos: a lo sumo `por_segundo` envíos por segundo."""
+
+    def __init__(self, por_segundo: float):
+        self.tasa   = por_segundo
+        self.fichas = 1.0
+        self.t      = time.monotonic()
+        self._lock  = threading.Lock()
+
+    def esperar(self):
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self.fichas = min(1.0, self.fichas + (ahora - self.t) * self.tasa)
+                self.t = ahora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                falta = (1 - self.fichas) / self.tasa
+            time.sleep(falta)
+
+
+def normalizar_telefono(telefono) -> str:
+    """
+    Número en E.164: "+57 300 123-4567", "573001234567", "0057…" y
+    "3001234567" → "+573001234567". "" si no hay número (vacío o 0).
     """
-    Envía un SMS vía Twilio.
-    - test_mode=True  → simula el envío sin llamar a la API
-    - Credenciales en st.secrets["twilio"]
+    t = str(telefono).strip()
+    digitos = re.sub(r"\D", "", t)
+    if not digitos.strip("0"):
+        return ""
+    if t.startswith("+"):
+        return "+" + digitos
+    if digitos.startswith("00"):
+        return "+" + digitos[2:]
+    if len(digitos) == 12 and digitos.startswith(PREFIJO_PAIS):
+        return "+" + digitos
+    return "+" + PREFIJO_PAIS + digitos
 
-    Retorna (éxito: bool, estado: str)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PROVEEDORES
+# ══════════════════════════════════════════════════════════════════════════════
+
+class ProveedorTwilio:
+    """Un Client por proceso (su sesión HTTP reutiliza conexiones)."""
+
+    def __init__(self):
+        from twilio.base.exceptions import TwilioRestException
+        from twilio.rest import Client
+        self._excepcion = TwilioRestException
+        self.cliente = Client(st.secrets["twilio"]["account_sid"], st.secrets["twilio"]["auth_token"])
+        self.origen  = st.secrets["twilio"]["from_phone_number"]
+
+    def enviar(self, telefono: str, mensaje: str) -> str:
+        try:
+            msg = self.cliente.messages.create(body=mensaje, from_=self.origen, to=telefono)
+        except self._excepcion as e:
+            if e.status == 429 or e.status >= 500:
+                raise ErrorTransitorio(str(e)) from e
+            raise
+        return f"Enviado — SID: {msg.sid}"
+
+
+class ProveedorHTTP:
+    """POST {"to", "body"} a `url`; la respuesta puede traer {"sid"}."""
+
+    def __init__(self, url: str, conexiones: int):
+        self.url = url
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=conexiones)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+
+    def enviar(self, telefono: str, mensaje: str) -> str:
+        try:
+            r = self.sesion.post(self.url, json={"to": telefono, "body": mensaje}, timeout=10)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise ErrorTransitorio(str(e)) from e
+        if r.status_code == 429 or r.status_code >= 500:
+            raise ErrorTransitorio(f"HTTP {r.status_code}")
+        r.raise_for_status()
+        return f"Enviado — SID: {r.json().get('sid', '—')}"
+
+
+def enmascarar_telefono(telefono: str) -> str:
+    """"+573001234567" → "+57300*****67": alcanza para cuadrar envíos sin exponer el número."""
+    t = str(telefono)
+    if len(t) <= 8:
+        return "*" * len(t)
+    return t[:6] + "*" * (len(t) - 8) + t[-2:]
+
+
+class ProveedorArchivo:
+    """
+    No envía: con `path`, agrega una línea JSON por mensaje (fecha, teléfono
+    enmascarado y número de caracteres); sin `path` no escribe nada. Modo
+    prueba y pruebas de carga.
     """
-    if not telefono.strip():
-        return False, "Teléfono vacío"
 
-    if not telefono.startswith("+"):
-        telefono = "+57" + telefono.strip()
+    def __init__(self, path: str = "", simulado: bool = True):
+        self.path = path
+        self.simulado = simulado
+        self._lock = threading.Lock()
+
+    def enviar(self, telefono: str, mensaje: str) -> str:
+        oculto = enmascarar_telefono(telefono)
+        if self.path:
+            linea = json.dumps({"fecha": datetime.now().isoformat(timespec="seconds"),
+                                "to": oculto, "caracteres": len(mensaje)}, ensure_ascii=False)
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(linea + "\n")
+        if self.simulado:
+            return f"[SIMULADO] → {oculto}"
+        return f"Escrito en {self.path}"
+
+
+def proveedor_configurado() -> bool:
+    """Si SMS_PROVEEDOR tiene lo que necesita para enviar de verdad (URL o credenciales)."""
+    if SMS_PROVEEDOR == "http":
+        return bool(SMS_URL)
+    if SMS_PROVEEDOR == "archivo":
+        return bool(SMS_ARCHIVO)
+    if SMS_PROVEEDOR == "twilio":
+        try:
+            return "twilio" in st.secrets
+        except Exception:                           # sin secrets.toml
+            return False
+    return False
 
+
+@lru_cache(maxsize=4)
+def get_proveedor(test_mode: bool = True, conexiones: int = SMS_TRABAJADORES):
+    """
+    Proveedor compartido por el proceso. KeyError si faltan las credenciales
+    de Twilio (FileNotFoundError si no hay secrets.toml), ImportError sin el
+    paquete twilio, ValueError si SMS_PROVEEDOR es desconocido o es "archivo"
+    sin SMS_ARCHIVO.
+    """
     if test_mode:
-        return True, f"[SIMULADO] → {telefono}: {mensaje[:60]}..."
+        return ProveedorArchivo(SMS_ARCHIVO)
+    if SMS_PROVEEDOR == "twilio":
+        return ProveedorTwilio()
+    if SMS_PROVEEDOR == "http":
+        return ProveedorHTTP(SMS_URL, conexiones)
+    if SMS_PROVEEDOR == "archivo":
+        if not SMS_ARCHIVO:
+            raise ValueError("SMS_PROVEEDOR=archivo requiere SMS_ARCHIVO")
+        return ProveedorArchivo(SMS_ARCHIVO, simulado=False)
+    raise ValueError(f"SMS_PROVEEDOR desconocido: {SMS_PROVEEDOR!r}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ENVÍO
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _intentar(proveedor, telefono: str, mensaje: str, limite: LimiteTasa | None,
+              reintentos: int) -> tuple[bool, str]:
+    for intento in range(reintentos + 1):
+        if limite:
+            limite.esperar()
+        try:
+            return True, proveedor.enviar(telefono, mensaje)
+        except ErrorTransitorio as e:
+            if intento == reintentos:
+                return False, f"Error tras {reintentos + 1} intentos: {e}"
+            time.sleep(0.5 * 2 ** intento * (0.5 + random.random()))
+        except Exception as e:
+            return False, f"Error: {e}"
 
+
+def enviar_lote(envios: list[tuple[str, str]], test_mode: bool = True, progreso=None,
+                trabajadores: int = SMS_TRABAJADORES, por_segundo: float = SMS_POR_SEGUNDO,
+                reintentos: int = SMS_REINTENTOS) -> list[tuple[bool, str]]:
+    """
+    Envía [(telefono, mensaje), ...] en paralelo. Retorna [(éxito, estado)] en
+    el mismo orden. `progreso(hechos, total)` se llama al terminar cada envío.
+    """
+    telefonos  = [normalizar_telefono(tel) for tel, _ in envios]
+    resultados: list[tuple[bool, str]] = [(False, "Teléfono vacío")] * len(envios)
+    pendientes = [i for i, tel in enumerate(telefonos) if tel]
     try:
-        from twilio.rest import Client
-        sid   = st.secrets["twilio"]["account_sid"]
-        token = st.secrets["twilio"]["auth_token"]
-        from_ = st.secrets["twilio"]["from_phone_number"]
-        msg   = Client(sid, token).messages.create(body=mensaje, from_=from_, to=telefono)
-        return True, f"Enviado — SID: {msg.sid}"
-    except KeyError:
-        return False, "Faltan credenciales en st.secrets['twilio']"
+        proveedor = get_proveedor(test_mode, max(1, trabajadores))
+    except (KeyError, FileNotFoundError):       # StreamlitSecretNotFoundError hereda de este
+        falla = (False, "Faltan credenciales en st.secrets['twilio']")
     except Exception as e:
-        return False, f"Error Twilio: {e}"
+        falla = (False, f"Error de configuración SMS: {e}")
+    else:
+        falla = None
+    if falla:
+        for i in pendientes:
+            resultados[i] = falla
+        return resultados
+
+    limite = None if test_mode else LimiteTasa(por_segundo)
+    total  = len(envios)
+    hechos = total - len(pendientes)
+    with ThreadPoolExecutor(max_workers=max(1, trabajadores)) as pool:
+        futuros = {
+            pool.submit(_intentar, proveedor, telefonos[i], envios[i][1], limite, reintentos): i
+            for i in pendientes
+        }
+        for futuro in as_completed(futuros):
+            resultados[futuros[futuro]] = futuro.result()
+            hechos += 1
+            if progreso:
+                progreso(hechos, total)
+    return resultados
+
+
+def enviar_sms(telefono: str, mensaje: str, test_mode: bool = True) -> tuple[bool, str]:
+    """
+    Envía un SMS con el proveedor configurado.
+    - test_mode=True  → no llama a la API (constancia en SMS_ARCHIVO, si está definido)
+    Retorna (éxito: bool, estado: str)
+    """
+    return enviar_lote([(telefono, mensaje)], test_mode)[0]
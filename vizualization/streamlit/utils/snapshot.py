@@ -0,0 +1,66 @@
+# utils/snapshot.py
+# ─── Snapshot columnar (Parquet) del registro para lecturas analíticas ───────
+#
+# El registro se guarda como texto; convertir fechas y números en cada carga
+# del dashboard es lo más caro. Aquí se materializa una copia tipada en
+# Parquet (tipos según ESQUEMA en constantes) que se reconstruye solo cuando
+# cambia version_registros(), y se lee únicamente con las columnas pedidas.
+#
+# Sin pyarrow instalado se degrada a tipar el registro en cada lectura.
+
+import os
+
+import pandas as pd
+
+from utils.archivos import bloqueo_archivo, escribir_atomico
+from utils.constantes import SNAPSHOT_REGISTROS, tipar_registros
+from utils.csv_helpers import leer_registros, version_registros
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def _path_version(path: str) -> str:
+    return path + ".version"
+
+
+def _version_snapshot(path: str) -> str | None:
+    try:
+        with open(_path_version(path), encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def construir_snapshot(path: str = SNAPSHOT_REGISTROS) -> str:
+    """Reescribe el snapshot desde el registro actual. Retorna la versión materializada."""
+    with bloqueo_archivo(path):
+        version = version_registros()
+        if _version_snapshot(path) == version and os.path.isfile(path):
+            return version
+        df = tipar_registros(leer_registros())
+        tmp = f"{path}.tmp{os.getpid()}"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        escribir_atomico(_path_version(path), version)
+        return version
+
+
+def leer_snapshot(columnas: list[str] | None = None,
+                  path: str = SNAPSHOT_REGISTROS) -> pd.DataFrame:
+    """
+    Registro tipado, solo con `columnas` (las que no existan se ignoran).
+    Reconstruye el snapshot si el registro cambió desde la última vez.
+    """
+    if pq is None:
+        df = tipar_registros(leer_registros())
+        return df[[c for c in columnas if c in df.columns]] if columnas else df
+
+    if _version_snapshot(path) != version_registros() or not os.path.isfile(path):
+        construir_snapshot(path)
+    if columnas:
+        disponibles = set(pq.read_schema(path).names)
+        columnas = [c for c in columnas if c in disponibles]
+    return pd.read_parquet(path, columns=columnas)
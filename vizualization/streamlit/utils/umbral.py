@@ -0,0 +1,83 @@
+# utils/umbral.py
+# ─── Barrido de umbral TSH por búsqueda binaria ──────────────────────────────
+#
+# Sospechoso  = TSH 1ª ≥ umbral
+# Confirmado  = TSH 1ª ≥ umbral y TSH 2ª ≥ umbral  ⇔  min(TSH 1ª, TSH 2ª) ≥ umbral
+#
+# Con los valores ordenados una sola vez, el número de casos por encima de
+# cualquier umbral es n − searchsorted(valores, umbral): mover el slider no
+# vuelve a recorrer los registros, y la curva completa (1–30) sale de un único
+# searchsorted vectorizado.
+
+import numpy as np
+import pandas as pd
+
+from utils.constantes import UMBRAL_MAX, UMBRAL_MIN, UMBRAL_PASO
+
+
+class _Ordenados:
+    """TSH 1ª y min(TSH 1ª, TSH 2ª) ordenados de un conjunto de registros."""
+
+    def __init__(self, tsh1: np.ndarray, tsh2: np.ndarray):
+        self.n    = len(tsh1)
+        self.tsh1 = np.sort(tsh1)
+        self.conf = np.sort(np.minimum(tsh1, tsh2))
+
+    def contar(self, umbrales) -> tuple[np.ndarray, np.ndarray]:
+        """(sospechosos, confirmados) para cada umbral (> 0)."""
+        u = np.asarray(umbrales, dtype=float)
+        sosp = self.n - np.searchsorted(self.tsh1, u, side="left")
+        conf = self.n - np.searchsorted(self.conf, u, side="left")
+        return sosp, conf
+
+
+class BarridoUmbral:
+    """
+    Conteos de sospechosos/confirmados a cualquier umbral, en total y por
+    grupo. `tsh1`/`tsh2` con 0 = sin resultado; `grupos` {nombre: etiquetas
+    por registro} (p. ej. sexo, prematuro, tipo de muestra).
+    """
+
+    def __init__(self, tsh1, tsh2, grupos: dict[str, pd.Series] | None = None):
+        tsh1 = np.asarray(tsh1, dtype=float)
+        tsh2 = np.asarray(tsh2, dtype=float)
+        self.n     = len(tsh1)
+        self.total = _Ordenados(tsh1, tsh2)
+        self.grupos: dict[str, dict] = {}
+        for nombre, etiquetas in (grupos or {}).items():
+            codigos, cats = pd.factorize(pd.Series(etiquetas).to_numpy(), sort=True)
+            self.grupos[nombre] = {
+                cat: _Ordenados(tsh1[codigos == i], tsh2[codigos == i])
+                for i, cat in enumerate(cats) if cat != ""
+            }
+
+    def en(self, umbral: float) -> dict:
+        """Sospechosos, confirmados y tasa de confirmación a un umbral."""
+        sosp, conf = (int(x[0]) for x in self.total.contar([umbral]))
+        return {"sospechosos": sosp, "confirmados": conf,
+                "tasa_confirmacion": conf / sosp if sosp else np.nan}
+
+    def curva(self, umbrales=None) -> pd.DataFrame:
+        """Conteos, tasa de confirmación e incidencia (%) en cada umbral del rango."""
+        if umbrales is None:
+            umbrales = np.arange(UMBRAL_MIN, UMBRAL_MAX + UMBRAL_PASO / 2, UMBRAL_PASO)
+        sosp, conf = self.total.contar(umbrales)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame({
+                "umbral":            umbrales,
+                "sospechosos":       sosp,
+                "confirmados":       conf,
+                "tasa_confirmacion": np.where(sosp > 0, conf / sosp, np.nan),
+                "incidencia":        conf / self.n * 100 if self.n else np.nan,
+            })
+
+    def por_grupo(self, nombre: str, umbral: float) -> pd.DataFrame:
+        """Total, sospechosos, confirmados e incidencia (%) por grupo a un umbral."""
+        filas = []
+        for cat, orden in self.grupos.get(nombre, {}).items():
+            sosp, conf = (int(x[0]) for x in orden.contar([umbral]))
+            filas.append({nombre: cat, "total": orden.n, "sospechosos": sosp,
+                          "confirmados": conf,
+                          "incidencia": conf / orden.n * 100 if orden.n else np.nan})
+        return pd.DataFrame(filas, columns=[nombre, "total", "sospechosos",
+                                            "confirmados", "incidencia"])
@@ -1,9 +1,30 @@
 # utils/validaciones.py
 # ─── Funciones de validación reutilizables ────────────────────────────────────
+#
+# val_tsh / val_peso validan un campo del formulario. Las variantes *_lote
+# validan una columna completa de una vez (coma decimal con str.replace,
+# to_numeric y máscaras de rango) y retornan los valores como float junto a un
+# código de error por fila; mensajes() los traduce a los mismos textos que las
+# versiones de un valor. python -m utils.validaciones revisa todo el registro.
 
+import argparse
 from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
 from utils.constantes import TSH_MIN, TSH_MAX, PESO_MIN, PESO_MAX
 
+# Códigos de error de las validaciones por lote
+VALIDO, VACIO, NO_NUMERICO, BAJO, ALTO = 0, 1, 2, 3, 4
+
+# Textos de mensajes() por código (VACIO, NO_NUMERICO, BAJO, ALTO), con los
+# límites y la unidad de cada medida; {campo} es la etiqueta de la columna
+TEXTOS_TSH  = ("{campo} es obligatorio", "{campo} debe ser un número",
+               f"{{campo}} demasiado bajo (mín {TSH_MIN})", f"{{campo}} imposible (máx {TSH_MAX} µIU/mL)")
+TEXTOS_PESO = ("{campo} es obligatorio", "{campo} debe ser un número",
+               f"{{campo}} muy bajo (mín {PESO_MIN} g)", f"{{campo}} imposible (máx {PESO_MAX} g)")
+
 
 def val_tsh(text, campo="TSH"):
     """Valida un valor de TSH. Retorna (float|None, error|None)."""
@@ -33,3 +54,107 @@ def val_peso(text):
     if v > PESO_MAX:
         return None, f"Peso imposible (máx {PESO_MAX} g)"
     return v, None
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# POR LOTE
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _validar_lote(valores, minimo: float, maximo: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (float con NaN donde hay error, código por fila). Acepta texto (coma o
+    punto decimal) o números; vacío / NaN → VACIO.
+    """
+    s = pd.Series(valores)
+    if pd.api.types.is_numeric_dtype(s):
+        v = s.to_numpy(dtype=float)
+        vacio = np.isnan(v)
+    else:
+        t = s.astype("string").str.strip()
+        vacio = (t.isna() | (t == "")).to_numpy()
+        v = pd.to_numeric(t.str.replace(",", ".", regex=False), errors="coerce").to_numpy(dtype=float)
+    codigos = np.select(
+        [vacio, np.isnan(v), v < minimo, v > maximo],
+        [VACIO, NO_NUMERICO, BAJO, ALTO],
+        VALIDO,
+    ).astype(np.int8)
+    return np.where(codigos == VALIDO, v, np.nan), codigos
+
+
+def val_tsh_lote(valores, pendiente_cero: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    val_tsh sobre una columna. Retorna (TSH float, códigos). Con
+    `pendiente_cero` el 0 del registro (resultado pendiente) cuenta como VACIO.
+    """
+    v, codigos = _validar_lote(valores, TSH_MIN, TSH_MAX)
+    if pendiente_cero:
+        crudos = pd.to_numeric(pd.Series(valores).astype("string").str.replace(",", ".", regex=False),
+                               errors="coerce").to_numpy(dtype=float)
+        codigos[crudos == 0] = VACIO
+    return v, codigos
+
+
+def val_peso_lote(valores) -> tuple[np.ndarray, np.ndarray]:
+    """val_peso sobre una columna. Retorna (peso float, códigos)."""
+    return _validar_lote(valores, PESO_MIN, PESO_MAX)
+
+
+def mensajes(codigos, campo: str = "TSH", textos: tuple = TEXTOS_TSH) -> np.ndarray:
+    """
+    Texto de error por fila ("" si VALIDO), igual al de val_tsh (TEXTOS_TSH)
+    o val_peso (TEXTOS_PESO) con la etiqueta `campo`.
+    """
+    tabla = [""] + [t.format(campo=campo) for t in textos]
+    return np.asarray(tabla, dtype=object)[np.asarray(codigos, dtype=int)]
+
+
+def reporte_registros(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Revalida el registro completo (texto, como leer_registros) con los rangos
+    actuales de constantes. Una fila por valor inválido: id, ficha_id, campo,
+    valor, motivo. TSH vacío o 0 = pendiente y no se reporta; el peso es obligatorio.
+    """
+    campos = [("tsh_neonatal", "TSH 1", True, TEXTOS_TSH),
+              ("resultado_muestra_2", "TSH 2", True, TEXTOS_TSH),
+              ("peso", "Peso", False, TEXTOS_PESO)]
+    partes = []
+    for col, nombre, opcional, textos in campos:
+        if col not in df.columns:
+            continue
+        if col == "peso":
+            _, codigos = val_peso_lote(df[col])
+        else:
+            _, codigos = val_tsh_lote(df[col], pendiente_cero=True)
+        malos = codigos != VALIDO
+        if opcional:
+            malos &= codigos != VACIO
+        if malos.any():
+            partes.append(pd.DataFrame({
+                "id":       df.loc[malos, "id"].to_numpy(),
+                "ficha_id": df.loc[malos, "ficha_id"].to_numpy(),
+                "campo":    col,
+                "valor":    df.loc[malos, col].to_numpy(),
+                "motivo":   mensajes(codigos[malos], nombre, textos),
+            }))
+    if not partes:
+        return pd.DataFrame(columns=["id", "ficha_id", "campo", "valor", "motivo"])
+    return pd.concat(partes, ignore_index=True)
+
+
+if __name__ == "__main__":
+    from utils.csv_helpers import leer_registros
+
+    parser = argparse.ArgumentParser(description="Revalida todo el registro con los rangos actuales")
+    parser.add_argument("--salida", help="CSV donde guardar el detalle de valores inválidos")
+    args = parser.parse_args()
+
+    inicio = datetime.now()
+    df = leer_registros()
+    reporte = reporte_registros(df)
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"{len(df):,} registros revisados en {segundos:.1f} s — {len(reporte):,} valores inválidos")
+    for (campo, motivo), n in reporte.groupby(["campo", "motivo"]).size().items():
+        print(f"  {campo:<22}{motivo:<40}{n:>8,}")
+    if args.salida and len(reporte):
+        reporte.to_csv(args.salida, index=False)
+        print(f"  detalle en {args.salida}")